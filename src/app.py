@@ -1,102 +1,510 @@
 from flask import Flask, render_template, request, jsonify, redirect
-import pandas as pd
+import numpy as np
+import argparse
 import os
 import glob
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import re
+import subprocess
+import sys
+import time
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
 from typing import Dict, List, Tuple
+from lineup_optimizer import optimize_roster
+from live_predictor import LivePredictor, PredictionError
+from season_simulator import BOOM_POINTS, BUST_POINTS, ResidualModel, simulate_seasons
+
+# Brotli is optional, gzip is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 
-class QBDataManager:
-    """Manages QB prediction data and calculations"""
+WEEKS = list(range(1, 19))
+DEFAULT_BUNDLE = "data/predictions/predictions_bundle.npz"
+# Numbers each PredictionSnapshot as it is built, so the response cache can tell newer data from older
+SNAPSHOT_SEQUENCE = itertools.count()
+
+# Fix qb names
+QB_NAME_MAPPING = {
+    'Mahomes': 'Patrick Mahomes',
+    'Mathew Stafford': 'Matthew Stafford',
+    'Cj Stroud': 'C.J. Stroud'
+}
+
+# Quantile columns written by qb_predictor.py --quantiles, e.g. Predicted_P10_Points
+QUANTILE_COLUMN = re.compile(r"Predicted_P([0-9.]+)_Points")
+
+def display_name(qb_key: str) -> str:
+    """Site name of a QB from its file prefix, e.g. cj_stroud -> C.J. Stroud"""
+    qb_name = qb_key.replace("_", " ").title()
+    return QB_NAME_MAPPING.get(qb_name, qb_name)
+
+def load_qb_entry(file_path: str) -> Dict:
+    """Read one prediction file into the week rows a snapshot is built from"""
+    # Extract QB name from filename 
+    filename = os.path.basename(file_path)
+    qb_name = display_name(filename.replace("_2025_predictions.csv", ""))
     
-    def __init__(self):
-        self.predictions_dir = "data/predictions"
-        self.schedule_file = "data/nfl_schedule_2025.csv"
-        self.qb_predictions = {}
-        self.qb_totals = {}
-        self.schedule_data = None
-        self.load_data()
+    # pandas is only needed when reading CSVs, a fresh bundle starts the app without it
+    import pandas as pd
+    with open(file_path, "rb") as f:
+        content = f.read()
+    df = pd.read_csv(io.BytesIO(content))
     
-    def load_data(self):
-        """Load all QB prediction data and schedule data"""
-        # Load schedule data
-        if os.path.exists(self.schedule_file):
-            self.schedule_data = pd.read_csv(self.schedule_file)
+    # First prediction of each week counts, weeks without one are byes
+    opponents = ['BYE'] * len(WEEKS)
+    points = np.zeros(len(WEEKS))
+    is_bye = np.ones(len(WEEKS), dtype=bool)
+    quantile_columns = {f"p{match[1]}": col for col in df.columns if (match := QUANTILE_COLUMN.fullmatch(col))}
+    quantiles = {label: np.full(len(WEEKS), np.nan) for label in quantile_columns}
+    filled = set()
+    for i, (week, opponent, predicted) in enumerate(zip(df['Week'], df['Opponent'], df['Predicted_Fantasy_Points'])):
+        col = int(week) - 1
+        if 0 <= col < len(WEEKS) and col not in filled:
+            filled.add(col)
+            opponents[col] = opponent
+            points[col] = predicted
+            is_bye[col] = opponent == 'BYE'
+            for label, column in quantile_columns.items():
+                quantiles[label][col] = df[column].iat[i]
+    
+    return {
+        'qb_name': qb_name,
+        'opponents': opponents,
+        'points': points,
+        'is_bye': is_bye,
+        # Floor/ceiling points per week, empty when the file has no quantile columns
+        'quantiles': quantiles,
+        # Calculate total projected points 
+        'total': float(df['Predicted_Fantasy_Points'].sum()),
+        'content_hash': hashlib.sha1(content).hexdigest()
+    }
+
+class PredictionSnapshot:
+    """Immutable view of every QB's predictions, replaced as a whole when files change"""
+    
+    def __init__(self, entries: Dict, schedule_records: List, file_stats: Dict):
+        """entries maps each prediction file to its load_qb_entry result, in file order"""
+        self.entries = entries
+        self.schedule_records = schedule_records
+        self.file_stats = file_stats
+        self.weeks = WEEKS
         
-        # Load all QB prediction files
-        prediction_files = glob.glob(os.path.join(self.predictions_dir, "*_2025_predictions.csv"))
+        # Dense QB x week arrays, row i belongs to qb_names[i]
+        self.qb_names = []
+        self.qb_index = {}
+        self.qb_totals = {}
+        rows = {}
+        for entry in entries.values():
+            if entry['qb_name'] not in self.qb_index:
+                self.qb_index[entry['qb_name']] = len(self.qb_names)
+                self.qb_names.append(entry['qb_name'])
+            rows[entry['qb_name']] = entry
+            self.qb_totals[entry['qb_name']] = entry['total']
+        ordered = [rows[qb_name] for qb_name in self.qb_names]
         
-        for file_path in prediction_files:
-            # Extract QB name from filename 
-            filename = os.path.basename(file_path)
-            qb_name = filename.replace("_2025_predictions.csv", "").replace("_", " ").title()
-            
-            # Fix qb names
-            qb_name_mapping = {
-                'Mahomes': 'Patrick Mahomes',
-                'Mathew Stafford': 'Matthew Stafford',
-                'Cj Stroud': 'C.J. Stroud'
-            }
-            qb_name = qb_name_mapping.get(qb_name, qb_name)
-            
-            # Load predictions
-            df = pd.read_csv(file_path)
-            self.qb_predictions[qb_name] = df
-            
-            # Calculate total projected points 
-            total_points = self.calculate_total_points(qb_name, df)
-            self.qb_totals[qb_name] = total_points
-    
-    def calculate_total_points(self, qb_name: str, predictions_df: pd.DataFrame) -> float:
-        """Calculate total projected fantasy points for a QB"""
-        return predictions_df['Predicted_Fantasy_Points'].sum()
+        opponent_lookup = {'BYE': 0}
+        self.opponent_codes = np.array(
+            [[opponent_lookup.setdefault(opponent, len(opponent_lookup)) for opponent in entry['opponents']] for entry in ordered],
+            dtype=np.int16
+        ).reshape(len(ordered), len(WEEKS))
+        self.opponent_names = list(opponent_lookup)
+        self.points = np.array([entry['points'] for entry in ordered]).reshape(len(ordered), len(WEEKS))
+        self.bye_mask = np.array([entry['is_bye'] for entry in ordered], dtype=bool).reshape(len(ordered), len(WEEKS))
+        # QB x quantile x week, NaN for QBs predicted without that quantile
+        self.quantile_labels = sorted({label for entry in ordered for label in entry['quantiles']},
+                                      key=lambda label: float(label[1:]))
+        self.quantile_points = quantile_array(ordered, self.quantile_labels)
+        self.rankings = sorted(self.qb_totals.items(), key=lambda x: x[1], reverse=True)
+        
+        # Data version for cached responses, changes whenever an input file does
+        self.version = hashlib.sha1(repr(sorted(file_stats.items())).encode()).hexdigest()
+        # Creation order, a reload always builds the newer snapshot later
+        self.sequence = next(SNAPSHOT_SEQUENCE)
+        self.last_modified = datetime.fromtimestamp(
+            max((mtime_ns for _, mtime_ns in file_stats.values()), default=0) / 1e9, timezone.utc
+        ).replace(microsecond=0)
+        for array in (self.points, self.opponent_codes, self.bye_mask, self.quantile_points):
+            array.flags.writeable = False
     
     def get_qb_rankings(self) -> List[Tuple[str, float]]:
         """Get QB rankings sorted by total projected points"""
-        rankings = [(name, points) for name, points in self.qb_totals.items()]
-        rankings.sort(key=lambda x: x[1], reverse=True)
-        return rankings
+        return list(self.rankings)
     
     def get_qb_comparison_data(self, qb_names: List[str]) -> Dict:
         """Get weekly comparison data for selected QBs"""
         comparison_data = {
-            'weeks': list(range(1, 19)),  
+            'weeks': list(self.weeks),  
             'qbs': {},
             'totals': {},  
-            'schedule': self.schedule_data.to_dict('records') if self.schedule_data is not None else []
+            'schedule': self.schedule_records
         }
         
-        # Get data for each selected QB
+        # Each selected QB is one row of the dense arrays
         for qb_name in qb_names:
-            if qb_name in self.qb_predictions:
-                qb_data = self.qb_predictions[qb_name]
-                qb_weekly_data = {}
-                for week in range(1, 19):
-                    # Find the prediction for this week
-                    week_data = qb_data[qb_data['Week'] == week]
-                    if not week_data.empty:
-                        row = week_data.iloc[0]
-                        qb_weekly_data[week] = {
-                            'opponent': row['Opponent'],
-                            'predicted_points': row['Predicted_Fantasy_Points'],
-                            'is_bye': row['Opponent'] == 'BYE'
-                        }
-                    else:
-                        # handle no prediction for this week
-                        qb_weekly_data[week] = {
-                            'opponent': 'BYE',
-                            'predicted_points': 0.0,
-                            'is_bye': True
-                        }
-                
-                comparison_data['qbs'][qb_name] = qb_weekly_data
-                # Add the pre-calculated total points
-                comparison_data['totals'][qb_name] = self.qb_totals.get(qb_name, 0)
+            row = self.qb_index.get(qb_name)
+            if row is None:
+                continue
+            opponents = [self.opponent_names[code] for code in self.opponent_codes[row].tolist()]
+            comparison_data['qbs'][qb_name] = {
+                week: {'opponent': opponent, 'predicted_points': points, 'is_bye': is_bye}
+                for week, opponent, points, is_bye in zip(self.weeks, opponents, self.points[row].tolist(), self.bye_mask[row].tolist())
+            }
+            for label, week_points in zip(self.quantile_labels, self.quantile_points[row].tolist()):
+                for week, points in zip(self.weeks, week_points):
+                    if not np.isnan(points):
+                        comparison_data['qbs'][qb_name][week].setdefault('quantiles', {})[label] = points
+            # Add the pre-calculated total points
+            comparison_data['totals'][qb_name] = self.qb_totals[qb_name]
         
         return comparison_data
 
-# Initialize data manager
-qb_manager = QBDataManager()
+def quantile_array(entries: List, labels: List) -> np.ndarray:
+    """Entry x quantile x week points, NaN where an entry has no such quantile"""
+    quantiles = np.full((len(entries), len(labels), len(WEEKS)), np.nan)
+    for row, entry in enumerate(entries):
+        for i, label in enumerate(labels):
+            if label in entry['quantiles']:
+                quantiles[row, i] = entry['quantiles'][label]
+    return quantiles
+
+def write_prediction_bundle(snapshot: PredictionSnapshot, bundle_file: str):
+    """Pack a snapshot into one .npz: the dense arrays plus a JSON metadata block"""
+    files = [
+        {'path': path, 'stat': list(snapshot.file_stats[path]), 'qb_name': entry['qb_name'],
+         'total': entry['total'], 'content_hash': entry['content_hash']}
+        for path, entry in snapshot.entries.items()
+    ]
+    metadata = {
+        'files': files,
+        'schedule_records': snapshot.schedule_records,
+        'file_stats': [[path, list(stat)] for path, stat in snapshot.file_stats.items()],
+        'opponent_names': snapshot.opponent_names,
+        'quantile_labels': snapshot.quantile_labels
+    }
+    # Rows follow the entries so files sharing a QB name keep their own weeks
+    rows = list(snapshot.entries.values())
+    opponent_lookup = {name: code for code, name in enumerate(snapshot.opponent_names)}
+    tmp_file = f"{bundle_file}.tmp.npz"
+    np.savez(
+        tmp_file,
+        points=np.array([entry['points'] for entry in rows]).reshape(len(rows), len(WEEKS)),
+        opponent_codes=np.array([[opponent_lookup[o] for o in entry['opponents']] for entry in rows],
+                                dtype=np.int16).reshape(len(rows), len(WEEKS)),
+        bye_mask=np.array([entry['is_bye'] for entry in rows], dtype=bool).reshape(len(rows), len(WEEKS)),
+        quantile_points=quantile_array(rows, snapshot.quantile_labels),
+        metadata=np.frombuffer(json.dumps(metadata).encode(), dtype=np.uint8)
+    )
+    os.replace(tmp_file, bundle_file)
+
+def read_prediction_bundle(bundle_file: str) -> PredictionSnapshot:
+    """Load a snapshot written by write_prediction_bundle, numpy and json only"""
+    with np.load(bundle_file, allow_pickle=False) as bundle:
+        metadata = json.loads(bundle['metadata'].tobytes())
+        points, opponent_codes, bye_mask = bundle['points'], bundle['opponent_codes'], bundle['bye_mask']
+        quantile_points = bundle['quantile_points']
+    opponent_names = metadata['opponent_names']
+    quantile_labels = metadata['quantile_labels']
+    entries = {
+        item['path']: {
+            'qb_name': item['qb_name'],
+            'opponents': [opponent_names[code] for code in opponent_codes[row].tolist()],
+            'points': points[row],
+            'is_bye': bye_mask[row],
+            'quantiles': {label: quantile_points[row, i] for i, label in enumerate(quantile_labels)
+                          if not np.isnan(quantile_points[row, i]).all()},
+            'total': item['total'],
+            'content_hash': item['content_hash']
+        }
+        for row, item in enumerate(metadata['files'])
+    }
+    file_stats = {path: tuple(stat) for path, stat in metadata['file_stats']}
+    return PredictionSnapshot(entries, metadata['schedule_records'], file_stats)
+
+class QBDataManager:
+    """Manages QB prediction data and calculations"""
+    
+    def __init__(self, predictions_dir: str = "data/predictions", schedule_file: str = "data/nfl_schedule_2025.csv",
+                 bundle_file: str | None = DEFAULT_BUNDLE, watch_interval: float | None = 5.0):
+        """
+        Nothing is read until the snapshot is first used, which also starts the watcher
+        that polls the files every watch_interval seconds, None leaves it off
+        """
+        self.predictions_dir = predictions_dir
+        self.schedule_file = schedule_file
+        self.bundle_file = bundle_file
+        self.watch_interval = watch_interval
+        self.current = None
+        self.load_lock = threading.Lock()
+        self.watcher = None
+    
+    @property
+    def snapshot(self) -> PredictionSnapshot:
+        """The current snapshot, loaded on first use"""
+        if self.current is None:
+            with self.load_lock:
+                if self.current is None:
+                    self.load_data()
+                    # Started by whichever process serves, so gunicorn workers reload too
+                    if self.watch_interval is not None:
+                        self.start_watcher(self.watch_interval)
+        return self.current
+    
+    def load_data(self):
+        """Load all QB prediction data and schedule data, from the bundle when it matches the files"""
+        if self.bundle_file and os.path.exists(self.bundle_file):
+            try:
+                snapshot = read_prediction_bundle(self.bundle_file)
+            except (OSError, ValueError, KeyError):
+                snapshot = None
+            # Only the stats are compared, so a stale bundle costs one stat per file
+            if snapshot is not None and snapshot.file_stats == self.current_file_stats():
+                self.current = snapshot
+                return
+        self.current = self.build_snapshot(None)
+    
+    def current_file_stats(self) -> Dict:
+        """(size, mtime) of every input file as they are now"""
+        paths = glob.glob(os.path.join(self.predictions_dir, "*_2025_predictions.csv"))
+        if os.path.exists(self.schedule_file):
+            paths.append(self.schedule_file)
+        stats = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stats[path] = (st.st_size, st.st_mtime_ns)
+        return stats
+    
+    def build_snapshot(self, previous: PredictionSnapshot | None) -> PredictionSnapshot:
+        """
+        Build a snapshot from the files on disk, re-reading only the files whose size
+        or mtime differ from previous. A file that fails to parse keeps its old entry
+        and is retried on the next reload.
+        """
+        previous_entries = previous.entries if previous is not None else {}
+        previous_stats = previous.file_stats if previous is not None else {}
+        file_stats = {}
+        entries = {}
+        
+        # Load all QB prediction files
+        for file_path in glob.glob(os.path.join(self.predictions_dir, "*_2025_predictions.csv")):
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            stat_key = (st.st_size, st.st_mtime_ns)
+            if previous_stats.get(file_path) == stat_key:
+                entries[file_path] = previous_entries[file_path]
+                file_stats[file_path] = stat_key
+                continue
+            try:
+                entry = load_qb_entry(file_path)
+            except (OSError, ValueError, KeyError):
+                if file_path in previous_entries:
+                    entries[file_path] = previous_entries[file_path]
+                    file_stats[file_path] = previous_stats[file_path]
+                continue
+            # A touched file with the same content keeps its entry
+            old_entry = previous_entries.get(file_path)
+            entries[file_path] = old_entry if old_entry and old_entry['content_hash'] == entry['content_hash'] else entry
+            file_stats[file_path] = stat_key
+        
+        # Load schedule data, converted to records once for every request
+        schedule_records = previous.schedule_records if previous is not None else []
+        if os.path.exists(self.schedule_file):
+            st = os.stat(self.schedule_file)
+            stat_key = (st.st_size, st.st_mtime_ns)
+            if previous_stats.get(self.schedule_file) != stat_key:
+                import pandas as pd
+                schedule_records = pd.read_csv(self.schedule_file).to_dict('records')
+            file_stats[self.schedule_file] = stat_key
+        
+        return PredictionSnapshot(entries, schedule_records, file_stats)
+    
+    def reload_changed(self) -> bool:
+        """Swap in a new snapshot when any input file changed, returns whether it did"""
+        snapshot = self.build_snapshot(self.snapshot)
+        if snapshot.version == self.snapshot.version:
+            return False
+        # A single reference assignment, requests hold on to the snapshot they started with
+        self.current = snapshot
+        return True
+    
+    def start_watcher(self, interval: float = 5.0):
+        """Poll the prediction files from a daemon thread and reload the ones that change"""
+        if self.watcher is not None:
+            return
+        
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.reload_changed():
+                        print(f"Reloaded predictions for {len(self.snapshot.qb_names)} QBs")
+                except Exception as e:
+                    print(f"Prediction reload failed: {e}")
+        
+        self.watcher = threading.Thread(target=watch, name="prediction-watcher", daemon=True)
+        self.watcher.start()
+    
+    def get_qb_rankings(self) -> List[Tuple[str, float]]:
+        """Get QB rankings sorted by total projected points"""
+        return self.snapshot.get_qb_rankings()
+    
+    def get_qb_comparison_data(self, qb_names: List[str]) -> Dict:
+        """Get weekly comparison data for selected QBs"""
+        return self.snapshot.get_qb_comparison_data(qb_names)
+
+class CachedJSON:
+    """A JSON response serialized and compressed once, served with ETag and Last-Modified"""
+    
+    def __init__(self, payload, last_modified: datetime):
+        self.body = app.json.response(payload).get_data()
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.last_modified = last_modified
+        self.encoded = {'gzip': gzip.compress(self.body, compresslevel=6, mtime=0)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.body)
+    
+    def response(self):
+        """Best encoding the client accepts, or 304 when its cached copy is current"""
+        encoding = next((name for name in ('br', 'gzip') if name in self.encoded and request.accept_encodings[name]), None)
+        response = app.response_class(self.encoded[encoding] if encoding else self.body, mimetype=app.json.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        # Each encoding is a different byte sequence so it gets its own tag
+        response.set_etag(f"{self.etag}-{encoding or 'identity'}")
+        response.last_modified = self.last_modified
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+class APIResponseCache:
+    """Pre-built API responses for one data version, comparisons kept in a bounded LRU"""
+    
+    def __init__(self, max_comparisons: int = 256):
+        self.max_comparisons = max_comparisons
+        self.version = None
+        self.sequence = -1
+        self.rankings = None
+        self.comparisons = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def check_version(self, snapshot: PredictionSnapshot) -> bool:
+        """Whether responses of snapshot can be cached, every cached response is dropped when it is newer"""
+        if snapshot.version == self.version:
+            self.sequence = max(self.sequence, snapshot.sequence)
+            return True
+        if snapshot.sequence < self.sequence:
+            # A request still holding the snapshot from before a reload
+            return False
+        self.version = snapshot.version
+        self.sequence = snapshot.sequence
+        self.rankings = None
+        self.comparisons.clear()
+        return True
+    
+    def rankings_response(self, snapshot: PredictionSnapshot):
+        with self.lock:
+            current = self.check_version(snapshot)
+            if current and self.rankings is None:
+                self.rankings = self.build_rankings(snapshot)
+            cached = self.rankings if current else None
+        if cached is None:
+            cached = self.build_rankings(snapshot)
+        return cached.response()
+    
+    def build_rankings(self, snapshot: PredictionSnapshot) -> CachedJSON:
+        rankings = snapshot.get_qb_rankings()
+        return CachedJSON([{'name': name, 'total_points': points} for name, points in rankings], snapshot.last_modified)
+    
+    def comparison_response(self, snapshot: PredictionSnapshot, qb_names: List[str]):
+        # Order and repeats do not change the payload, so the sorted selection is the key
+        key = tuple(sorted(set(qb_names)))
+        with self.lock:
+            current = self.check_version(snapshot)
+            cached = self.comparisons.get(key) if current else None
+            if cached is not None:
+                self.comparisons.move_to_end(key)
+        if cached is None:
+            cached = CachedJSON(snapshot.get_qb_comparison_data(list(key)), snapshot.last_modified)
+            with self.lock:
+                if current and snapshot.version == self.version:
+                    self.comparisons[key] = cached
+                    while len(self.comparisons) > self.max_comparisons:
+                        self.comparisons.popitem(last=False)
+        return cached.response()
+
+class SeasonSimulator:
+    """Monte Carlo outlooks from the current predictions, errors refitted when the backtest baseline changes"""
+    
+    def __init__(self, baseline_file: str = "data/backtest/baseline.json", max_sims: int = 100000):
+        self.baseline_file = baseline_file
+        self.max_sims = max_sims
+        self.residuals = None
+        self.baseline_stat = None
+        self.lock = threading.Lock()
+    
+    def residual_model(self) -> ResidualModel | None:
+        """Residual model of the baseline as it is now, None when there is no baseline yet"""
+        try:
+            st = os.stat(self.baseline_file)
+        except FileNotFoundError:
+            return None
+        with self.lock:
+            if (st.st_size, st.st_mtime_ns) != self.baseline_stat:
+                self.residuals = ResidualModel.load(self.baseline_file, name_of=display_name)
+                self.baseline_stat = (st.st_size, st.st_mtime_ns)
+            return self.residuals
+    
+    def simulate(self, snapshot: PredictionSnapshot, qb_names: List[str], residuals: ResidualModel, n_sims: int,
+                 seed: int, boom: float, bust: float, thresholds: Tuple) -> Dict:
+        """Summary of n_sims seasons for each QB, drawn from the snapshot's dense week arrays"""
+        rows = [snapshot.qb_index[qb_name] for qb_name in qb_names]
+        simulation = simulate_seasons(qb_names, snapshot.points[rows], snapshot.bye_mask[rows], residuals,
+                                      n_sims, seed, weeks=snapshot.weeks)
+        return {**simulation.summary(boom, bust, thresholds), 'version': snapshot.version}
+
+def measure_startup(runs: int = 5) -> Dict:
+    """Time from a fresh interpreter to the first /api/qb_rankings response, with and without the bundle"""
+    code = (
+        "import time; start = time.perf_counter(); import app; "
+        "response = app.app.test_client().get('/api/qb_rankings'); "
+        "print(time.perf_counter() - start, response.status_code, 'pandas' in sys.modules)"
+    )
+    results = {}
+    for label, bundle_file in (("csv", ""), ("bundle", os.environ.get('QB_PREDICTION_BUNDLE', DEFAULT_BUNDLE))):
+        env = {**os.environ, 'QB_PREDICTION_BUNDLE': bundle_file, 'PYTHONPATH': os.path.dirname(os.path.abspath(__file__))}
+        times = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", f"import sys; {code}"], env=env, check=True,
+                                    capture_output=True, text=True).stdout.split()
+            times.append(float(output[-3]))
+            pandas_loaded = output[-1] == "True"
+        results[label] = {'seconds': min(times), 'pandas_imported': pandas_loaded}
+        print(f"{label:>6}: first response after {min(times) * 1000:.0f} ms (best of {runs}), pandas imported: {pandas_loaded}")
+    return results
+
+# Initialize data manager, QB_PREDICTION_BUNDLE="" turns the bundle off, the data loads and
+# the watcher starts on the first request
+qb_manager = QBDataManager(bundle_file=os.environ.get('QB_PREDICTION_BUNDLE', DEFAULT_BUNDLE) or None)
+response_cache = APIResponseCache()
+# QB_FEATURE_STORE="" rebuilds the live predictor's season matrices on every start
+live_predictor = LivePredictor(name_mapping=QB_NAME_MAPPING,
+                               feature_store_dir=os.environ.get('QB_FEATURE_STORE', "data/feature_store") or None)
+season_simulator = SeasonSimulator(os.environ.get('QB_BACKTEST_BASELINE', "data/backtest/baseline.json"))
 
 @app.route('/')
 def index():
@@ -121,8 +529,7 @@ def compare():
 @app.route('/api/qb_rankings')
 def api_qb_rankings():
     """API endpoint for QB rankings"""
-    rankings = qb_manager.get_qb_rankings()
-    return jsonify([{'name': name, 'total_points': points} for name, points in rankings])
+    return response_cache.rankings_response(qb_manager.snapshot)
 
 @app.route('/api/qb_comparison')
 def api_qb_comparison():
@@ -131,8 +538,100 @@ def api_qb_comparison():
     if len(selected_qbs) < 2:
         return jsonify({'error': 'Please select at least 2 QBs'}), 400
     
-    comparison_data = qb_manager.get_qb_comparison_data(selected_qbs)
-    return jsonify(comparison_data)
+    return response_cache.comparison_response(qb_manager.snapshot, selected_qbs)
+
+@app.route('/api/predict', methods=['POST'])
+def api_predict():
+    """
+    Live prediction for one QB's season with what-if changes, e.g.
+    {"qb": "Josh Allen", "games": [{"week": 3, "opponent": "KC"}, {"week": 1, "Pass_Yds": 310}]}
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or 'qb' not in payload or not isinstance(payload.get('games', []), list):
+        return jsonify({'error': 'Expected a JSON object with a qb and an optional list of games'}), 400
+    
+    try:
+        return jsonify(live_predictor.predict(payload))
+    except PredictionError as e:
+        return jsonify({'error': str(e)}), e.status
+
+@app.route('/api/simulate')
+def api_simulate():
+    """
+    Simulated season outlook of the selected QBs, or every QB when none are given, e.g.
+    /api/simulate?qbs=Josh Allen&qbs=Joe Burrow&sims=20000&seed=0&boom=25&bust=10&threshold=400
+    """
+    snapshot = qb_manager.snapshot
+    selected_qbs = list(dict.fromkeys(request.args.getlist('qbs'))) or list(snapshot.qb_names)
+    unknown = [qb_name for qb_name in selected_qbs if qb_name not in snapshot.qb_index]
+    if unknown:
+        return jsonify({'error': f"Unknown QBs: {', '.join(unknown)}"}), 400
+    
+    n_sims = request.args.get('sims', 20000, type=int)
+    if not 1 <= n_sims <= season_simulator.max_sims:
+        return jsonify({'error': f"sims must be between 1 and {season_simulator.max_sims}"}), 400
+    seed = request.args.get('seed', 0, type=int)
+    if seed < 0:
+        return jsonify({'error': "seed must be a non-negative integer"}), 400
+    residuals = season_simulator.residual_model()
+    if residuals is None:
+        return jsonify({'error': f"No backtest baseline at {season_simulator.baseline_file}, run backtest.py first"}), 503
+    
+    return jsonify(season_simulator.simulate(
+        snapshot, selected_qbs, residuals, n_sims,
+        seed=seed,
+        boom=request.args.get('boom', BOOM_POINTS, type=float),
+        bust=request.args.get('bust', BUST_POINTS, type=float),
+        thresholds=tuple(request.args.getlist('threshold', type=float))
+    ))
+
+@app.route('/api/optimize')
+def api_optimize():
+    """
+    Best weekly starters of a roster and what trade or waiver candidates would add, e.g.
+    /api/optimize?roster=Josh Allen&roster=Joe Burrow&slots=1&candidates=Jared Goff&projection=p10
+    candidates=all scores every QB not on the roster, projection picks a quantile instead of the median
+    """
+    snapshot = qb_manager.snapshot
+    roster = request.args.getlist('roster')
+    if not roster:
+        return jsonify({'error': 'Please give at least 1 roster QB'}), 400
+    candidates = request.args.getlist('candidates')
+    if candidates == ['all']:
+        candidates = list(snapshot.qb_names)
+    
+    slots = request.args.get('slots', 1, type=int)
+    if not 1 <= slots <= len(snapshot.qb_names):
+        return jsonify({'error': f"slots must be between 1 and {len(snapshot.qb_names)}"}), 400
+    projection = request.args.get('projection', 'median')
+    if projection == 'median':
+        points = snapshot.points
+    elif projection in snapshot.quantile_labels:
+        # QBs predicted without the quantile fall back to their median
+        quantile_points = snapshot.quantile_points[:, snapshot.quantile_labels.index(projection)]
+        points = np.where(np.isnan(quantile_points), snapshot.points, quantile_points)
+    else:
+        return jsonify({'error': f"projection must be one of: {', '.join(['median'] + snapshot.quantile_labels)}"}), 400
+    
+    try:
+        result = optimize_roster(snapshot.qb_names, points, snapshot.bye_mask, roster, slots, candidates,
+                                 weeks=snapshot.weeks)
+    except KeyError as e:
+        return jsonify({'error': e.args[0]}), 400
+    return jsonify({**result, 'projection': projection, 'version': snapshot.version})
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    parser = argparse.ArgumentParser(description="Fantasy QB predictor web app")
+    parser.add_argument("--build-bundle", action="store_true", help="pack the prediction CSVs and schedule into the bundle and exit")
+    parser.add_argument("--measure-startup", action="store_true", help="report time to first response with and without the bundle")
+    args = parser.parse_args()
+    
+    if args.build_bundle:
+        bundle_file = qb_manager.bundle_file or DEFAULT_BUNDLE
+        snapshot = qb_manager.build_snapshot(None)
+        write_prediction_bundle(snapshot, bundle_file)
+        print(f"Wrote {len(snapshot.qb_names)} QBs to '{bundle_file}'")
+    elif args.measure_startup:
+        measure_startup()
+    else:
+        app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,204 @@
+'''
+Walk-forward backtest of QBFantasyPredictor.
+
+For every QB and every season N the model is trained on seasons before N and
+predicts season N with its stats blanked out, the same way the 2025 schedule
+is predicted. Accuracy and per-stage wall time are written to a JSON baseline
+so later speed work can be compared against it.
+'''
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from feature_store import FeatureStore
+from qb_predictor import QBFantasyPredictor
+
+# Game stats that are unknown before a game is played
+GAME_STATS = [
+    'Completions', 'Attempts', 'Pass_Yds', 'Pass_TD', 'INT',
+    'Rush_Att', 'Rush_Yds', 'Rush_TD', 'Fantasy_Points'
+]
+STAGES = ["features", "selection", "search", "predict"]
+
+def score(actual: np.ndarray, predicted: np.ndarray) -> dict:
+    """MAE, RMSE and R² of one set of predictions"""
+    errors = predicted - actual
+    total = np.sum((actual - actual.mean()) ** 2)
+    return {
+        'n': int(len(actual)),
+        'mae': float(np.mean(np.abs(errors))),
+        'rmse': float(np.sqrt(np.mean(errors ** 2))),
+        'r2': float(1 - np.sum(errors ** 2) / total) if len(actual) > 1 and total > 0 else None
+    }
+
+def run_fold(data_filename: str, season: int, predictor_options: dict) -> dict | None:
+    """Train on seasons before season and score season, None when there is not enough data"""
+    qb_data = pd.read_csv(data_filename)
+    history = qb_data[qb_data["Season"] < season].copy()
+    test_data = qb_data[qb_data["Season"] == season].copy()
+    test_data = test_data[test_data["Fantasy_Points"].notna()]
+    # Training needs 20 games with points, the same count train_on_qb_data checks
+    if len(test_data) == 0 or history["Fantasy_Points"].notna().sum() < 20:
+        return None
+
+    targets = test_data["Fantasy_Points"].to_numpy()
+    test_data[GAME_STATS] = np.nan
+
+    predictor = QBFantasyPredictor(**predictor_options)
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictor.train_on_qb_data(history)
+        results = predictor.evaluate_model(test_data, targets)
+    order = predictor.prediction_order(test_data)
+
+    return {
+        'qb': os.path.basename(data_filename).replace("_complete_data.csv", ""),
+        'season': season,
+        'n_train': len(history),
+        **score(results['targets'], results['predictions'].astype(np.float64)),
+        'wall_time': time.perf_counter() - start_time,
+        'stage_times': {stage: predictor.stage_times.get(stage, 0.0) for stage in STAGES},
+        'rows': [
+            {'week': int(week), 'actual': float(actual), 'predicted': float(predicted)}
+            for week, actual, predicted in zip(
+                test_data["Week"].to_numpy()[order], results['targets'], results['predictions']
+            )
+        ]
+    }
+
+def summarize(folds: list, key: str) -> dict:
+    """Metrics over the pooled rows of every fold sharing the same qb or season"""
+    grouped = {}
+    for fold in folds:
+        grouped.setdefault(fold[key], []).extend(fold['rows'])
+    return {
+        str(group): score(np.array([row['actual'] for row in rows]), np.array([row['predicted'] for row in rows]))
+        for group, rows in sorted(grouped.items())
+    }
+
+def run_backtest(data_dir: str = "data", seasons: tuple = (2019, 2024), workers: int | None = None,
+                 predictor_options: dict | None = None, feature_store_dir: str | None = None) -> dict:
+    """
+    Run every (QB, season) fold across a process pool and collect the baseline.
+    With feature_store_dir each fold's training and test features are stored there,
+    so later runs over the same data memory-map them instead of recomputing.
+    """
+    data_files = sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv")))
+    if not data_files:
+        raise ValueError(f"No *_complete_data.csv files found in {data_dir}")
+    jobs = [(data_filename, season) for data_filename in data_files for season in range(seasons[0], seasons[1] + 1)]
+
+    # Split the cores between the pool and each fold's own search
+    n_cores = os.cpu_count() or 1
+    workers = max(1, min(workers or n_cores, len(jobs)))
+    fold_options = {'search': "halving", **(predictor_options or {}), 'n_jobs': max(1, n_cores // workers)}
+    if feature_store_dir is not None:
+        fold_options['feature_store'] = FeatureStore(feature_store_dir)
+    print(f"Backtesting {len(jobs)} folds with {workers} workers x {fold_options['n_jobs']} cores")
+
+    start_time = time.perf_counter()
+    folds = []
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_fold, data_filename, season, fold_options): (data_filename, season)
+                   for data_filename, season in jobs}
+        for future in as_completed(futures):
+            data_filename, season = futures[future]
+            try:
+                fold = future.result()
+            except Exception as e:
+                # Keep the finished folds, the failed ones are listed in the report
+                qb_key = os.path.basename(data_filename).replace("_complete_data.csv", "")
+                failed.append({'qb': qb_key, 'season': season, 'error': f"{type(e).__name__}: {e}"})
+                print(f"{qb_key} {season} FAILED: {e}")
+                continue
+            if fold is not None:
+                folds.append(fold)
+    folds.sort(key=lambda fold: (fold['qb'], fold['season']))
+    failed.sort(key=lambda fold: (fold['qb'], fold['season']))
+
+    all_rows = [row for fold in folds for row in fold['rows']]
+    return {
+        'config': {key: value for key, value in fold_options.items() if key in ("search", "time_budget", "max_fits", "lean")},
+        'seasons': list(seasons),
+        'wall_time': time.perf_counter() - start_time,
+        'stage_times': {stage: sum(fold['stage_times'][stage] for fold in folds) for stage in STAGES},
+        'overall': score(np.array([row['actual'] for row in all_rows]), np.array([row['predicted'] for row in all_rows])),
+        'per_qb': summarize(folds, "qb"),
+        'per_season': summarize(folds, "season"),
+        'folds': folds,
+        # A partial baseline is missing the failed folds and should not be compared against a full one
+        'partial': bool(failed),
+        'failed_folds': failed
+    }
+
+def print_report(baseline: dict, reference: dict | None = None) -> None:
+    """Print the per season table and stage times, with MAE deltas against a reference run"""
+    def line(label, metrics, reference_metrics):
+        r2 = f"{metrics['r2']:.3f}" if metrics['r2'] is not None else "  n/a"
+        delta = f"  ({metrics['mae'] - reference_metrics['mae']:+.3f})" if reference_metrics else ""
+        print(f"{label:>10}  {metrics['n']:>5}  {metrics['mae']:6.3f}{delta}  {metrics['rmse']:6.3f}  {r2}")
+
+    print(f"\n{'season':>10}  {'games':>5}  {'MAE':>6}  {'RMSE':>6}  R²")
+    for season, metrics in baseline['per_season'].items():
+        line(season, metrics, reference and reference['per_season'].get(season))
+    line("overall", baseline['overall'], reference and reference['overall'])
+
+    print(f"\nWall time {baseline['wall_time']:.1f}s, summed over folds:")
+    for stage, seconds in baseline['stage_times'].items():
+        print(f"{stage:>10}  {seconds:8.2f}s")
+    if baseline['failed_folds']:
+        print(f"\nPARTIAL: {len(baseline['failed_folds'])} folds failed")
+        for fold in baseline['failed_folds']:
+            print(f"{fold['qb']:>18} {fold['season']}  {fold['error']}")
+
+def write_baseline(baseline: dict, output_filename: str) -> None:
+    """Write the baseline JSON through a temp file"""
+    os.makedirs(os.path.dirname(output_filename) or ".", exist_ok=True)
+    tmp_filename = f"{output_filename}.tmp"
+    with open(tmp_filename, "w") as f:
+        json.dump(baseline, f, indent=1)
+    os.replace(tmp_filename, output_filename)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest across every QB and season")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--first-season", type=int, default=2019)
+    parser.add_argument("--last-season", type=int, default=2024)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for the folds")
+    parser.add_argument("--search", choices=["grid", "halving"], default="halving", help="hyperparameter search mode")
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds allowed for the halving search")
+    parser.add_argument("--max-fits", type=int, default=None, help="model fits allowed for the halving search")
+    parser.add_argument("--lean", action="store_true", help="use the lean float32 predict path")
+    parser.add_argument("--feature-store", nargs="?", const="data/feature_store", default=None,
+                        help="store fold features here (default data/feature_store) and reuse them on later runs")
+    parser.add_argument("--output", default="data/backtest/baseline.json", help="where the baseline JSON is written")
+    parser.add_argument("--compare", default=None, help="earlier baseline JSON to report MAE deltas against")
+    parser.add_argument("--allow-partial", action="store_true",
+                        help="write the baseline to --output even when some folds failed")
+    args = parser.parse_args()
+
+    baseline = run_backtest(args.data_dir, (args.first_season, args.last_season), args.workers, {
+        "search": args.search,
+        "time_budget": args.time_budget,
+        "max_fits": args.max_fits,
+        "lean": args.lean
+    }, args.feature_store)
+    reference = None
+    if args.compare:
+        with open(args.compare) as f:
+            reference = json.load(f)
+    print_report(baseline, reference)
+    output = args.output
+    if baseline['partial'] and not args.allow_partial:
+        # Never replace a full baseline with a partial one by accident
+        output = f"{os.path.splitext(args.output)[0]}.partial.json"
+    write_baseline(baseline, output)
+    print(f"\n{'Partial baseline' if baseline['partial'] else 'Baseline'} saved to '{output}'")
@@ -0,0 +1,292 @@
+'''
+Vectorized feature engine for QB game logs.
+
+Features are declared once in FEATURE_SPEC and computed for one or many QBs
+in a single grouped pass over a stacked array.
+'''
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Bump whenever FEATURE_SPEC or the way it is computed changes, stored features are keyed by it
+FEATURE_SPEC_VERSION = 1
+
+# Each feature is (kind, inputs, parameter):
+#   "row":     parameter is a function of the input columns on the same row
+#   "rolling": parameter is (window, aggregation), computed on previous games only (closed='left')
+#   "flag":    parameter is a quantile, 1 when the input is above that quantile of the QB's rows
+FEATURE_SPEC = {
+    # basic game context
+    "season": ("row", ["Season"], lambda c: c["Season"]),
+    "week": ("row", ["Week"], lambda c: c["Week"]),
+    "is_playoff": ("row", ["Week"], lambda c: (c["Week"] >= 17).astype(int)),
+    "is_early_season": ("row", ["Week"], lambda c: (c["Week"] <= 4).astype(int)),
+    "is_late_season": ("row", ["Week"], lambda c: (c["Week"] >= 14).astype(int)),
+    "completion_rate": ("row", ["Completions", "Attempts"], lambda c: c["Completions"] / c["Attempts"]),
+}
+
+# Rolling averages for key stats
+for window in [3, 5, 10]:
+    FEATURE_SPEC.update({
+        f"fantasy_rolling_{window}": ("rolling", ["Fantasy_Points"], (window, "mean")),
+        f"pass_yds_rolling_{window}": ("rolling", ["Pass_Yds"], (window, "mean")),
+        f"pass_td_rolling_{window}": ("rolling", ["Pass_TD"], (window, "mean")),
+        f"int_rolling_{window}": ("rolling", ["INT"], (window, "mean")),
+        f"rush_yds_rolling_{window}": ("rolling", ["Rush_Yds"], (window, "mean")),
+        f"rush_td_rolling_{window}": ("rolling", ["Rush_TD"], (window, "mean")),
+        f"completion_rate_rolling_{window}": ("rolling", ["completion_rate"], (window, "mean")),
+    })
+
+FEATURE_SPEC.update({
+    # Recent trends (last 2 games)
+    "fantasy_trend": ("rolling", ["Fantasy_Points"], (2, "mean")),
+    "pass_yds_trend": ("rolling", ["Pass_Yds"], (2, "mean")),
+    "pass_td_trend": ("rolling", ["Pass_TD"], (2, "mean")),
+    # Volatility
+    "fantasy_volatility": ("rolling", ["Fantasy_Points"], (5, "std")),
+    "pass_yds_volatility": ("rolling", ["Pass_Yds"], (5, "std")),
+    # Efficiency
+    "yards_per_attempt": ("row", ["Pass_Yds", "Attempts"], lambda c: c["Pass_Yds"] / c["Attempts"]),
+    "td_per_attempt": ("row", ["Pass_TD", "Attempts"], lambda c: c["Pass_TD"] / c["Attempts"]),
+    "int_per_attempt": ("row", ["INT", "Attempts"], lambda c: c["INT"] / c["Attempts"]),
+    # Rolling efficiency
+    "ypa_rolling_3": ("rolling", ["yards_per_attempt"], (3, "mean")),
+    "tpa_rolling_3": ("rolling", ["td_per_attempt"], (3, "mean")),
+    "ipa_rolling_3": ("rolling", ["int_per_attempt"], (3, "mean")),
+    # Defense
+    "defense_strength": ("row", ["Def_FantasyPts_Allowed_pg", "Def_Sacks_pg"],
+                         lambda c: c["Def_FantasyPts_Allowed_pg"] * c["Def_Sacks_pg"]),
+    "pass_defense_rating": ("row", ["Def_PassYds_Allowed_pg", "Def_PassTD_Allowed_pg", "Def_INT_Forced_pg"],
+                            lambda c: c["Def_PassYds_Allowed_pg"] * c["Def_PassTD_Allowed_pg"] / (c["Def_INT_Forced_pg"] + 0.1)),
+    # Game context
+    "total_attempts": ("row", ["Attempts", "Rush_Att"], lambda c: c["Attempts"] + c["Rush_Att"]),
+    "total_yards": ("row", ["Pass_Yds", "Rush_Yds"], lambda c: c["Pass_Yds"] + c["Rush_Yds"]),
+    "total_touchdowns": ("row", ["Pass_TD", "Rush_TD"], lambda c: c["Pass_TD"] + c["Rush_TD"]),
+    # Rolling totals
+    "total_attempts_rolling_3": ("rolling", ["total_attempts"], (3, "mean")),
+    "total_yards_rolling_3": ("rolling", ["total_yards"], (3, "mean")),
+    "total_touchdowns_rolling_3": ("rolling", ["total_touchdowns"], (3, "mean")),
+    # Advanced efficiency
+    "efficiency_score": ("row", ["ypa_rolling_3", "tpa_rolling_3", "ipa_rolling_3"],
+                         lambda c: c["ypa_rolling_3"] * c["tpa_rolling_3"] / (c["ipa_rolling_3"] + 0.01)),
+    "volume_score": ("row", ["total_attempts_rolling_3", "total_yards_rolling_3"],
+                     lambda c: c["total_attempts_rolling_3"] * c["total_yards_rolling_3"] / 1000),
+    "touchdown_efficiency": ("row", ["total_touchdowns_rolling_3", "total_attempts_rolling_3"],
+                             lambda c: c["total_touchdowns_rolling_3"] / (c["total_attempts_rolling_3"] + 1)),
+    "yards_per_touchdown": ("row", ["total_yards_rolling_3", "total_touchdowns_rolling_3"],
+                            lambda c: c["total_yards_rolling_3"] / (c["total_touchdowns_rolling_3"] + 1)),
+    # Opponent difficulty
+    "opponent_sack_rate": ("row", ["Def_Sacks_pg"], lambda c: c["Def_Sacks_pg"]),
+    "opponent_difficulty": ("row", ["Def_FantasyPts_Allowed_pg", "Def_Sacks_pg", "Def_INT_Forced_pg"],
+                            lambda c: (c["Def_FantasyPts_Allowed_pg"] * c["Def_Sacks_pg"]) / (c["Def_INT_Forced_pg"] + 0.1)),
+    # Momentum indicators
+    "fantasy_momentum": ("rolling", ["Fantasy_Points"], (3, "diff_mean")),
+    "pass_yds_momentum": ("rolling", ["Pass_Yds"], (3, "diff_mean")),
+    "touchdown_momentum": ("rolling", ["total_touchdowns"], (3, "diff_mean")),
+    # Consistency features
+    "fantasy_consistency": ("row", ["fantasy_volatility"], lambda c: 1 / (c["fantasy_volatility"] + 0.1)),
+    "pass_yds_consistency": ("row", ["pass_yds_volatility"], lambda c: 1 / (c["pass_yds_volatility"] + 0.1)),
+    # Advanced efficiency
+    "completion_efficiency": ("row", ["completion_rate_rolling_3", "ypa_rolling_3"],
+                              lambda c: c["completion_rate_rolling_3"] * c["ypa_rolling_3"]),
+    "touchdown_rate": ("row", ["total_touchdowns_rolling_3", "total_attempts_rolling_3"],
+                       lambda c: c["total_touchdowns_rolling_3"] / c["total_attempts_rolling_3"]),
+    "interception_rate": ("row", ["int_rolling_3", "total_attempts_rolling_3"],
+                          lambda c: c["int_rolling_3"] / c["total_attempts_rolling_3"]),
+    # Game flow
+    "high_volume_games": ("flag", ["total_attempts_rolling_3"], 0.75),
+    "high_scoring_games": ("flag", ["total_touchdowns_rolling_3"], 0.75),
+})
+
+# Shared intermediates that are computed but not written to the output
+INTERNAL_FEATURES = {"completion_rate"}
+
+def needs_rolling(name: str) -> bool:
+    """Whether a column is, or is built from, a rolling or flag feature"""
+    kind, inputs, _ = FEATURE_SPEC.get(name, ("raw", [], None))
+    return kind in ("rolling", "flag") or any(needs_rolling(dep) for dep in inputs)
+
+def feature_closure(features: list) -> set:
+    """The requested features plus every spec feature they are built from"""
+    closure = set()
+    pending = [name for name in features if name in FEATURE_SPEC]
+    while pending:
+        name = pending.pop()
+        if name not in closure:
+            closure.add(name)
+            pending.extend(dep for dep in FEATURE_SPEC[name][1] if dep in FEATURE_SPEC)
+    return closure
+
+def sort_order(dates: np.ndarray, group_codes: np.ndarray) -> np.ndarray:
+    """Row order by group, then date, with ties ordered like DataFrame.sort_values("date") per group"""
+    by_group = np.argsort(group_codes, kind="stable")
+    boundaries = np.flatnonzero(np.diff(group_codes[by_group])) + 1
+    return np.concatenate([
+        rows[np.argsort(dates[rows], kind="quicksort")] for rows in np.split(by_group, boundaries)
+    ])
+
+def rolling_aggregate(values: np.ndarray, position: np.ndarray, window: int, aggregation: str) -> np.ndarray:
+    """
+    Closed-left rolling mean or std of every column of a stacked (rows, columns) array.
+    position is each row's index within its QB so windows never cross QBs.
+    """
+    n_rows, n_cols = values.shape
+    padded = np.vstack([np.full((window, n_cols), np.nan), values])
+    # windows[i] holds rows i-window .. i-1 of values
+    windows = sliding_window_view(padded, window, axis=0)[:n_rows]
+    if aggregation == "mean":
+        result = windows.sum(axis=-1) / window
+    else:
+        result = windows.std(axis=-1, ddof=1)
+    result[position < window] = np.nan
+    return result
+
+def grouped_diff(values: np.ndarray, position: np.ndarray) -> np.ndarray:
+    """Row to row difference within each QB, NaN on each QB's first game"""
+    result = np.empty_like(values)
+    result[1:] = values[1:] - values[:-1]
+    result[position == 0] = np.nan
+    return result
+
+def group_positions(group_codes: np.ndarray) -> np.ndarray:
+    """Index of each row within its QB, for rows already sorted by QB"""
+    starts = np.r_[0, np.flatnonzero(np.diff(group_codes)) + 1]
+    return np.arange(len(group_codes)) - np.repeat(starts, np.diff(np.r_[starts, len(group_codes)]))
+
+def compute_features(data: pd.DataFrame, group_col: str | None = None, features: list | None = None) -> pd.DataFrame:
+    """
+    Compute every feature in FEATURE_SPEC for one QB, or for many QBs stacked in one
+    frame when group_col names the column identifying each QB. Rows come back sorted
+    by QB and date. When features is given only those and their dependencies are computed.
+
+    Parity with the old pandas path (reference_features) is only within tolerance, not exact:
+    rolling means are a window sum divided by the window rather than the running sums pandas
+    keeps, so float columns agree to rtol 1e-9 / atol 1e-12. Row order, NaN positions and the
+    integer and flag columns match exactly.
+    """
+    if group_col is None:
+        group_codes = np.zeros(len(data), dtype=np.int64)
+    else:
+        group_codes, _ = pd.factorize(data[group_col], sort=True)
+    order = sort_order(data["date"].to_numpy(), group_codes)
+    data = data.iloc[order]
+    group_codes = group_codes[order]
+
+    columns = compute_feature_arrays(lambda name: data[name].to_numpy(), group_codes, features)
+    data = data.drop(columns=[name for name in columns if name in data.columns])
+    return pd.concat([data, pd.DataFrame(columns, index=data.index)], axis=1)
+
+def compute_feature_arrays(raw_column, group_codes: np.ndarray, features: list | None = None) -> dict:
+    """
+    Array core of compute_features. raw_column(name) returns a raw input column with rows
+    already sorted by QB and date, group_codes gives each row's QB in the same order.
+    Returns the output feature columns keyed by name.
+    """
+    spec = FEATURE_SPEC
+    if features is not None:
+        closure = feature_closure(features)
+        spec = {name: entry for name, entry in FEATURE_SPEC.items() if name in closure}
+    position = group_positions(group_codes)
+
+    columns = {}
+    def column(name):
+        if name not in columns:
+            columns[name] = raw_column(name)
+        return columns[name]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Row features that only need raw columns come first so rolling windows can use them
+        rolling = {name: entry for name, entry in spec.items() if entry[0] == "rolling"}
+        rows = [name for name, entry in spec.items() if entry[0] == "row"]
+        pre_rolling = [name for name in rows if not any(needs_rolling(dep) for dep in spec[name][1])]
+        for name in pre_rolling:
+            _, inputs, func = spec[name]
+            columns[name] = func({dep: column(dep) for dep in inputs})
+
+        # One stacked pass per (window, aggregation) over every source column that needs it
+        groups = {}
+        for name, (_, inputs, (window, aggregation)) in rolling.items():
+            groups.setdefault((window, aggregation), []).append((name, inputs[0]))
+        diffs = {}
+        for (window, aggregation), group_features in groups.items():
+            sources = []
+            for _, source in group_features:
+                values = column(source).astype(np.float64)
+                if aggregation == "diff_mean":
+                    if source not in diffs:
+                        diffs[source] = grouped_diff(values, position)
+                    values = diffs[source]
+                sources.append(values)
+            stacked = np.column_stack(sources)
+            result = rolling_aggregate(stacked, position, window, "std" if aggregation == "std" else "mean")
+            for i, (name, _) in enumerate(group_features):
+                columns[name] = result[:, i]
+
+        # Row features built on rolling values, in spec order
+        for name in rows:
+            if name in columns:
+                continue
+            _, inputs, func = spec[name]
+            columns[name] = func({dep: column(dep) for dep in inputs})
+
+    # Quantile flags are relative to each QB's own rows
+    for name, (kind, inputs, quantile) in spec.items():
+        if kind == "flag":
+            values = pd.Series(columns[inputs[0]])
+            thresholds = values.groupby(group_codes).quantile(quantile).to_numpy()[group_codes]
+            columns[name] = (values.to_numpy() > thresholds).astype(int)
+
+    return {name: columns[name] for name in spec if name not in INTERNAL_FEATURES}
+
+def reference_features(data: pd.DataFrame) -> pd.DataFrame:
+    """One QB's features the way create_advanced_features built them with pandas rolling, for parity checks"""
+    data = data.sort_values("date").copy()
+    for name, (kind, inputs, parameter) in FEATURE_SPEC.items():
+        source = data[inputs[0]]
+        if kind == "row":
+            data[name] = parameter({dep: data[dep] for dep in inputs})
+        elif kind == "rolling":
+            window, aggregation = parameter
+            if aggregation == "diff_mean":
+                source = source.diff()
+            rolling = source.rolling(window, closed='left')
+            data[name] = rolling.std() if aggregation == "std" else rolling.mean()
+        else:
+            data[name] = (source > source.quantile(parameter)).astype(int)
+    return data.drop(columns=[name for name in INTERNAL_FEATURES if name in data.columns])
+
+def benchmark(data_dir: str = "data", sizes: tuple = (25, 250, 2500)) -> None:
+    """Time the grouped pass against one call per QB for growing numbers of players"""
+    import glob
+    import os
+
+    frames = []
+    for file_path in sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv"))):
+        qb_data = pd.read_csv(file_path)
+        qb_data["date"] = pd.to_datetime(qb_data["Season"].astype(int), format="%Y") + pd.to_timedelta(qb_data["Week"].astype(int) - 1, unit="W")
+        frames.append(qb_data.drop(columns=["QB"], errors="ignore"))
+
+    print(f"{'players':>8} {'rows':>9} {'per QB (s)':>11} {'grouped (s)':>12} {'speedup':>8}")
+    for n_players in sizes:
+        # Synthetic league: the real QBs repeated under new ids
+        league = pd.concat([frames[i % len(frames)].assign(player=i) for i in range(n_players)], ignore_index=True)
+
+        start_time = time.perf_counter()
+        for _, qb_data in league.groupby("player"):
+            compute_features(qb_data)
+        per_qb_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        compute_features(league, group_col="player")
+        grouped_time = time.perf_counter() - start_time
+
+        print(f"{n_players:>8} {len(league):>9} {per_qb_time:>11.2f} {grouped_time:>12.2f} {per_qb_time / grouped_time:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the grouped feature engine")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 250, 2500])
+    args = parser.parse_args()
+    benchmark(sizes=tuple(args.sizes))
@@ -0,0 +1,222 @@
+'''
+Incremental per-QB feature state.
+
+Keeps ring buffers and running sums for every rolling feature in FEATURE_SPEC
+so a new game can be appended in O(window) time and the feature row for the
+next game emitted without recomputing the QB's history.
+'''
+
+import bisect
+import json
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+from feature_engine import FEATURE_SPEC, INTERNAL_FEATURES, needs_rolling
+
+ROW_FEATURES = [name for name, (kind, _, _) in FEATURE_SPEC.items() if kind == "row"]
+# Row features of the game itself that rolling windows are built from
+PRE_ROLLING_FEATURES = [name for name in ROW_FEATURES if not any(needs_rolling(dep) for dep in FEATURE_SPEC[name][1])]
+
+class RunningWindow:
+    """Sum and sum of squares of the finite values among the last `window` of one series"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.total = 0.0
+        self.total_sq = 0.0
+        # Non-finite values are only counted, one inf would otherwise poison the sums until the next re-sum
+        self.nan_count = 0
+        self.inf_count = 0
+        self.neg_inf_count = 0
+        self.appends = 0
+
+    def update(self, added: float, removed: float | None, buffer: deque) -> None:
+        """Add the newest value (already in buffer) and drop the one that left the window"""
+        for value, sign in ((added, 1), (removed, -1)):
+            if value is None:
+                continue
+            if math.isnan(value):
+                self.nan_count += sign
+            elif value == math.inf:
+                self.inf_count += sign
+            elif value == -math.inf:
+                self.neg_inf_count += sign
+            else:
+                self.total += sign * value
+                self.total_sq += sign * value * value
+        # Re-sum once per full turn of the window so rounding never builds up
+        self.appends += 1
+        if self.appends % self.window == 0:
+            recent = list(buffer)[-self.window:]
+            finite = [value for value in recent if math.isfinite(value)]
+            self.total = math.fsum(finite)
+            self.total_sq = math.fsum(value * value for value in finite)
+
+    def aggregate(self, length: int, aggregation: str) -> float:
+        """Closed-left mean or std of the window, NaN until it is full, non-finite values as numpy treats them"""
+        if length < self.window or self.nan_count > 0:
+            return math.nan
+        if self.inf_count or self.neg_inf_count:
+            if aggregation == "std" or (self.inf_count and self.neg_inf_count):
+                return math.nan
+            return math.inf if self.inf_count else -math.inf
+        if aggregation == "std":
+            variance = (self.total_sq - self.total * self.total / self.window) / (self.window - 1)
+            return math.sqrt(max(variance, 0.0))
+        return self.total / self.window
+
+class QBFeatureState:
+    """Streaming version of feature_engine.compute_features for a single QB"""
+
+    def __init__(self):
+        self.n_games = 0
+        self.buffers = {}
+        self.windows = {}
+        self.last_values = {}
+        self.flag_values = {}
+
+        # Each rolling source becomes a series, momentum features roll over the game to game diff
+        for name, (kind, inputs, parameter) in FEATURE_SPEC.items():
+            if kind == "rolling":
+                window, aggregation = parameter
+                series = self.series_name(inputs[0], aggregation)
+                self.windows.setdefault(series, {})[window] = RunningWindow(window)
+                if aggregation == "diff_mean":
+                    self.last_values[inputs[0]] = math.nan
+            elif kind == "flag":
+                self.flag_values[inputs[0]] = []
+        for series, windows in self.windows.items():
+            self.buffers[series] = deque(maxlen=max(windows))
+
+    @staticmethod
+    def series_name(source: str, aggregation: str) -> str:
+        return f"diff:{source}" if aggregation == "diff_mean" else source
+
+    @classmethod
+    def from_history(cls, data: pd.DataFrame) -> "QBFeatureState":
+        """Build the state by appending a QB's past games in date order"""
+        state = cls()
+        for game in data.sort_values("date").to_dict("records"):
+            state.append(game)
+        return state
+
+    def rolling_values(self) -> dict:
+        """Rolling features for the game after the last appended one"""
+        values = {}
+        for name, (kind, inputs, parameter) in FEATURE_SPEC.items():
+            if kind == "rolling":
+                window, aggregation = parameter
+                series = self.series_name(inputs[0], aggregation)
+                values[name] = self.windows[series][window].aggregate(
+                    len(self.buffers[series]), "std" if aggregation == "std" else "mean"
+                )
+        return values
+
+    def row_values(self, game: dict, rolling: dict | None = None) -> dict:
+        """Row features of one game, the rolling ones only when rolling values are given"""
+        known = {key: np.float64(value) for key, value in game.items() if isinstance(value, (int, float, np.number))}
+        known.update({key: np.float64(value) for key, value in (rolling or {}).items()})
+        missing = np.float64(math.nan)
+        values = {}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for name in (ROW_FEATURES if rolling is not None else PRE_ROLLING_FEATURES):
+                _, inputs, func = FEATURE_SPEC[name]
+                known[name] = func({dep: known.get(dep, missing) for dep in inputs})
+                values[name] = known[name].item()
+        return values
+
+    def append(self, game: dict) -> None:
+        """Add a played game, O(window) work per rolling feature"""
+        # The game's own closed-left values feed the quantile flags
+        rolling = self.rolling_values()
+        for source, history in self.flag_values.items():
+            if not math.isnan(rolling[source]):
+                bisect.insort(history, rolling[source])
+
+        sources = {**game, **self.row_values(game)}
+        for series, buffer in self.buffers.items():
+            if series.startswith("diff:"):
+                source = series[len("diff:"):]
+                current = float(sources[source])
+                value = current - self.last_values[source]
+                self.last_values[source] = current
+            else:
+                value = float(sources[series])
+            removed = {window: buffer[-window] if len(buffer) >= window else None for window in self.windows[series]}
+            buffer.append(value)
+            for window, running in self.windows[series].items():
+                running.update(value, removed[window], buffer)
+        self.n_games += 1
+
+    def next_features(self, game: dict) -> dict:
+        """Feature row for an upcoming game, matching a full recompute over history plus that game"""
+        rolling = self.rolling_values()
+        values = {**self.row_values(game, rolling), **rolling}
+        for name, (kind, inputs, quantile) in FEATURE_SPEC.items():
+            if kind == "flag":
+                values[name] = int(values[inputs[0]] > self.quantile_with(self.flag_values[inputs[0]], values[inputs[0]], quantile))
+        return {name: values[name] for name in FEATURE_SPEC if name not in INTERNAL_FEATURES}
+
+    @staticmethod
+    def quantile_with(history: list, value: float, quantile: float) -> float:
+        """Linear quantile of the sorted history plus one extra value, in O(log n)"""
+        if math.isnan(value):
+            extra_at, size = None, len(history)
+        else:
+            extra_at, size = bisect.bisect_right(history, value), len(history) + 1
+        if size == 0:
+            return math.nan
+
+        def at(i):
+            if extra_at is None or i < extra_at:
+                return history[i]
+            return value if i == extra_at else history[i - 1]
+
+        position = quantile * (size - 1)
+        lower = int(math.floor(position))
+        fraction = position - lower
+        if fraction == 0:
+            return at(lower)
+        return at(lower) + (at(lower + 1) - at(lower)) * fraction
+
+    def to_dict(self) -> dict:
+        """Plain data version of the state for saving"""
+        return {
+            'n_games': self.n_games,
+            'buffers': {series: list(buffer) for series, buffer in self.buffers.items()},
+            'windows': {
+                series: {
+                    str(window): [r.total, r.total_sq, r.nan_count, r.inf_count, r.neg_inf_count, r.appends]
+                    for window, r in windows.items()
+                }
+                for series, windows in self.windows.items()
+            },
+            'last_values': dict(self.last_values),
+            'flag_values': {source: list(history) for source, history in self.flag_values.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, saved: dict) -> "QBFeatureState":
+        """Restore a state written by to_dict"""
+        state = cls()
+        state.n_games = saved['n_games']
+        for series, values in saved['buffers'].items():
+            state.buffers[series].extend(values)
+        for series, windows in saved['windows'].items():
+            for window, counts in windows.items():
+                running = state.windows[series][int(window)]
+                (running.total, running.total_sq, running.nan_count, running.inf_count,
+                 running.neg_inf_count, running.appends) = counts
+        state.last_values = dict(saved['last_values'])
+        state.flag_values = {source: list(history) for source, history in saved['flag_values'].items()}
+        return state
+
+    def save(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "QBFeatureState":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,95 @@
+'''
+On-disk columnar store for engineered feature matrices.
+
+Each entry is a directory with one (columns, rows) .npy block per dtype plus a
+manifest, so numeric columns can be memory-mapped straight into a DataFrame
+without a copy.
+'''
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from feature_engine import FEATURE_SPEC_VERSION
+from model_cache import hash_frame
+
+class FeatureStore:
+    """Cache of preprocess_data output keyed by source content and feature spec version"""
+
+    def __init__(self, root: str = "data/feature_store"):
+        self.root = root
+
+    def make_key(self, source_hash: str, variant: str) -> str:
+        """Key for one source, feature spec version and preprocessing variant"""
+        return hashlib.sha256(f"{source_hash}:{FEATURE_SPEC_VERSION}:{variant}".encode()).hexdigest()
+
+    def frame_key(self, data: pd.DataFrame, variant: str) -> str:
+        """Key for an in-memory frame"""
+        return self.make_key(hash_frame(data), variant)
+
+    def get(self, key: str) -> tuple[pd.DataFrame, list] | None:
+        """Load an entry, numeric and datetime columns are memory-mapped read only"""
+        entry_dir = os.path.join(self.root, key)
+        try:
+            with open(os.path.join(entry_dir, "manifest.json")) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        blocks = {
+            dtype: np.load(os.path.join(entry_dir, f"{dtype}.npy"), mmap_mode="r").view(np.ndarray)
+            for dtype in manifest['blocks']
+        }
+        columns = {}
+        for column in manifest['columns']:
+            if column['kind'] == "category":
+                # Text columns are stored as codes, rebuilt as plain object columns
+                categories = np.array(column['categories'] + [np.nan], dtype=object)
+                columns[column['name']] = categories[blocks["codes"][column['row']]]
+            else:
+                columns[column['name']] = blocks[column['dtype']][column['row']]
+        index = np.load(os.path.join(entry_dir, "index.npy"), mmap_mode="r").view(np.ndarray)
+        data = pd.DataFrame(columns, index=pd.Index(index), copy=False)
+        return data, manifest['all_features']
+
+    def put(self, key: str, data: pd.DataFrame, all_features: list) -> None:
+        """Write an entry, the directory only appears once every file is complete"""
+        os.makedirs(self.root, exist_ok=True)
+        entry_dir = os.path.join(self.root, key)
+        if os.path.exists(entry_dir):
+            return
+
+        tmp_dir = tempfile.mkdtemp(dir=self.root, suffix=".tmp")
+        try:
+            manifest = {'all_features': all_features, 'columns': [], 'blocks': []}
+            blocks = {}
+            for name, series in data.items():
+                if series.dtype == object or isinstance(series.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+                    codes, categories = pd.factorize(series)
+                    blocks.setdefault("codes", []).append(codes.astype(np.int32))
+                    manifest['columns'].append({
+                        'name': name, 'kind': "category", 'row': len(blocks["codes"]) - 1,
+                        'categories': [str(c) for c in categories]
+                    })
+                else:
+                    values = series.to_numpy()
+                    blocks.setdefault(str(values.dtype), []).append(values)
+                    manifest['columns'].append({
+                        'name': name, 'kind': "array", 'dtype': str(values.dtype), 'row': len(blocks[str(values.dtype)]) - 1
+                    })
+            # Each column is one contiguous row of its dtype block
+            for dtype, arrays in blocks.items():
+                np.save(os.path.join(tmp_dir, f"{dtype}.npy"), np.stack(arrays))
+                manifest['blocks'].append(dtype)
+            np.save(os.path.join(tmp_dir, "index.npy"), data.index.to_numpy())
+            with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+                json.dump(manifest, f)
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process finished the same entry first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.exists(entry_dir):
+                raise
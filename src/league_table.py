@@ -0,0 +1,278 @@
+'''
+League-wide game log table built from every data/*_complete_data.csv.
+
+Each column is one .npy file in the table directory, stored in the smallest
+dtype that holds it exactly: integer columns without gaps as int8/int16,
+floats as float32 when every value survives the round trip and float64
+otherwise, and text columns, dates included, as category codes with the
+categories in the manifest. Rows are grouped by QB in file order, so one QB
+is a contiguous range and its slice of the memory-mapped columns is a view,
+not a copy. The manifest also keeps each file's columns and the dtypes
+read_csv gives them, so qb_frames() rebuilds exactly the frames of the CSVs.
+'''
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Bump when the on-disk layout changes so old tables are rebuilt
+TABLE_FORMAT_VERSION = 2
+
+def code_dtype(n_categories: int) -> np.dtype:
+    """Smallest signed integer dtype for codes 0..n-1 and -1 for missing"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+def compact_numeric(values: np.ndarray) -> np.ndarray:
+    """values in the smallest integer or float dtype that represents every one of them exactly"""
+    values = np.asarray(values, dtype=np.float64)
+    if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+                return values.astype(dtype)
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+        return as_float32
+    return values
+
+def source_files(data_dir: str = "data") -> dict:
+    """Every *_complete_data.csv keyed by its file prefix, like load_qb_data_files"""
+    return {
+        os.path.basename(file_path).replace("_complete_data.csv", ""): file_path
+        for file_path in sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv")))
+    }
+
+def file_signature(file_path: str) -> list:
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def swap_in(new_dir: str, table_dir: str) -> None:
+    """Replace table_dir with new_dir, the old table is only deleted once the new one is in place"""
+    old_dir = None
+    if os.path.exists(table_dir):
+        old_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(table_dir)), suffix=".old")
+        os.rmdir(old_dir)
+        os.rename(table_dir, old_dir)
+    try:
+        os.rename(new_dir, table_dir)
+    except OSError:
+        if old_dir is not None:
+            # Put the old table back rather than leave no table at all
+            os.rename(old_dir, table_dir)
+        raise
+    if old_dir is not None:
+        # Readers that mapped the old columns keep their pages until they close them
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+def build_league_table(data_dir: str = "data", table_dir: str = "data/league_table") -> "LeagueTable":
+    """Convert every QB file into one compact table, the directory only appears once it is complete"""
+    files = source_files(data_dir)
+    if not files:
+        raise FileNotFoundError(f"No *_complete_data.csv files in {data_dir}")
+    frames = {qb_key: pd.read_csv(file_path) for qb_key, file_path in files.items()}
+
+    columns = list(dict.fromkeys(col for qb_data in frames.values() for col in qb_data.columns))
+    # Any column a file reads as text is stored as categories, Date keeps its mixed formats this way
+    text_columns = {col for qb_data in frames.values() for col in qb_data.columns
+                    if not pd.api.types.is_numeric_dtype(qb_data[col])}
+    combined = pd.concat([qb_data.reindex(columns=columns) for qb_data in frames.values()], ignore_index=True)
+    offsets = np.cumsum([0] + [len(qb_data) for qb_data in frames.values()])
+
+    os.makedirs(os.path.dirname(os.path.abspath(table_dir)), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(table_dir)), suffix=".tmp")
+    manifest = {
+        'version': TABLE_FORMAT_VERSION,
+        'columns': [],
+        'qbs': {qb_key: [int(start), int(stop)] for qb_key, start, stop in zip(frames, offsets[:-1], offsets[1:])},
+        'sources': {qb_key: [os.path.basename(file_path)] + file_signature(file_path) for qb_key, file_path in files.items()},
+        # Each file's columns in order with the dtype read_csv gives them
+        'schemas': {qb_key: {col: str(dtype) for col, dtype in qb_data.dtypes.items()} for qb_key, qb_data in frames.items()}
+    }
+    try:
+        for name in columns:
+            if name in text_columns:
+                codes, categories = pd.factorize(combined[name].astype("str"), sort=True)
+                values = codes.astype(code_dtype(len(categories)))
+                manifest['columns'].append({'name': name, 'kind': "category", 'categories': [str(c) for c in categories]})
+            else:
+                values = compact_numeric(combined[name].to_numpy(dtype=np.float64))
+                manifest['columns'].append({'name': name, 'kind': "array"})
+            manifest['columns'][-1]['dtype'] = str(values.dtype)
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+        with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=1)
+        swap_in(tmp_dir, table_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return LeagueTable(table_dir)
+
+class LeagueTable:
+    """Memory-mapped league table with a zero-copy slice per QB"""
+
+    def __init__(self, table_dir: str = "data/league_table"):
+        self.table_dir = table_dir
+        with open(os.path.join(table_dir, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != TABLE_FORMAT_VERSION:
+            raise ValueError(f"{table_dir} was written in table format {self.manifest.get('version')}, "
+                             f"expected {TABLE_FORMAT_VERSION}, rebuild it")
+        self.columns = {
+            column['name']: np.load(os.path.join(table_dir, f"{column['name']}.npy"), mmap_mode="r").view(np.ndarray)
+            for column in self.manifest['columns']
+        }
+        self.categories = {
+            column['name']: pd.Index(column['categories'], dtype="str")
+            for column in self.manifest['columns'] if column['kind'] == "category"
+        }
+
+    @property
+    def qb_keys(self) -> list:
+        return list(self.manifest['qbs'])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of column data, what the table takes once every page is mapped in"""
+        return sum(values.nbytes for values in self.columns.values())
+
+    def is_current(self, data_dir: str = "data") -> bool:
+        """Whether the table was built from the *_complete_data.csv files as they are now"""
+        files = source_files(data_dir)
+        return files.keys() == self.manifest['sources'].keys() and all(
+            self.manifest['sources'][qb_key][1:] == file_signature(file_path) for qb_key, file_path in files.items()
+        )
+
+    def qb(self, qb_key: str) -> pd.DataFrame:
+        """One QB's games indexed by (QB, Season, Week), numeric columns are read only views of the table"""
+        if qb_key not in self.manifest['qbs']:
+            raise KeyError(f"{qb_key} is not in {self.table_dir}")
+        start, stop = self.manifest['qbs'][qb_key]
+        data = {}
+        for name, values in self.columns.items():
+            if name in self.categories:
+                data[name] = pd.Categorical.from_codes(values[start:stop], categories=self.categories[name], validate=False)
+            else:
+                data[name] = values[start:stop]
+        # Index levels straight from the unique values, without factorizing each column again
+        season_levels, season_codes = np.unique(data["Season"], return_inverse=True)
+        week_levels, week_codes = np.unique(data["Week"], return_inverse=True)
+        index = pd.MultiIndex(
+            levels=[[qb_key], season_levels, week_levels],
+            codes=[np.zeros(stop - start, dtype=np.int8), season_codes, week_codes],
+            names=["QB", "Season", "Week"], verify_integrity=False
+        )
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def source_frame(self, qb_key: str) -> pd.DataFrame:
+        """One QB's games with the columns and dtypes pd.read_csv gives for its *_complete_data.csv"""
+        if qb_key not in self.manifest['qbs']:
+            raise KeyError(f"{qb_key} is not in {self.table_dir}")
+        start, stop = self.manifest['qbs'][qb_key]
+        # Straight from the column slices, the MultiIndex of qb() is not needed here
+        data = {}
+        for name, dtype in self.manifest['schemas'][qb_key].items():
+            values = self.columns[name][start:stop]
+            if name in self.categories:
+                values = self.categories[name].take(values, allow_fill=True, fill_value=np.nan)
+                data[name] = values if dtype == "str" else values.astype(dtype)
+            else:
+                data[name] = values.astype(dtype)
+        return pd.DataFrame(data)
+
+    def qb_frames(self) -> dict:
+        """
+        Every QB as load_qb_data_files returns them. The compact columns are copied into the
+        dtypes read_csv gives, so the predictor builds the same features as from the CSVs and
+        can write to the frames; qb() gives the read only views.
+        """
+        return {qb_key: self.source_frame(qb_key) for qb_key in self.qb_keys}
+
+def load_league_table(data_dir: str = "data", table_dir: str = "data/league_table") -> LeagueTable:
+    """The league table, rebuilt first when a *_complete_data.csv changed since it was written"""
+    try:
+        table = LeagueTable(table_dir)
+        if table.is_current(data_dir):
+            return table
+    except (FileNotFoundError, json.JSONDecodeError, ValueError):
+        pass
+    return build_league_table(data_dir, table_dir)
+
+def measure_load(load, runs: int = 5) -> tuple:
+    """Result, best of runs seconds and peak traced bytes of load(), timed on runs without tracing"""
+    seconds = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        result = load()
+        seconds.append(time.perf_counter() - start_time)
+    tracemalloc.start()
+    load()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, min(seconds), peak_bytes
+
+def frames_bytes(frames: dict) -> int:
+    return sum(int(qb_data.memory_usage(deep=True).sum()) for qb_data in frames.values())
+
+def memory_report(data_dir: str = "data", table_dir: str = "data/league_table") -> dict:
+    """Disk size, memory and load time of reading the per QB CSVs against load_qb_data_files' table path"""
+    files = source_files(data_dir)
+    load_league_table(data_dir, table_dir)
+
+    csv_frames, csv_seconds, csv_peak = measure_load(
+        lambda: {qb_key: pd.read_csv(file_path) for qb_key, file_path in files.items()}
+    )
+    # What load_qb_data_files(data_dir, table_dir) does, freshness check included
+    table_frames, table_seconds, table_peak = measure_load(lambda: load_league_table(data_dir, table_dir).qb_frames())
+    table = LeagueTable(table_dir)
+
+    report = {
+        'qbs': len(files),
+        'games': sum(len(qb_data) for qb_data in csv_frames.values()),
+        'csv_disk_bytes': sum(os.path.getsize(file_path) for file_path in files.values()),
+        'csv_memory_bytes': frames_bytes(csv_frames),
+        'csv_load_seconds': csv_seconds,
+        'csv_peak_bytes': csv_peak,
+        'table_disk_bytes': sum(os.path.getsize(os.path.join(table_dir, name)) for name in os.listdir(table_dir)),
+        'table_memory_bytes': frames_bytes(table_frames),
+        'table_load_seconds': table_seconds,
+        'table_peak_bytes': table_peak,
+        'mapped_bytes': table.nbytes,
+        'matches_csv': csv_frames.keys() == table_frames.keys() and all(
+            table_frames[qb_key].equals(qb_data) and table_frames[qb_key].dtypes.equals(qb_data.dtypes)
+            for qb_key, qb_data in csv_frames.items()
+        )
+    }
+
+    print(f"{report['qbs']} QBs, {report['games']} games, best of 5 loads")
+    print(f"{'':>12} {'disk KiB':>10} {'memory KiB':>11} {'load ms':>9} {'peak KiB':>9}")
+    for label, prefix in (("csv files", "csv"), ("league table", "table")):
+        print(f"{label:>12} {report[f'{prefix}_disk_bytes'] / 1024:>10.1f} {report[f'{prefix}_memory_bytes'] / 1024:>11.1f} "
+              f"{report[f'{prefix}_load_seconds'] * 1000:>9.1f} {report[f'{prefix}_peak_bytes'] / 1024:>9.1f}")
+    print(f"Loading {report['csv_load_seconds'] / report['table_load_seconds']:.1f}x faster, "
+          f"{report['mapped_bytes'] / 1024:.1f} KiB of mapped columns, "
+          f"frames {'match' if report['matches_csv'] else 'DO NOT match'} the CSVs")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the compact league table from data/*_complete_data.csv")
+    parser.add_argument("--data-dir", default="data", help="where the *_complete_data.csv files are")
+    parser.add_argument("--table-dir", default="data/league_table", help="where the table is written")
+    parser.add_argument("--report", action="store_true", help="compare memory and load time with the CSV files")
+    args = parser.parse_args()
+
+    table = build_league_table(args.data_dir, args.table_dir)
+    print(f"Saved {len(table.qb_keys)} QBs and {len(next(iter(table.columns.values())))} games to '{args.table_dir}'")
+    for column in table.manifest['columns']:
+        print(f"  {column['name']:<28} {column['dtype']}")
+    if args.report:
+        print()
+        memory_report(args.data_dir, args.table_dir)
@@ -0,0 +1,170 @@
+'''
+Start/sit and roster optimizer over the QB x week prediction matrix.
+
+Given the QBs on a roster and the number of QB lineup slots, the best lineup
+of each week is the top slots predictions among the rostered QBs not on a bye,
+found for every week at once with one partial sort down the QB axis. Trade and
+waiver candidates are scored the same way in one batch: every roster with the
+candidate added, and every roster with the candidate swapped in for one of the
+current QBs, is stacked into a single array and its season total computed
+together.
+
+Only numpy is needed so the web app can import it without pandas.
+'''
+
+import argparse
+import json
+import time
+import numpy as np
+
+def available_points(points: np.ndarray, bye_mask: np.ndarray) -> np.ndarray:
+    """Predicted points with byes set to -inf so they are never started"""
+    return np.where(bye_mask, -np.inf, points)
+
+def best_lineups(points: np.ndarray, bye_mask: np.ndarray, slots: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Starters and their points for each week of a (qbs, weeks) roster. Returns (weeks, slots)
+    row indices, best first and -1 for a slot nobody can fill, and the (weeks, slots) points.
+    """
+    available = available_points(points, bye_mask)
+    n_qbs = len(available)
+    if n_qbs > slots:
+        # Only the top slots rows of each week need ordering
+        top = np.argpartition(-available, slots - 1, axis=0)[:slots]
+    else:
+        top = np.broadcast_to(np.arange(n_qbs)[:, None], available.shape)
+    values = np.take_along_axis(available, top, axis=0)
+    order = np.argsort(-values, axis=0, kind="stable")
+    top, values = np.take_along_axis(top, order, axis=0), np.take_along_axis(values, order, axis=0)
+
+    starters = np.full((slots, available.shape[1]), -1)
+    started_points = np.zeros((slots, available.shape[1]))
+    filled = np.isfinite(values)
+    starters[:len(top)] = np.where(filled, top, -1)
+    started_points[:len(top)] = np.where(filled, values, 0.0)
+    return starters.T, started_points.T
+
+def season_totals(points: np.ndarray, bye_mask: np.ndarray, slots: int) -> np.ndarray:
+    """Season points of the best weekly lineups of (..., qbs, weeks) rosters, one total per roster"""
+    available = available_points(points, bye_mask)
+    if available.shape[-2] > slots:
+        available = np.partition(available, available.shape[-2] - slots, axis=-2)[..., -slots:, :]
+    return np.where(np.isfinite(available), available, 0.0).sum(axis=(-2, -1))
+
+def evaluate_candidates(points: np.ndarray, bye_mask: np.ndarray, roster: list, candidates: list,
+                        slots: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Season totals of the roster rows with each candidate row added, shape (candidates,), and
+    with each candidate swapped in for each rostered QB, shape (candidates, roster)
+    """
+    roster_points, roster_byes = points[roster], bye_mask[roster]
+    candidate_points, candidate_byes = points[candidates], bye_mask[candidates]
+    n_candidates, n_roster = len(candidates), len(roster)
+
+    added = season_totals(
+        np.concatenate([np.broadcast_to(roster_points, (n_candidates, *roster_points.shape)), candidate_points[:, None]], axis=1),
+        np.concatenate([np.broadcast_to(roster_byes, (n_candidates, *roster_byes.shape)), candidate_byes[:, None]], axis=1),
+        slots
+    )
+
+    # Roster copies indexed (candidate, dropped QB, roster row, week), the dropped row replaced by the candidate
+    swapped_points = np.repeat(np.repeat(roster_points[None, None], n_candidates, axis=0), n_roster, axis=1)
+    swapped_byes = np.repeat(np.repeat(roster_byes[None, None], n_candidates, axis=0), n_roster, axis=1)
+    dropped = np.arange(n_roster)
+    swapped_points[:, dropped, dropped] = candidate_points[:, None]
+    swapped_byes[:, dropped, dropped] = candidate_byes[:, None]
+    return added, season_totals(swapped_points, swapped_byes, slots)
+
+def optimize_roster(qb_names: list, points: np.ndarray, bye_mask: np.ndarray, roster: list, slots: int = 1,
+                    candidates: list | None = None, weeks: list | None = None) -> dict:
+    """
+    Weekly starters and season total of a roster, plus what each candidate adds to it.
+    qb_names label the rows of the (qbs, weeks) points and bye_mask, roster and candidates are names.
+    """
+    if slots < 1:
+        raise ValueError("A lineup needs at least one slot")
+    index = {qb_name: row for row, qb_name in enumerate(qb_names)}
+    roster = list(dict.fromkeys(roster))
+    candidates = [qb_name for qb_name in dict.fromkeys(candidates or []) if qb_name not in roster]
+    unknown = [qb_name for qb_name in roster + candidates if qb_name not in index]
+    if unknown:
+        raise KeyError(f"Unknown QBs: {', '.join(unknown)}")
+    if not roster:
+        raise ValueError("The roster needs at least one QB")
+    weeks = list(weeks or range(1, points.shape[1] + 1))
+
+    roster_rows = [index[qb_name] for qb_name in roster]
+    starters, started_points = best_lineups(points[roster_rows], bye_mask[roster_rows], slots)
+    season_total = float(started_points.sum())
+    on_bye = bye_mask[roster_rows].T.tolist()
+    weekly = {}
+    for week, week_starters, week_points, week_byes in zip(weeks, starters.tolist(), started_points.tolist(), on_bye):
+        weekly[week] = {
+            'starters': [{'qb': roster[row], 'points': value}
+                         for row, value in zip(week_starters, week_points) if row >= 0],
+            'benched': [qb_name for row, qb_name in enumerate(roster) if row not in week_starters and not week_byes[row]],
+            'on_bye': [qb_name for qb_name, bye in zip(roster, week_byes) if bye],
+            'points': float(sum(week_points))
+        }
+    starts = np.bincount(starters[starters >= 0], minlength=len(roster))
+
+    result = {
+        'roster': roster,
+        'slots': slots,
+        'weeks': weekly,
+        'season_total': season_total,
+        'starts': dict(zip(roster, starts.tolist()))
+    }
+    if candidates:
+        added, swapped = evaluate_candidates(points, bye_mask, roster_rows, [index[qb_name] for qb_name in candidates], slots)
+        best_drop = swapped.argmax(axis=1)
+        ranked = sorted(range(len(candidates)), key=lambda i: -swapped[i, best_drop[i]])
+        # Best swap first, as a list so the ranking survives JSON encoders that sort keys
+        result['candidates'] = [
+            {
+                'qb': candidates[i],
+                'add_total': float(added[i]),
+                'add_gain': float(added[i] - season_total),
+                'best_swap': {
+                    'drop': roster[best_drop[i]],
+                    'total': float(swapped[i, best_drop[i]]),
+                    'gain': float(swapped[i, best_drop[i]] - season_total)
+                }
+            }
+            for i in ranked
+        ]
+    return result
+
+if __name__ == "__main__":
+    from season_simulator import load_prediction_files
+
+    parser = argparse.ArgumentParser(description="Pick the best weekly QB starters of a roster from the predictions")
+    parser.add_argument("roster", nargs="+", help="QB keys on the roster, e.g. josh_allen joe_burrow")
+    parser.add_argument("--slots", type=int, default=1, help="QB lineup slots, 2 for superflex")
+    parser.add_argument("--candidates", nargs="*", default=None,
+                        help="trade or waiver QB keys to score, every other QB when given without names")
+    parser.add_argument("--predictions-dir", default="data/predictions")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--output", default=None, help="write the full result JSON here")
+    args = parser.parse_args()
+
+    qbs, points, bye_mask = load_prediction_files(args.predictions_dir, args.season)
+    candidates = args.candidates if args.candidates else (qbs if args.candidates is not None else None)
+    start_time = time.perf_counter()
+    result = optimize_roster(qbs, points, bye_mask, args.roster, args.slots, candidates)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"Optimized {len(result['roster'])} QBs, {args.slots} slot(s), "
+          f"{len(result.get('candidates', []))} candidates in {elapsed * 1000:.1f} ms\n")
+    for week, lineup in result['weeks'].items():
+        starters = ", ".join(f"{starter['qb']} ({starter['points']:.1f})" for starter in lineup['starters'])
+        print(f"Week {week:>2}: {starters or '-'}")
+    print(f"\nSeason total: {result['season_total']:.1f}")
+    if 'candidates' in result:
+        print(f"\n{'candidate':<18} {'add':>7} {'swap':>7}  drop")
+        for scores in result['candidates']:
+            print(f"{scores['qb']:<18} {scores['add_gain']:7.1f} {scores['best_swap']['gain']:7.1f}  {scores['best_swap']['drop']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=1)
+        print(f"\nResult saved to '{args.output}'")
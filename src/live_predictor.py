@@ -0,0 +1,274 @@
+'''
+On-demand predictions for the web app.
+
+Requests build their feature rows on their own thread, then wait in a bounded
+queue. A single batcher thread drains the queue in short micro-batches and
+scores each batch with one call to the pooled model's booster.
+'''
+
+import hashlib
+import os
+import queue
+import threading
+import time
+
+# Stats a what-if request may override, the columns of *_complete_data.csv
+GAME_STATS = [
+    'Completions', 'Attempts', 'Pass_Yds', 'Pass_TD', 'INT',
+    'Rush_Att', 'Rush_Yds', 'Rush_TD', 'Fantasy_Points'
+]
+
+class PredictionError(Exception):
+    """A request the live predictor cannot serve, status is the HTTP code to answer with"""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+class PredictionJob:
+    """One request's feature matrix waiting for its batch"""
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.cancelled = False
+        self.predictions = None
+        self.error = None
+        self.batch_rows = 0
+        self.queued_ms = 0.0
+        self.batch_ms = 0.0
+
+class LivePredictor:
+    """Pooled model kept in memory, scoring concurrent requests in micro-batches"""
+
+    def __init__(self, state_path: str = "data/models/pooled", data_dir: str = "data", season_year: int = 2025,
+                 name_mapping: dict | None = None, max_batch_rows: int = 512, max_wait: float = 0.005,
+                 max_queue: int = 64, timeout: float = 2.0, feature_store_dir: str | None = None):
+        """
+        name_mapping: display names for QBs whose file name does not title-case to them
+        max_batch_rows: rows scored by one booster call at most
+        max_wait: seconds the batcher waits for more requests after the first one arrives
+        max_queue: requests allowed to wait at once, more are turned away
+        timeout: seconds a request waits for its batch
+        feature_store_dir: feature store the unedited season matrices are kept in, so a restart memory-maps them
+        """
+        self.state_path = state_path
+        self.name_mapping = name_mapping or {}
+        self.data_dir = data_dir
+        self.season_year = season_year
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.jobs = queue.Queue(maxsize=max_queue)
+        self.predictor = None
+        self.season_frames = {}
+        self.qb_keys = {}
+        self.defenses = {}
+        self.feature_store_dir = feature_store_dir
+        self.season_matrices = {}
+        self.load_lock = threading.Lock()
+        self.batcher = None
+
+    def load(self) -> None:
+        """Load the pooled model and season data on first use, the app starts without xgboost or pandas"""
+        with self.load_lock:
+            if self.predictor is not None:
+                return
+            if not (os.path.exists(f"{self.state_path}.json") and os.path.exists(f"{self.state_path}.ubj")):
+                raise PredictionError(f"No pooled model at '{self.state_path}', run qb_predictor.py --pooled first", 503)
+            from qb_predictor import PooledQBFantasyPredictor, load_qb_data_files
+
+            predictor = PooledQBFantasyPredictor(lean=True)
+            predictor.load_state(self.state_path)
+            qb_frames = load_qb_data_files(self.data_dir)
+            self.season_frames = {
+                key: qb_data[qb_data["Season"] == self.season_year]
+                for key, qb_data in qb_frames.items() if key in predictor.qb_ids
+            }
+            # Display names as the rest of the app shows them, file keys work too
+            for key in self.season_frames:
+                title = key.replace("_", " ").title()
+                self.qb_keys[self.name_mapping.get(title, title)] = key
+                self.qb_keys[key] = key
+            # Every opponent's defense stats for the season, so a game can be moved to another opponent
+            for qb_data in self.season_frames.values():
+                def_cols = [col for col in qb_data.columns if col.startswith("Def_")]
+                for row in qb_data[["Opponent"] + def_cols].dropna(subset=["Opponent"]).to_dict("records"):
+                    self.defenses.setdefault(row.pop("Opponent"), row)
+
+            self.predictor = predictor
+            self.season_matrices = self.load_season_matrices()
+            self.batcher = threading.Thread(target=self.run_batches, name="prediction-batcher", daemon=True)
+            self.batcher.start()
+
+    def load_season_matrices(self) -> dict:
+        """Every QB's feature matrix without what-if changes, from the feature store when it has them"""
+        import numpy as np
+        import pandas as pd
+        from feature_store import FeatureStore
+        from model_cache import hash_frame
+
+        def build():
+            frames = []
+            for key in sorted(self.season_frames):
+                _, games = self.build_games({'qb': key})
+                matrix = self.predictor.build_prediction_matrix(games, self.predictor.qb_baselines[key])
+                frames.append(pd.DataFrame(matrix, columns=self.predictor.top_features).assign(qb=key))
+            return pd.concat(frames, ignore_index=True)
+
+        if self.feature_store_dir is None:
+            matrices = build()
+        else:
+            feature_store = FeatureStore(self.feature_store_dir)
+            # The matrices depend on the season rows and on the model state's features and baselines
+            digest = hashlib.sha256()
+            with open(f"{self.state_path}.json", "rb") as f:
+                digest.update(f.read())
+            for key in sorted(self.season_frames):
+                digest.update(f"{key}:{hash_frame(self.season_frames[key])}".encode())
+            store_key = feature_store.make_key(digest.hexdigest(), f"live:{self.season_year}")
+            cached = feature_store.get(store_key)
+            if cached is not None:
+                matrices = cached[0]
+            else:
+                matrices = build()
+                feature_store.put(store_key, matrices, self.predictor.top_features)
+        qb_column = matrices["qb"].to_numpy()
+        return {
+            key: matrices.loc[qb_column == key, self.predictor.top_features].to_numpy(dtype=np.float32)
+            for key in self.season_frames
+        }
+
+    def build_games(self, payload: dict):
+        """The QB's season rows with the request's opponent and stat changes applied"""
+        import pandas as pd
+
+        if not isinstance(payload.get('qb'), str):
+            raise PredictionError("qb must be a QB name", 400)
+        qb_key = self.qb_keys.get(payload['qb'])
+        if qb_key is None:
+            raise PredictionError(f"Unknown QB: {payload.get('qb')}", 404)
+        games = {int(row["Week"]): row for row in self.season_frames[qb_key].to_dict("records")}
+
+        for change in payload.get('games', []):
+            if not isinstance(change, dict):
+                raise PredictionError("Every game must be a JSON object", 400)
+            try:
+                week = int(change['week'])
+            except (KeyError, TypeError, ValueError):
+                raise PredictionError("Every game needs an integer week", 400)
+            if not 1 <= week <= 18:
+                raise PredictionError(f"Week {week} is outside 1-18", 400)
+            if week not in games and 'opponent' not in change:
+                raise PredictionError(f"Week {week} is not on the schedule, give its opponent", 400)
+            game = games.setdefault(week, {"Season": self.season_year, "Week": week})
+            if 'opponent' in change:
+                if not isinstance(change['opponent'], str) or change['opponent'] not in self.defenses:
+                    raise PredictionError(f"Unknown opponent: {change['opponent']}", 400)
+                game.update(self.defenses[change['opponent']], Opponent=change['opponent'])
+            for stat in GAME_STATS:
+                if stat in change:
+                    try:
+                        game[stat] = float(change[stat])
+                    except (TypeError, ValueError):
+                        raise PredictionError(f"{stat} must be a number", 400)
+        if not games:
+            raise PredictionError(f"No {self.season_year} games for {payload['qb']}", 400)
+
+        rows = pd.DataFrame(list(games.values()))
+        return qb_key, self.predictor.add_qb_features(rows, qb_key)
+
+    def predict(self, payload: dict) -> dict:
+        """Score one request, waiting for the batch it joins"""
+        start_time = time.perf_counter()
+        self.load()
+        qb_key, games = self.build_games(payload)
+        if payload.get('games'):
+            matrix = self.predictor.build_prediction_matrix(games, self.predictor.qb_baselines[qb_key])
+        else:
+            matrix = self.season_matrices[qb_key]
+        order = self.predictor.prediction_order(games)
+
+        job = PredictionJob(matrix)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            raise PredictionError("Too many prediction requests, try again shortly", 503)
+        if not job.done.wait(self.timeout):
+            job.cancelled = True
+            raise PredictionError("Prediction timed out", 504)
+        if job.error is not None:
+            raise PredictionError(f"Prediction failed: {job.error}", 500)
+
+        weeks = games["Week"].to_numpy()[order]
+        opponents = games["Opponent"].to_numpy()[order]
+        # A multi-output model has one column per scoring profile, the first is the headline number,
+        # or one column per quantile where the median is
+        points = self.predictor.sort_quantiles(job.predictions).reshape(len(job.predictions), -1)
+        profiles = self.predictor.scoring_profiles
+        quantiles = self.predictor.quantiles
+        headline = quantiles.index(0.5) if quantiles else 0
+        predictions = []
+        for week, opponent, row in zip(weeks, opponents, points):
+            prediction = {'week': int(week), 'opponent': opponent, 'predicted_points': float(row[headline])}
+            if profiles:
+                prediction['points_by_profile'] = {profile: float(value) for profile, value in zip(profiles, row)}
+            if quantiles:
+                prediction['quantiles'] = {f"p{q * 100:g}": float(value) for q, value in zip(quantiles, row)}
+            predictions.append(prediction)
+        return {
+            'qb': payload['qb'],
+            'season': self.season_year,
+            'predictions': predictions,
+            'latency_ms': {
+                'total': (time.perf_counter() - start_time) * 1000,
+                'queued': job.queued_ms,
+                'batch': job.batch_ms
+            },
+            'batch_rows': job.batch_rows
+        }
+
+    def run_batches(self) -> None:
+        """Batcher thread: collect jobs for up to max_wait, score them with one booster call"""
+        import numpy as np
+
+        booster = self.predictor.model.get_booster()
+        while True:
+            batch = [self.jobs.get()]
+            rows = len(batch[0].matrix)
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    job = self.jobs.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(job)
+                rows += len(job.matrix)
+
+            batch = [job for job in batch if not job.cancelled]
+            if not batch:
+                continue
+            batch_start = time.perf_counter()
+            try:
+                matrix = batch[0].matrix if len(batch) == 1 else np.vstack([job.matrix for job in batch])
+                predictions = booster.inplace_predict(matrix, missing=np.nan, validate_features=False)
+                batch_ms = (time.perf_counter() - batch_start) * 1000
+
+                offset = 0
+                for job in batch:
+                    job.predictions = predictions[offset:offset + len(job.matrix)]
+                    offset += len(job.matrix)
+                    job.queued_ms = (batch_start - job.enqueued_at) * 1000
+                    job.batch_ms = batch_ms
+                    job.batch_rows = len(matrix)
+            except Exception as e:
+                # Fail this batch's requests and keep the batcher alive for the next ones
+                for job in batch:
+                    job.error = e
+            finally:
+                for job in batch:
+                    job.done.set()
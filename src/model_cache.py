@@ -0,0 +1,78 @@
+'''Content-addressed cache of trained QBFantasyPredictor models'''
+
+import hashlib
+import json
+import os
+import pandas as pd
+import xgboost as xgb
+
+# Bump when the saved state layout or feature selection changes so old entries stop matching
+CACHE_FORMAT_VERSION = 4
+
+def hash_frame(df: pd.DataFrame) -> str:
+    """Hash the column names and values of a DataFrame"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in df.columns]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+class ModelCache:
+    """Local store of trained model state keyed by training rows, features and configuration"""
+
+    def __init__(self, cache_dir: str = "data/model_cache", max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def make_key(self, train_data: pd.DataFrame, features: list, config: dict) -> str:
+        """Build the cache key for one training run"""
+        digest = hashlib.sha256()
+        digest.update(hash_frame(train_data).encode())
+        digest.update(json.dumps(features).encode())
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+        digest.update(f"{CACHE_FORMAT_VERSION}:{xgb.__version__}".encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        """Path prefix of a cache entry, the model and state files share it"""
+        return os.path.join(self.cache_dir, key)
+
+    def contains(self, key: str) -> bool:
+        """Check whether both files of an entry exist"""
+        path = self.entry_path(key)
+        return os.path.exists(f"{path}.json") and os.path.exists(f"{path}.ubj")
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as recently used so eviction keeps it"""
+        path = self.entry_path(key)
+        for suffix in (".json", ".ubj"):
+            try:
+                os.utime(f"{path}{suffix}")
+            except FileNotFoundError:
+                pass
+
+    def evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = {}
+        for filename in os.listdir(self.cache_dir):
+            key, suffix = os.path.splitext(filename)
+            if suffix not in (".json", ".ubj"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+            except FileNotFoundError:
+                continue
+            size, last_used = entries.get(key, (0, 0.0))
+            entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime))
+
+        total_bytes = sum(size for size, _ in entries.values())
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total_bytes <= self.max_bytes:
+                break
+            for suffix in (".json", ".ubj"):
+                try:
+                    os.remove(f"{self.entry_path(key)}{suffix}")
+                except FileNotFoundError:
+                    pass
+            total_bytes -= size
@@ -1,22 +1,141 @@
 # QB Fantasy Points Predictor
 
+import argparse
+import contextlib
+import glob
+import io
+import json
+import math
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import GridSearchCV
+from sklearn.metrics import make_scorer, mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import GridSearchCV, ParameterGrid, TimeSeriesSplit
 import xgboost as xgb
+from feature_engine import compute_feature_arrays, compute_features, sort_order
+from feature_state import QBFeatureState
+from feature_store import FeatureStore
+from league_table import load_league_table
+from model_cache import ModelCache
+from scoring import SCORING_PROFILES, check_profiles, score_games
 import warnings
 warnings.filterwarnings('ignore')
 
+def pinball_loss(targets: np.ndarray, predictions: np.ndarray, quantiles: list) -> np.ndarray:
+    """Quantile loss of each row, averaged over the (rows, quantiles) predictions"""
+    targets = np.asarray(targets, dtype=np.float64).reshape(-1, 1)
+    errors = targets - np.asarray(predictions, dtype=np.float64).reshape(len(targets), -1)
+    alphas = np.asarray(quantiles, dtype=np.float64)
+    return np.maximum(alphas * errors, (alphas - 1) * errors).mean(axis=1)
+
+def quantile_column(q: float) -> str:
+    """Prediction column of a quantile, e.g. 0.1 -> Predicted_P10_Points"""
+    return f"Predicted_P{q * 100:g}_Points"
+
 class QBFantasyPredictor:
     """Predict fantasy points for quarterbacks using their data"""
-    def __init__(self):
+    XGB_PARAM_GRID = {
+        'n_estimators': [300, 500],
+        'max_depth': [4, 6],
+        'learning_rate': [0.05, 0.1],
+        'subsample': [0.8, 0.9],
+        'colsample_bytree': [0.8, 0.9],
+        'reg_alpha': [0, 0.1],
+        'reg_lambda': [0, 0.1]
+    }
+
+    def __init__(self, search: str = "grid", time_budget: float | None = None, max_fits: int | None = None,
+                 n_jobs: int = -1, model_cache: ModelCache | None = None,
+                 feature_store: FeatureStore | None = None, lean: bool = False,
+                 scoring_profiles: list | None = None, quantiles: list | None = None):
+        """
+        search: "grid" for the full GridSearchCV or "halving" for budgeted successive halving
+        time_budget: seconds the halving search may spend before it stops early
+        max_fits: number of model fits the halving search may use
+        n_jobs: cores this predictor may use (-1 for all of them)
+        model_cache: cache to reuse trained models from when the training rows have not changed
+        feature_store: store to reuse preprocessed feature matrices from when the input rows have not changed
+        lean: predict from one float32 matrix passed straight to the booster instead of a DataFrame
+        scoring_profiles: scoring.py profiles to predict together with one multi-output model,
+            each gets a Predicted_<profile>_Points column and the first one fills Predicted_Fantasy_Points
+        quantiles: predict these quantiles of the points (e.g. 0.1, 0.9) with one quantile regression booster,
+            each gets a Predicted_P<percent>_Points column and the median, always added, fills Predicted_Fantasy_Points
+        """
+        if search not in ("grid", "halving"):
+            raise ValueError(f"Unknown search mode: {search}")
+        if quantiles and scoring_profiles:
+            raise ValueError("Quantiles are predicted for the standard points only, not with scoring profiles")
+        if quantiles and not all(0 < q < 1 for q in quantiles):
+            raise ValueError(f"Quantiles must be between 0 and 1: {quantiles}")
         self.model = None
         self.top_features = []
         self.feature_importance = None
         self.is_trained = False
         self.qb_avgs = None
+        self.search = search
+        self.time_budget = time_budget
+        self.max_fits = max_fits
+        self.search_report = None
+        self.n_jobs = n_jobs
+        self.model_cache = model_cache
+        self.feature_store = feature_store
+        self.lean = lean
+        self.stage_times = {}
+        self.training_profile = None
+        # Rolling state and model rows of the games trained on, so weekly updates skip the history
+        self.feature_state = None
+        self.training_rows = None
+        self.scoring_profiles = check_profiles(scoring_profiles) if scoring_profiles else None
+        self.quantiles = sorted({float(q) for q in quantiles} | {0.5}) if quantiles else None
         
+    @contextlib.contextmanager
+    def timed(self, stage: str):
+        """Add the wall time of a block to stage_times[stage]"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_times[stage] = self.stage_times.get(stage, 0.0) + time.perf_counter() - start_time
+
+    def target_columns(self) -> list:
+        """Columns the model is trained to predict, one per scoring profile"""
+        if not self.scoring_profiles:
+            return ["target"]
+        return [f"target_{profile}" for profile in self.scoring_profiles]
+
+    def training_targets(self, data: pd.DataFrame) -> pd.Series | pd.DataFrame:
+        """y for fitting, a single series or one column per scoring profile"""
+        if not self.scoring_profiles:
+            return data["target"]
+        return data[self.target_columns()]
+
+    def model_params(self) -> dict:
+        """Objective settings every booster of this predictor is built with"""
+        if not self.quantiles:
+            return {}
+        return {'objective': "reg:quantileerror", 'quantile_alpha': self.quantiles}
+
+    @property
+    def score_name(self) -> str:
+        """What the search scores candidates with, MAE or the pinball loss of the quantiles"""
+        return "pinball loss" if self.quantiles else "MAE"
+
+    def game_errors(self, predictions: np.ndarray, targets: np.ndarray) -> np.ndarray:
+        """Per game error in the search's score, averaged over the model's outputs"""
+        if self.quantiles:
+            return pinball_loss(targets, predictions, self.quantiles)
+        return np.abs(predictions.reshape(len(predictions), -1) - targets.reshape(len(targets), -1)).mean(axis=1)
+
+    def sort_quantiles(self, predictions: np.ndarray) -> np.ndarray:
+        """Quantile outputs sorted within each row so they never cross, other outputs unchanged"""
+        if not self.quantiles or len(predictions) == 0:
+            return predictions
+        return np.sort(predictions.reshape(len(predictions), -1), axis=1)
+
     def calculate_qb_averages(self, historical_data: pd.DataFrame) -> dict:
         """Calculate QB-specific averages from historical data"""    
         return {
@@ -31,92 +150,30 @@ class QBFantasyPredictor:
             'Fantasy_Points': historical_data['Fantasy_Points'].mean()
         }
     
-    def create_advanced_features(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Create predictive features"""
-        data = data.sort_values("date").copy()
-
-        # basic game context
-        data["season"] = data["Season"]
-        data["week"] = data["Week"]
-        data["is_playoff"] = (data["Week"] >= 17).astype(int)
-        data["is_early_season"] = (data["Week"] <= 4).astype(int)
-        data["is_late_season"] = (data["Week"] >= 14).astype(int)
-        
-        # Rolling averages for key stats
-        for window in [3, 5, 10]:
-            data[f"fantasy_rolling_{window}"] = data["Fantasy_Points"].rolling(window, closed='left').mean()
-            data[f"pass_yds_rolling_{window}"] = data["Pass_Yds"].rolling(window, closed='left').mean()
-            data[f"pass_td_rolling_{window}"] = data["Pass_TD"].rolling(window, closed='left').mean()
-            data[f"int_rolling_{window}"] = data["INT"].rolling(window, closed='left').mean()
-            data[f"rush_yds_rolling_{window}"] = data["Rush_Yds"].rolling(window, closed='left').mean()
-            data[f"rush_td_rolling_{window}"] = data["Rush_TD"].rolling(window, closed='left').mean()
-            data[f"completion_rate_rolling_{window}"] = (data["Completions"] / data["Attempts"]).rolling(window, closed='left').mean()
-        
-        #Recent trends (last 2 games)
-        data["fantasy_trend"] = data["Fantasy_Points"].rolling(2, closed='left').mean()
-        data["pass_yds_trend"] = data["Pass_Yds"].rolling(2, closed='left').mean()
-        data["pass_td_trend"] = data["Pass_TD"].rolling(2, closed='left').mean()
-        
-        # Volatility 
-        data["fantasy_volatility"] = data["Fantasy_Points"].rolling(5, closed='left').std()
-        data["pass_yds_volatility"] = data["Pass_Yds"].rolling(5, closed='left').std()
-        
-        # Efficiency 
-        data["yards_per_attempt"] = data["Pass_Yds"] / data["Attempts"]
-        data["td_per_attempt"] = data["Pass_TD"] / data["Attempts"]
-        data["int_per_attempt"] = data["INT"] / data["Attempts"]
-        
-        # Rolling efficiency
-        data["ypa_rolling_3"] = data["yards_per_attempt"].rolling(3, closed='left').mean()
-        data["tpa_rolling_3"] = data["td_per_attempt"].rolling(3, closed='left').mean()
-        data["ipa_rolling_3"] = data["int_per_attempt"].rolling(3, closed='left').mean()
-        
-        # Defense 
-        data["defense_strength"] = data["Def_FantasyPts_Allowed_pg"] * data["Def_Sacks_pg"]
-        data["pass_defense_rating"] = data["Def_PassYds_Allowed_pg"] * data["Def_PassTD_Allowed_pg"] / (data["Def_INT_Forced_pg"] + 0.1)
-        
-        # Game context 
-        data["total_attempts"] = data["Attempts"] + data["Rush_Att"]
-        data["total_yards"] = data["Pass_Yds"] + data["Rush_Yds"]
-        data["total_touchdowns"] = data["Pass_TD"] + data["Rush_TD"]
-        
-        # Rolling totals
-        data["total_attempts_rolling_3"] = data["total_attempts"].rolling(3, closed='left').mean()
-        data["total_yards_rolling_3"] = data["total_yards"].rolling(3, closed='left').mean()
-        data["total_touchdowns_rolling_3"] = data["total_touchdowns"].rolling(3, closed='left').mean()
-        
-        # Advanced efficiency 
-        data["efficiency_score"] = data["ypa_rolling_3"] * data["tpa_rolling_3"] / (data["ipa_rolling_3"] + 0.01)
-        data["volume_score"] = data["total_attempts_rolling_3"] * data["total_yards_rolling_3"] / 1000
-        data["touchdown_efficiency"] = data["total_touchdowns_rolling_3"] / (data["total_attempts_rolling_3"] + 1)
-        data["yards_per_touchdown"] = data["total_yards_rolling_3"] / (data["total_touchdowns_rolling_3"] + 1)
-        
-        # Opponent difficulty 
-        data["opponent_sack_rate"] = data["Def_Sacks_pg"]
-        data["opponent_difficulty"] = (data["Def_FantasyPts_Allowed_pg"] * data["Def_Sacks_pg"]) / (data["Def_INT_Forced_pg"] + 0.1)
-        
-        # Momentum indicators
-        data["fantasy_momentum"] = data["Fantasy_Points"].diff().rolling(3, closed='left').mean()
-        data["pass_yds_momentum"] = data["Pass_Yds"].diff().rolling(3, closed='left').mean()
-        data["touchdown_momentum"] = data["total_touchdowns"].diff().rolling(3, closed='left').mean()
-        
-        # Consistency features
-        data["fantasy_consistency"] = 1 / (data["fantasy_volatility"] + 0.1)
-        data["pass_yds_consistency"] = 1 / (data["pass_yds_volatility"] + 0.1)
-        
-        # Advanced efficiency 
-        data["completion_efficiency"] = data["completion_rate_rolling_3"] * data["ypa_rolling_3"]
-        data["touchdown_rate"] = data["total_touchdowns_rolling_3"] / data["total_attempts_rolling_3"]
-        data["interception_rate"] = data["int_rolling_3"] / data["total_attempts_rolling_3"]
-        
-        # Game flow 
-        data["high_volume_games"] = (data["total_attempts_rolling_3"] > data["total_attempts_rolling_3"].quantile(0.75)).astype(int)
-        data["high_scoring_games"] = (data["total_touchdowns_rolling_3"] > data["total_touchdowns_rolling_3"].quantile(0.75)).astype(int)
+    def create_advanced_features(self, data: pd.DataFrame, features: list | None = None) -> pd.DataFrame:
+        """Create predictive features, only the given ones and their dependencies when features is set"""
+        return compute_features(data, features=features)
     
-        return data
+    def preprocess_data(self, data: pd.DataFrame, is_training: bool = True,
+                        features: list | None = None) -> tuple[pd.DataFrame, list]:
+        """Preprocess QB data for training/prediction, limited to the given features when set"""
+        if self.feature_store is None:
+            return self.build_features(data, is_training, features)
+        
+        # Reuse the stored matrix when the same rows were preprocessed before
+        variant = f"training={is_training}" if features is None else f"training={is_training}:features={','.join(features)}"
+        if self.scoring_profiles:
+            variant += f":scoring={','.join(self.scoring_profiles)}"
+        key = self.feature_store.frame_key(data, variant)
+        cached = self.feature_store.get(key)
+        if cached is not None:
+            return cached
+        processed_data, all_features = self.build_features(data, is_training, features)
+        self.feature_store.put(key, processed_data, all_features)
+        return processed_data, all_features
     
-    def preprocess_data(self, data: pd.DataFrame, is_training: bool = True) -> tuple[pd.DataFrame, list]:
-        """Preprocess QB data for training/prediction"""
+    def add_game_columns(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Copy of raw QB data with the date, per game model inputs and targets, no history features"""
         data = data.copy()
         
         # Handle date column 
@@ -134,8 +191,23 @@ class QBFantasyPredictor:
         else:
             data["target"] = 0  
 
-        # Create all advanced features
-        data = self.create_advanced_features(data)
+        # Every profile's points from the same box score, standard keeps the stored points
+        if self.scoring_profiles:
+            points = score_games(data, self.scoring_profiles) if "Fantasy_Points" in data.columns else None
+            for profile, column in zip(self.scoring_profiles, self.target_columns()):
+                if points is None:
+                    data[column] = 0
+                else:
+                    data[column] = data["target"] if profile == "standard" else points[profile]
+        return data
+
+    def build_features(self, data: pd.DataFrame, is_training: bool = True,
+                       features: list | None = None) -> tuple[pd.DataFrame, list]:
+        """Compute the preprocessed feature matrix from raw QB data"""
+        data = self.add_game_columns(data)
+
+        # Create the advanced features, all of them unless a subset was asked for
+        data = self.create_advanced_features(data, features)
         
         all_features = [
             "opp_code", "hour", "day_code", "season", "week",
@@ -170,22 +242,23 @@ class QBFantasyPredictor:
             "total_attempts_rolling_3", "total_yards_rolling_3", "total_touchdowns_rolling_3"
         ]
         # Single NaN fill operation
-        for feature in all_features:
+        for feature in (all_features if features is None else features):
             if feature in data.columns and data[feature].isna().any():
                 data[feature] = data[feature].fillna(data[feature].median())
         
         # handle training vs prediction data
         if is_training:
-            data = data.dropna(subset=["target"])
+            data = data.dropna(subset=["target"] + (self.target_columns() if self.scoring_profiles else []))
         else:
-            data["target"] = data["target"].fillna(0)
+            for column in ["target"] + (self.target_columns() if self.scoring_profiles else []):
+                data[column] = data[column].fillna(0)
         
         return data, all_features
     
     def select_features(self, train_data: pd.DataFrame, all_features: list) -> list:
         """Select top features based on importance"""
-        xgb_importance = xgb.XGBRegressor(n_estimators=100, random_state=42)
-        xgb_importance.fit(train_data[all_features], train_data["target"])
+        xgb_importance = xgb.XGBRegressor(n_estimators=100, random_state=42, n_jobs=self.n_jobs)
+        xgb_importance.fit(train_data[all_features], self.training_targets(train_data))
         
         self.feature_importance = pd.DataFrame({
             'feature': all_features,
@@ -198,47 +271,120 @@ class QBFantasyPredictor:
     
     def train_model(self, train_data: pd.DataFrame) -> None:
         """Train XGBoost model with hyperparameter tuning"""        
-        xgb_params = {
-            'n_estimators': [300, 500],
-            'max_depth': [4, 6],
-            'learning_rate': [0.05, 0.1],
-            'subsample': [0.8, 0.9],
-            'colsample_bytree': [0.8, 0.9],
-            'reg_alpha': [0, 0.1],
-            'reg_lambda': [0, 0.1]
+        start_time = time.perf_counter()
+        if self.search == "halving":
+            self.model, best_mae, n_fits = self.successive_halving_search(train_data)
+        else:
+            # Parallelise across candidates with single threaded boosters so cores are not oversubscribed
+            scoring = 'neg_mean_absolute_error'
+            if self.quantiles:
+                scoring = make_scorer(lambda y, predictions: pinball_loss(y, predictions, self.quantiles).mean(),
+                                      greater_is_better=False)
+            xgb_grid = GridSearchCV(
+                xgb.XGBRegressor(random_state=42, n_jobs=1, **self.model_params()), 
+                self.XGB_PARAM_GRID, 
+                cv=3, 
+                scoring=scoring, 
+                n_jobs=self.n_jobs,
+                verbose=0
+            )
+            xgb_grid.fit(train_data[self.top_features], self.training_targets(train_data))
+            
+            self.model = xgb_grid.best_estimator_
+            best_mae = -xgb_grid.best_score_
+            n_fits = len(ParameterGrid(self.XGB_PARAM_GRID)) * 3 + 1
+        
+        self.search_report = {
+            'search': self.search,
+            'fits': n_fits,
+            'wall_time': time.perf_counter() - start_time,
+            'best_mae': best_mae,
+            'metric': "pinball" if self.quantiles else "mae",
+            'best_params': self.model.get_params()
         }
-        xgb_grid = GridSearchCV(
-            xgb.XGBRegressor(random_state=42), 
-            xgb_params, 
-            cv=3, 
-            scoring='neg_mean_absolute_error', 
-            n_jobs=-1,
-            verbose=0
-        )
-        xgb_grid.fit(train_data[self.top_features], train_data["target"])
-        
-        self.model = xgb_grid.best_estimator_
-        best_mae = -xgb_grid.best_score_
+        print(f"{self.search} search: {n_fits} fits in {self.search_report['wall_time']:.1f}s, CV {self.score_name} {best_mae:.2f}")
         self.is_trained = True
     
-    def predict(self, data: pd.DataFrame) -> np.ndarray:
-        """Make predictions for given data"""
-        if not self.is_trained:
-            raise ValueError("Model must be trained before making predictions")
+    def successive_halving_search(self, train_data: pd.DataFrame, min_rounds: int = 25, eta: int = 3,
+                                  early_stopping_rounds: int = 20) -> tuple[xgb.XGBRegressor, float, int]:
+        """Budgeted successive halving over XGB_PARAM_GRID with time ordered folds"""
+        start_time = time.perf_counter()
+        max_rounds = max(self.XGB_PARAM_GRID['n_estimators'])
+        param_space = {k: v for k, v in self.XGB_PARAM_GRID.items() if k != 'n_estimators'}
+        candidates = list(ParameterGrid(param_space))
+        
+        # Validation folds always come after their training rows
+        if "date" in train_data.columns:
+            train_data = train_data.sort_values("date", kind="stable")
+        X = train_data[self.top_features]
+        y = self.training_targets(train_data)
+        folds = list(TimeSeriesSplit(n_splits=3).split(X))
+        
+        n_fits = 0
+        scores = {}
+        best_rounds = {}
+        rounds = min_rounds
+        while True:
+            rung_scores = []
+            for params in candidates:
+                if self.budget_exhausted(start_time, n_fits, len(folds)):
+                    break
+                fold_maes = []
+                fold_rounds = []
+                for train_idx, val_idx in folds:
+                    model = xgb.XGBRegressor(
+                        **params, **self.model_params(), n_estimators=rounds, random_state=42, n_jobs=self.n_jobs,
+                        early_stopping_rounds=early_stopping_rounds, eval_metric="quantile" if self.quantiles else "mae"
+                    )
+                    model.fit(X.iloc[train_idx], y.iloc[train_idx],
+                              eval_set=[(X.iloc[val_idx], y.iloc[val_idx])], verbose=False)
+                    fold_maes.append(model.best_score)
+                    fold_rounds.append(model.best_iteration + 1)
+                    n_fits += 1
+                key = tuple(sorted(params.items()))
+                scores[key] = float(np.mean(fold_maes))
+                best_rounds[key] = int(np.mean(fold_rounds))
+                rung_scores.append((scores[key], key))
+            
+            if not rung_scores:
+                break
+            # Keep the best 1/eta of the configurations that finished this rung
+            rung_scores.sort()
+            budget_hit = len(rung_scores) < len(candidates)
+            candidates = [dict(key) for _, key in rung_scores[:max(1, math.ceil(len(rung_scores) / eta))]]
+            if budget_hit or len(candidates) == 1 or rounds >= max_rounds:
+                break
+            rounds = min(rounds * eta, max_rounds)
         
+        if not scores:
+            raise ValueError("Search budget too small to evaluate a single configuration")
+        
+        # Refit the best configuration on all rows with its early stopped tree count
+        best_key = min((tuple(sorted(params.items())) for params in candidates), key=scores.get)
+        best_model = xgb.XGBRegressor(**dict(best_key), **self.model_params(), n_estimators=best_rounds[best_key],
+                                      random_state=42, n_jobs=self.n_jobs)
+        best_model.fit(X, y)
+        return best_model, scores[best_key], n_fits + 1
+    
+    def budget_exhausted(self, start_time: float, n_fits: int, fits_needed: int) -> bool:
+        """Check whether the halving search has used its time or fit budget"""
+        if self.max_fits is not None and n_fits + fits_needed > self.max_fits:
+            return True
+        if self.time_budget is not None and time.perf_counter() - start_time > self.time_budget:
+            return True
+        return False
+    
+    def build_prediction_features(self, data: pd.DataFrame, qb_avgs: dict) -> pd.DataFrame:
+        """Build the model input rows for prediction data"""
         data_copy = data.copy()
         
         # Fill missing stats with QB-specific averages
-        for col, default_val in self.qb_avgs.items():
+        for col, default_val in qb_avgs.items():
             if col in data_copy.columns:
                 data_copy[col] = data_copy[col].fillna(default_val)
         
-        # Preprocess the data
-        processed_data, _ = self.preprocess_data(data_copy, is_training=False)
-        
-        if len(processed_data) == 0:
-            print("No data remaining after preprocessing")
-            return np.array([])
+        # Preprocess the data, computing only what the selected features need
+        processed_data, _ = self.preprocess_data(data_copy, is_training=False, features=self.top_features)
         
         # Ensure all features exist
         for feature in self.top_features:
@@ -250,7 +396,93 @@ class QBFantasyPredictor:
             if processed_data[feature].isna().any():
                 processed_data[feature] = processed_data[feature].fillna(0)
         
-        predictions = self.model.predict(processed_data[self.top_features])
+        return processed_data[self.top_features]
+    
+    @staticmethod
+    def game_dates(data: pd.DataFrame) -> np.ndarray:
+        """Same dates as the preprocessing "date" column, computed on the raw arrays"""
+        season = data["Season"].to_numpy().astype(np.int64)
+        week = data["Week"].to_numpy().astype(np.int64)
+        return ((season - 1970).astype("datetime64[Y]").astype("datetime64[D]")
+                + (week - 1) * np.timedelta64(7, "D")).astype("datetime64[us]")
+
+    def prediction_order(self, data: pd.DataFrame) -> np.ndarray:
+        """Positions of data's rows in the order predict returns them"""
+        return sort_order(self.game_dates(data), np.zeros(len(data), dtype=np.int64))
+
+    def build_prediction_matrix(self, data: pd.DataFrame, qb_avgs: dict, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Lean version of build_prediction_features. Rows come out in the same date order
+        as one contiguous float32 matrix, written into out when it is given.
+        """
+        if out is None:
+            out = np.empty((len(data), len(self.top_features)), dtype=np.float32)
+        if len(data) == 0:
+            return out
+
+        dates = self.game_dates(data)
+        order = sort_order(dates, np.zeros(len(data), dtype=np.int64))
+
+        def raw_column(name):
+            # Fancy indexing already copies, so the QB average fill can happen in place
+            values = data[name].to_numpy()[order]
+            if name in qb_avgs and values.dtype.kind == "f":
+                values[np.isnan(values)] = qb_avgs[name]
+            return values
+
+        computed = compute_feature_arrays(raw_column, np.zeros(len(data), dtype=np.int64), self.top_features)
+        for i, feature in enumerate(self.top_features):
+            if feature in computed:
+                values = computed[feature]
+            elif feature == "opp_code" and "opp_code" not in data.columns and "Opponent" in data.columns:
+                values, _ = pd.factorize(data["Opponent"].to_numpy()[order], sort=True)
+            elif feature == "hour":
+                values = 12
+            elif feature == "day_code":
+                values = (dates[order].astype("datetime64[D]").astype(np.int64) + 3) % 7
+            elif feature in data.columns:
+                values = data[feature].to_numpy()[order]
+            else:
+                values = 0
+            out[:, i] = values
+
+            # Same fill as the DataFrame path, median of the float64 values, then 0 when all are missing
+            if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+                missing = np.isnan(values)
+                if missing.any():
+                    median = np.nanmedian(values) if not missing.all() else 0
+                    out[missing, i] = median
+        return out
+
+    def predict_lean(self, data: pd.DataFrame) -> np.ndarray:
+        """Predict from a float32 matrix with the native booster, no DataFrame copies"""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+
+        with self.timed("features"):
+            matrix = self.build_prediction_matrix(data, self.qb_avgs)
+        if len(matrix) == 0:
+            print("No data remaining after preprocessing")
+            return np.array([])
+        with self.timed("predict"):
+            return self.sort_quantiles(self.model.get_booster().inplace_predict(matrix, missing=np.nan, validate_features=False))
+
+    def predict(self, data: pd.DataFrame) -> np.ndarray:
+        """Make predictions for given data"""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+        if self.lean:
+            return self.predict_lean(data)
+        
+        with self.timed("features"):
+            features = self.build_prediction_features(data, self.qb_avgs)
+        
+        if len(features) == 0:
+            print("No data remaining after preprocessing")
+            return np.array([])
+        
+        with self.timed("predict"):
+            predictions = self.sort_quantiles(self.model.predict(features))
         return predictions
     
     def predict_season(self, qb_data: pd.DataFrame, season_year: int) -> pd.DataFrame:
@@ -263,10 +495,18 @@ class QBFantasyPredictor:
         print(f"Predicting {season_year} season with {len(season_data)} games")
         
         predictions = self.predict(season_data)
-        
+        return self.format_season_predictions(season_data, predictions)
+    
+    def prediction_columns(self) -> list:
+        """Point columns of a season prediction table"""
+        return (["Predicted_Fantasy_Points"] + [f"Predicted_{profile}_Points" for profile in self.scoring_profiles or []]
+                + [quantile_column(q) for q in self.quantiles or []])
+
+    def format_season_predictions(self, season_data: pd.DataFrame, predictions: np.ndarray) -> pd.DataFrame:
+        """Turn raw predictions into a week by week table with bye weeks"""
         if len(predictions) == 0:
             print("No predictions generated")
-            return pd.DataFrame(columns=["Week", "Opponent", "Predicted_Fantasy_Points"])
+            return pd.DataFrame(columns=["Week", "Opponent"] + self.prediction_columns())
         
         # Ensure matching lengths
         if len(predictions) != len(season_data):
@@ -274,7 +514,20 @@ class QBFantasyPredictor:
             season_data = season_data.head(len(predictions)).copy()
         
         results = season_data[["Week", "Opponent"]].copy()
-        results["Predicted_Fantasy_Points"] = predictions
+        if self.scoring_profiles:
+            # One output per profile, the first one is also the headline column
+            points = predictions.reshape(len(predictions), -1)
+            results["Predicted_Fantasy_Points"] = points[:, 0]
+            for i, profile in enumerate(self.scoring_profiles):
+                results[f"Predicted_{profile}_Points"] = points[:, i]
+        elif self.quantiles:
+            # One output per quantile, the median is the headline column
+            points = predictions.reshape(len(predictions), -1)
+            results["Predicted_Fantasy_Points"] = points[:, self.quantiles.index(0.5)]
+            for i, q in enumerate(self.quantiles):
+                results[quantile_column(q)] = points[:, i]
+        else:
+            results["Predicted_Fantasy_Points"] = predictions
         results = results.sort_values("Week")
         
         # Handle bye weeks 
@@ -286,7 +539,7 @@ class QBFantasyPredictor:
             bye_row = pd.DataFrame({
                 "Week": [bye_week],
                 "Opponent": ["BYE"],
-                "Predicted_Fantasy_Points": [0.0]
+                **{column: [0.0] for column in self.prediction_columns()}
             })
             results = pd.concat([results, bye_row], ignore_index=True)
         
@@ -294,27 +547,52 @@ class QBFantasyPredictor:
         
         return results
     
-    def evaluate_model(self, test_data: pd.DataFrame) -> dict:
-        """Evaluate model performance on test data"""
+    def evaluate_model(self, test_data: pd.DataFrame, targets: np.ndarray | None = None) -> dict:
+        """
+        Evaluate model performance on test data. targets are the actual points for
+        test_data's rows, taken from its Fantasy_Points column when not given, or one
+        column per scoring profile for a multi-output model. A quantile model is scored
+        on its median, and also reports its pinball loss and how often the actual points
+        fall between its lowest and highest quantile.
+        """
         if not self.is_trained:
             raise ValueError("Model must be trained before evaluation")
         
+        if targets is None and self.scoring_profiles:
+            targets = score_games(test_data, self.scoring_profiles).to_numpy()
+        elif targets is None:
+            targets = test_data["Fantasy_Points"].to_numpy()
         predictions = self.predict(test_data)
+        # predict returns rows in date order
+        targets = np.asarray(targets, dtype=np.float64)[self.prediction_order(test_data)]
+        scored = ~np.isnan(targets) if targets.ndim == 1 else ~np.isnan(targets).any(axis=1)
+        quantile_predictions = None
+        if self.quantiles:
+            quantile_predictions = predictions
+            predictions = quantile_predictions[:, self.quantiles.index(0.5)]
         
-        mae = mean_absolute_error(test_data["target"], predictions)
-        rmse = np.sqrt(mean_squared_error(test_data["target"], predictions))
-        r2 = r2_score(test_data["target"], predictions)
+        mae = mean_absolute_error(targets[scored], predictions[scored])
+        rmse = np.sqrt(mean_squared_error(targets[scored], predictions[scored]))
+        r2 = r2_score(targets[scored], predictions[scored]) if scored.sum() > 1 else float("nan")
         
-        return {
+        results = {
             'mae': mae,
             'rmse': rmse,
             'r2': r2,
-            'predictions': predictions
+            'predictions': predictions,
+            'targets': targets
         }
+        if self.quantiles:
+            results['quantile_predictions'] = quantile_predictions
+            results['pinball'] = float(pinball_loss(targets[scored], quantile_predictions[scored], self.quantiles).mean())
+            results['coverage'] = float(np.mean((targets[scored] >= quantile_predictions[scored, 0])
+                                                & (targets[scored] <= quantile_predictions[scored, -1])))
+        return results
     
     def train_on_qb_data(self, qb_data: pd.DataFrame) -> None:
         """Train the model on QB's historical data"""
-        processed_data, all_features = self.preprocess_data(qb_data, is_training=True)
+        with self.timed("features"):
+            processed_data, all_features = self.preprocess_data(qb_data, is_training=True)
         
         if len(processed_data) < 20:
             raise ValueError("Not enough training data. Need at least 20 games.")
@@ -322,14 +600,395 @@ class QBFantasyPredictor:
         # Calculate QB-specific averages from historical data
         self.qb_avgs = self.calculate_qb_averages(qb_data)
         
-        self.select_features(processed_data, all_features)
-        self.train_model(processed_data)
+        self.fit_or_load(processed_data, all_features)
+        self.start_feature_stream(qb_data, processed_data)
+    
+    def start_feature_stream(self, qb_data: pd.DataFrame, processed_data: pd.DataFrame) -> None:
+        """Keep the rolling feature state of the played games and the rows the model was trained on"""
+        games = self.add_game_columns(qb_data).dropna(subset=self.target_columns())
+        self.feature_state = QBFeatureState.from_history(games)
+        self.training_rows = processed_data.sort_values("date", kind="stable")[
+            ["date"] + self.top_features + self.target_columns()
+        ].reset_index(drop=True)
+    
+    def stream_new_games(self, qb_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Model rows of the games played since the model was last trained, each appended to the
+        feature state in O(window) instead of recomputing features over the QB's history.
+        Missing values are filled with the medians of the rows the model was trained on.
+        """
+        games = self.add_game_columns(qb_data).dropna(subset=self.target_columns())
+        new_games = games[games["date"] > self.training_rows["date"].max()].sort_values("date", kind="stable")
+        feature_rows = []
+        for game in new_games.to_dict("records"):
+            feature_rows.append(self.feature_state.next_features(game))
+            self.feature_state.append(game)
+        features = pd.DataFrame(feature_rows, index=new_games.index, columns=list(feature_rows[0]) if feature_rows else None)
+        new_rows = pd.concat([new_games.drop(columns=[col for col in features.columns if col in new_games.columns]),
+                              features], axis=1)
+        for feature in self.top_features:
+            if feature not in new_rows.columns:
+                new_rows[feature] = 0
+        new_rows = new_rows[["date"] + self.top_features + self.target_columns()].reset_index(drop=True)
+        return new_rows.fillna({feature: self.training_rows[feature].median() for feature in self.top_features})
+    
+    def fit_or_load(self, train_data: pd.DataFrame, all_features: list) -> None:
+        """Select features and train, or load the cached model for identical rows and settings"""
+        # A new model starts a new feature stream
+        self.feature_state = None
+        self.training_rows = None
+        if self.model_cache is not None:
+            cache_key = self.model_cache.make_key(train_data, all_features, self.training_config())
+            if self.load_cached(cache_key):
+                print("Loaded cached model, skipping training")
+                return
+        
+        with self.timed("selection"):
+            self.select_features(train_data, all_features)
+        with self.timed("search"):
+            self.train_model(train_data)
+        self.training_profile = self.profile_training_rows(train_data)
+        
+        if self.model_cache is not None:
+            self.save_state(self.model_cache.entry_path(cache_key))
+            self.model_cache.evict()
+    
+    def profile_training_rows(self, train_data: pd.DataFrame) -> dict:
+        """Summary of the rows a full search was run on, used to decide when warm updates are no longer enough"""
+        features = train_data[self.top_features].astype(float)
+        trained_through = str(train_data["date"].max()) if "date" in train_data.columns else None
+        return {
+            'searched_through': trained_through,
+            'trained_through': trained_through,
+            'rows': len(train_data),
+            'means': features.mean().to_dict(),
+            'stds': features.std().fillna(0).to_dict(),
+            'warm_updates': 0,
+            'new_errors': []
+        }
+
+    def update_with_new_games(self, qb_data: pd.DataFrame, warm_rounds: int = 25, half_life: float = 17.0,
+                              drift_threshold: float = 3.0, mae_tolerance: float = 0.5,
+                              min_games: int = 3, max_warm_updates: int = 8) -> str:
+        """
+        Refresh a trained model with games added to qb_data since it was trained.
+        New games are added by boosting warm_rounds more trees on every row, weighted
+        so a game half_life games older counts half as much. The full search runs again
+        when the games since that search drift from its rows (the z-score of their feature
+        means, averaged over top_features, is above drift_threshold), when the model's
+        MAE on games it had not seen yet is more than mae_tolerance above its CV MAE,
+        or after max_warm_updates warm updates. A model trained by train_on_qb_data keeps
+        a feature state, so only the new games' features are computed, appended one game
+        at a time, and the rows it was trained on are reused.
+        Returns "unchanged", "warm" or "full".
+        """
+        if not self.is_trained or self.training_profile is None:
+            raise ValueError("Model must be trained before it can be updated")
+        profile = self.training_profile
+
+        with self.timed("features"):
+            if self.feature_state is not None:
+                # Only the new games go through the feature state, the trained rows are kept as they are
+                new_rows = self.stream_new_games(qb_data)
+                processed_data = pd.concat([self.training_rows, new_rows], ignore_index=True)
+            else:
+                # Models saved without a feature state recompute every game's features
+                processed_data, _ = self.preprocess_data(qb_data, is_training=True)
+                new_rows = processed_data[processed_data["date"] > pd.Timestamp(profile['trained_through'])]
+        if len(new_rows) == 0:
+            return "unchanged"
+        self.qb_avgs = self.calculate_qb_averages(qb_data)
+
+        # How the current model does on games it has never seen
+        with self.timed("predict"):
+            errors = self.game_errors(self.model.predict(new_rows[self.top_features]),
+                                      self.training_targets(new_rows).to_numpy())
+        new_errors = profile['new_errors'] + errors.tolist()
+        accuracy_drop = len(new_errors) >= min_games and np.mean(new_errors) > self.search_report['best_mae'] * (1 + mae_tolerance)
+
+        # Drift of every game since the last full search, so one odd game cannot trigger it alone
+        unsearched_rows = processed_data[processed_data["date"] > pd.Timestamp(profile['searched_through'])]
+        shifts = [
+            abs(unsearched_rows[feature].mean() - profile['means'][feature])
+            / (profile['stds'][feature] / np.sqrt(len(unsearched_rows)))
+            for feature in self.top_features if profile['stds'][feature] > 0
+        ]
+        drift = float(np.mean(shifts)) if shifts else 0.0
+
+        if accuracy_drop or drift > drift_threshold or profile['warm_updates'] >= max_warm_updates:
+            print(f"Full retrain: drift {drift:.2f}, MAE on new games {np.mean(new_errors):.2f}, "
+                  f"{profile['warm_updates']} warm updates since the last search")
+            self.train_on_qb_data(qb_data)
+            return "full"
+
+        processed_data = processed_data.sort_values("date", kind="stable")
+        with self.timed("search"):
+            self.warm_start(processed_data, warm_rounds, half_life)
+        if self.feature_state is not None:
+            self.training_rows = processed_data.reset_index(drop=True)
+        self.training_profile = {
+            **profile,
+            'trained_through': str(processed_data["date"].max()),
+            'warm_updates': profile['warm_updates'] + 1,
+            'new_errors': new_errors
+        }
+        print(f"Warm update: {len(new_rows)} new games, drift {drift:.2f}, {warm_rounds} trees added")
+        return "warm"
+
+    def warm_start(self, train_data: pd.DataFrame, warm_rounds: int, half_life: float) -> None:
+        """Continue boosting the current model with the searched parameters on recency weighted rows"""
+        best_params = {key: self.search_report['best_params'][key] for key in self.XGB_PARAM_GRID if key != 'n_estimators'}
+        age = np.arange(len(train_data))[::-1]
+        model = xgb.XGBRegressor(**best_params, **self.model_params(), n_estimators=warm_rounds, random_state=42,
+                                 n_jobs=self.n_jobs)
+        model.fit(train_data[self.top_features], self.training_targets(train_data),
+                  sample_weight=0.5 ** (age / half_life), xgb_model=self.model.get_booster())
+        self.model = model
+
+    def training_config(self) -> dict:
+        """Settings that change the trained model, part of the cache key"""
+        return {
+            'model': type(self).__name__,
+            'search': self.search,
+            'time_budget': self.time_budget,
+            'max_fits': self.max_fits,
+            'param_grid': self.XGB_PARAM_GRID,
+            'scoring_profiles': self.scoring_profiles,
+            'quantiles': self.quantiles
+        }
+    
+    def load_cached(self, cache_key: str) -> bool:
+        """Load a cache entry, returns False when it is missing or unreadable"""
+        if not self.model_cache.contains(cache_key):
+            return False
+        try:
+            self.load_state(self.model_cache.entry_path(cache_key))
+        except (OSError, ValueError, xgb.core.XGBoostError):
+            return False
+        self.model_cache.touch(cache_key)
+        return True
+    
+    def get_state(self) -> dict:
+        """Everything besides the booster needed to predict again"""
+        return {
+            'top_features': self.top_features,
+            'feature_importance': self.feature_importance.astype({'importance': float}).to_dict('records'),
+            'qb_avgs': {col: float(value) for col, value in self.qb_avgs.items()} if self.qb_avgs is not None else None,
+            'search_report': self.search_report,
+            'training_profile': self.training_profile,
+            'scoring_profiles': self.scoring_profiles,
+            'quantiles': self.quantiles
+        }
+    
+    def set_state(self, state: dict) -> None:
+        """Restore the values written by get_state"""
+        self.top_features = state['top_features']
+        self.feature_importance = pd.DataFrame(state['feature_importance'])
+        self.qb_avgs = state['qb_avgs']
+        self.search_report = state['search_report']
+        self.training_profile = state['training_profile']
+        self.scoring_profiles = state['scoring_profiles']
+        self.quantiles = state['quantiles']
+    
+    def save_state(self, path: str) -> None:
+        """Save the trained booster to path.ubj and the rest of the state to path.json"""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before saving")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        
+        # Write to temp files first so a concurrent reader never sees half an entry
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.model.save_model(f"{tmp_path}.ubj")
+        os.replace(f"{tmp_path}.ubj", f"{path}.ubj")
+        with open(f"{tmp_path}.json", "w") as f:
+            json.dump(self.get_state(), f, default=str)
+        os.replace(f"{tmp_path}.json", f"{path}.json")
+        if self.feature_state is not None:
+            self.save_feature_stream(f"{tmp_path}.features.npz")
+            os.replace(f"{tmp_path}.features.npz", f"{path}.features.npz")
+        elif os.path.exists(f"{path}.features.npz"):
+            # A stream left by an earlier model does not belong to this one
+            os.remove(f"{path}.features.npz")
+    
+    def save_feature_stream(self, stream_file: str) -> None:
+        """Write the feature state and trained rows to one .npz, the state as a JSON block"""
+        columns = self.top_features + self.target_columns()
+        metadata = {'columns': columns, 'feature_state': self.feature_state.to_dict()}
+        with open(stream_file, "wb") as f:
+            np.savez(
+                f,
+                dates=self.training_rows["date"].to_numpy(dtype="datetime64[us]"),
+                rows=self.training_rows[columns].to_numpy(dtype=np.float64),
+                metadata=np.frombuffer(json.dumps(metadata).encode(), dtype=np.uint8)
+            )
+    
+    def load_feature_stream(self, stream_file: str) -> None:
+        """Restore the feature state and trained rows written by save_feature_stream"""
+        with np.load(stream_file, allow_pickle=False) as stream:
+            metadata = json.loads(stream['metadata'].tobytes())
+            rows = pd.DataFrame(stream['rows'], columns=metadata['columns'])
+            rows.insert(0, "date", stream['dates'])
+        self.feature_state = QBFeatureState.from_dict(metadata['feature_state'])
+        self.training_rows = rows
+    
+    def load_state(self, path: str) -> None:
+        """Load state written by save_state"""
+        model = xgb.XGBRegressor(n_jobs=self.n_jobs)
+        model.load_model(f"{path}.ubj")
+        with open(f"{path}.json") as f:
+            state = json.load(f)
+        
+        self.set_state(state)
+        self.model = model
+        self.is_trained = True
+        self.feature_state = None
+        self.training_rows = None
+        if os.path.exists(f"{path}.features.npz"):
+            self.load_feature_stream(f"{path}.features.npz")
+
+class PooledQBFantasyPredictor(QBFantasyPredictor):
+    """Predict fantasy points for every QB with one league-wide model"""
+    QB_FEATURES = ["qb_id"] + [f"qb_avg_{col.lower()}" for col in [
+        'Completions', 'Attempts', 'Pass_Yds', 'Pass_TD', 'INT',
+        'Rush_Att', 'Rush_Yds', 'Rush_TD', 'Fantasy_Points'
+    ]]
 
-def predict_qb_fantasy_points(qb_data: pd.DataFrame, qb_name: str, season_year: int = 2025) -> pd.DataFrame:
+    def __init__(self, **predictor_options):
+        super().__init__(**predictor_options)
+        self.qb_ids = {}
+        self.qb_baselines = {}
+        self.opponents = []
+
+    def add_qb_features(self, data: pd.DataFrame, qb_key: str) -> pd.DataFrame:
+        """Add player identity, QB baselines and a league-wide opponent code"""
+        data = data.copy()
+        data["qb_id"] = self.qb_ids[qb_key]
+        for col, value in self.qb_baselines[qb_key].items():
+            data[f"qb_avg_{col.lower()}"] = value
+        # Same opponent codes for every QB so the model sees one encoding
+        data["opp_code"] = pd.Categorical(data["Opponent"], categories=self.opponents).codes
+        return data
+
+    def select_features(self, train_data: pd.DataFrame, all_features: list) -> list:
+        """Top shared features by importance, plus the QB identity and baselines the pooled model always needs"""
+        super().select_features(train_data, [feature for feature in all_features if feature not in self.QB_FEATURES])
+        self.top_features = self.top_features + self.QB_FEATURES
+        return self.top_features
+
+    def train_on_all_qbs(self, qb_frames: dict) -> None:
+        """Train one model on the historical data of every QB"""
+        self.qb_ids = {key: i for i, key in enumerate(sorted(qb_frames))}
+        self.qb_baselines = {key: self.calculate_qb_averages(qb_data) for key, qb_data in qb_frames.items()}
+        opponents = pd.concat([qb_data["Opponent"] for qb_data in qb_frames.values()])
+        self.opponents = sorted(opponents.dropna().unique())
+
+        # Rolling features and median fills stay per QB, only the model is shared
+        processed_frames = []
+        with self.timed("features"):
+            for key, qb_data in qb_frames.items():
+                processed_data, all_features = self.preprocess_data(self.add_qb_features(qb_data, key), is_training=True)
+                processed_frames.append(processed_data)
+        pooled_data = pd.concat(processed_frames, ignore_index=True)
+
+        if len(pooled_data) < 20:
+            raise ValueError("Not enough training data. Need at least 20 games.")
+
+        self.fit_or_load(pooled_data, all_features + self.QB_FEATURES)
+
+    def get_state(self) -> dict:
+        """Base state plus the per QB ids, baselines and opponent codes"""
+        state = super().get_state()
+        state['qb_ids'] = self.qb_ids
+        state['qb_baselines'] = {
+            key: {col: float(value) for col, value in baseline.items()} for key, baseline in self.qb_baselines.items()
+        }
+        state['opponents'] = self.opponents
+        return state
+
+    def set_state(self, state: dict) -> None:
+        """Restore the values written by get_state"""
+        super().set_state(state)
+        self.qb_ids = state['qb_ids']
+        self.qb_baselines = state['qb_baselines']
+        self.opponents = state['opponents']
+
+    def predict_all_seasons(self, qb_frames: dict, season_year: int) -> dict:
+        """Predict a season for every QB with a single batched predict call"""
+        if not self.is_trained:
+            raise ValueError("Model must be trained before making predictions")
+
+        season_frames = {}
+        for key, qb_data in qb_frames.items():
+            season_data = qb_data[qb_data["Season"] == season_year].copy()
+            if key not in self.qb_ids or len(season_data) == 0:
+                print(f"Skipping {key}: no {season_year} games or no training history")
+                continue
+            season_frames[key] = self.add_qb_features(season_data, key)
+
+        if not season_frames:
+            return {}
+
+        print(f"Predicting {season_year} season for {len(season_frames)} QBs")
+        offsets = np.cumsum([0] + [len(season_data) for season_data in season_frames.values()])
+        if self.lean:
+            # Every QB writes its rows straight into one preallocated matrix
+            with self.timed("features"):
+                matrix = np.empty((offsets[-1], len(self.top_features)), dtype=np.float32)
+                for (key, season_data), start, end in zip(season_frames.items(), offsets[:-1], offsets[1:]):
+                    self.build_prediction_matrix(season_data, self.qb_baselines[key], out=matrix[start:end])
+            with self.timed("predict"):
+                predictions = self.sort_quantiles(
+                    self.model.get_booster().inplace_predict(matrix, missing=np.nan, validate_features=False)
+                )
+        else:
+            with self.timed("features"):
+                feature_blocks = pd.concat([
+                    self.build_prediction_features(season_data, self.qb_baselines[key])
+                    for key, season_data in season_frames.items()
+                ], ignore_index=True)
+            with self.timed("predict"):
+                predictions = self.sort_quantiles(self.model.predict(feature_blocks))
+
+        # Split the batched output back into one table per QB
+        results = {}
+        for (key, season_data), start, end in zip(season_frames.items(), offsets[:-1], offsets[1:]):
+            results[key] = self.format_season_predictions(season_data, predictions[start:end])
+        return results
+
+def load_qb_data_files(data_dir: str = "data", table_dir: str | None = None) -> dict:
+    """Load every *_complete_data.csv keyed by its file prefix, from the league table when table_dir is given"""
+    if table_dir is not None:
+        return load_league_table(data_dir, table_dir).qb_frames()
+    qb_frames = {}
+    for file_path in sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv"))):
+        qb_key = os.path.basename(file_path).replace("_complete_data.csv", "")
+        qb_frames[qb_key] = pd.read_csv(file_path)
+    return qb_frames
+
+def predict_all_qbs_pooled(qb_frames: dict, season_year: int = 2025, predictor_options: dict | None = None,
+                           state_path: str | None = None) -> dict:
+    """
+    Predict fantasy points for every QB with one pooled model, saving it to state_path when given
+    """
+    predictor = PooledQBFantasyPredictor(**(predictor_options or {}))
+
+    # Train on historical data only
+    historical_frames = {key: qb_data[qb_data["Season"] != season_year].copy() for key, qb_data in qb_frames.items()}
+    historical_frames = {key: qb_data for key, qb_data in historical_frames.items() if len(qb_data) > 0}
+
+    total_games = sum(len(qb_data) for qb_data in historical_frames.values())
+    print(f"Training pooled model for {len(historical_frames)} QBs using {total_games} historical games")
+    predictor.train_on_all_qbs(historical_frames)
+    if state_path is not None:
+        predictor.save_state(state_path)
+    return predictor.predict_all_seasons(qb_frames, season_year)
+
+def predict_qb_fantasy_points(qb_data: pd.DataFrame, qb_name: str, season_year: int = 2025,
+                              predictor_options: dict | None = None) -> pd.DataFrame:
     """
     Predict fantasy points for any QB
     """
-    predictor = QBFantasyPredictor()
+    predictor = QBFantasyPredictor(**(predictor_options or {}))
     
     # Train on historical data only
     historical_data = qb_data[qb_data["Season"] != season_year].copy()
@@ -354,22 +1013,200 @@ def predict_qb_fantasy_points(qb_data: pd.DataFrame, qb_name: str, season_year:
     
     return predictions
 
-if __name__ == "__main__":
-    #PICK QB NAME HERE
-    qb_name = "Josh Allen"  
-    data_filename = f"data/{qb_name.lower().replace(' ', '_')}_complete_data.csv"
-        
-    # Load  dataset
+def benchmark_inference(predictor: QBFantasyPredictor, data: pd.DataFrame, repeats: int = 20) -> dict:
+    """Latency and peak traced memory of the DataFrame and lean predict paths on the same rows"""
+    results = {}
+    for mode, predict in (("frame", predictor.build_prediction_features), ("lean", predictor.build_prediction_matrix)):
+        def run():
+            features = predict(data, predictor.qb_avgs)
+            if mode == "lean":
+                return predictor.model.get_booster().inplace_predict(features, missing=np.nan, validate_features=False)
+            return predictor.model.predict(features)
+
+        predictions = run()
+        tracemalloc.start()
+        run()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            run()
+        results[mode] = {
+            'latency_ms': (time.perf_counter() - start_time) / repeats * 1000,
+            'peak_kb': peak_bytes / 1024,
+            'predictions': predictions
+        }
+        print(f"{mode:>5}: {results[mode]['latency_ms']:.2f} ms per call, peak {results[mode]['peak_kb']:.0f} KiB")
+    max_diff = np.max(np.abs(results["frame"]['predictions'] - results["lean"]['predictions']), initial=0)
+    print(f"Max prediction difference: {max_diff:.2e}")
+    return results
+
+def write_csv_atomic(df: pd.DataFrame, output_filename: str) -> None:
+    """Write a CSV through a temp file so readers never see a partial file"""
+    fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(output_filename) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            df.to_csv(f, index=False)
+        os.replace(tmp_filename, output_filename)
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
+
+def predict_qb_file(data_filename: str, output_dir: str, season_year: int, predictor_options: dict) -> float:
+    """Train, predict and save one QB file, returns the time it took"""
+    start_time = time.perf_counter()
+    qb_key = os.path.basename(data_filename).replace("_complete_data.csv", "")
     complete_data = pd.read_csv(data_filename)
-        
-    # Make predictions for 2025
-    predictions = predict_qb_fantasy_points(complete_data, qb_name, 2025)
-        
-    # Save predictions
-    output_filename = f"data/predictions/{qb_name.lower().replace(' ', '_')}_2025_predictions.csv"
-    predictions.to_csv(output_filename, index=False)
-    print(f"\nPredictions saved to '{output_filename}'")
-        
-    # Show detailed predictions
-    print(f"\n{qb_name} 2025 Predictions:")
-    print(predictions.to_string(index=False))
+
+    # Keep worker output quiet, the batch driver reports progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        predictions = predict_qb_fantasy_points(complete_data, qb_key.replace("_", " ").title(), season_year, predictor_options)
+    if len(predictions) == 0:
+        raise ValueError("No predictions were generated")
+
+    write_csv_atomic(predictions, os.path.join(output_dir, f"{qb_key}_{season_year}_predictions.csv"))
+    return time.perf_counter() - start_time
+
+def refresh_qb_models(data_dir: str = "data", state_dir: str = "data/models", output_dir: str = "data/predictions",
+                      season_year: int = 2025, predictor_options: dict | None = None) -> dict:
+    """
+    Weekly refresh: bring every QB's saved model up to date with the games played so far
+    and rewrite its season predictions. QBs without a saved model get a full training run.
+    """
+    modes = {}
+    for data_filename in sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv"))):
+        qb_key = os.path.basename(data_filename).replace("_complete_data.csv", "")
+        state_path = os.path.join(state_dir, qb_key)
+        qb_data = pd.read_csv(data_filename)
+        predictor = QBFantasyPredictor(**(predictor_options or {}))
+
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if os.path.exists(f"{state_path}.json") and os.path.exists(f"{state_path}.ubj"):
+                predictor.load_state(state_path)
+                modes[qb_key] = predictor.update_with_new_games(qb_data)
+            else:
+                # Every played game is training data, the unplayed ones have no points yet
+                predictor.train_on_qb_data(qb_data)
+                modes[qb_key] = "full"
+            if modes[qb_key] != "unchanged":
+                predictor.save_state(state_path)
+            predictions = predictor.predict_season(qb_data, season_year)
+        write_csv_atomic(predictions, os.path.join(output_dir, f"{qb_key}_{season_year}_predictions.csv"))
+        print(f"{qb_key}: {modes[qb_key]} in {time.perf_counter() - start_time:.1f}s")
+    return modes
+
+def run_batch_predictions(data_dir: str = "data", output_dir: str = "data/predictions", season_year: int = 2025,
+                          workers: int | None = None, predictor_options: dict | None = None) -> dict:
+    """
+    Train and predict every QB in data_dir across a process pool
+    """
+    data_files = sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv")))
+    if not data_files:
+        raise ValueError(f"No *_complete_data.csv files found in {data_dir}")
+
+    # Split the cores between the pool and each worker's own search
+    n_cores = os.cpu_count() or 1
+    workers = max(1, min(workers or n_cores, len(data_files)))
+    worker_options = {**(predictor_options or {}), "n_jobs": max(1, n_cores // workers)}
+    print(f"Predicting {len(data_files)} QBs with {workers} workers x {worker_options['n_jobs']} cores")
+
+    start_time = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(predict_qb_file, data_filename, output_dir, season_year, worker_options): data_filename
+            for data_filename in data_files
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            qb_key = os.path.basename(futures[future]).replace("_complete_data.csv", "")
+            try:
+                elapsed = future.result()
+                results[qb_key] = elapsed
+                print(f"[{done}/{len(futures)}] {qb_key} done in {elapsed:.1f}s")
+            except Exception as e:
+                results[qb_key] = e
+                print(f"[{done}/{len(futures)}] {qb_key} FAILED: {e}")
+
+    failed = [qb_key for qb_key, result in results.items() if isinstance(result, Exception)]
+    print(f"\nFinished in {time.perf_counter() - start_time:.1f}s, {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    if failed:
+        print(f"Failed QBs: {', '.join(sorted(failed))}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predict QB fantasy points")
+    parser.add_argument("--qb", default="Josh Allen", help="QB to predict")
+    parser.add_argument("--pooled", action="store_true", help="train one model on every QB in data/")
+    parser.add_argument("--all", action="store_true", help="train and predict every QB in data/ in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --all")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--search", choices=["grid", "halving"], default="grid", help="hyperparameter search mode")
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds allowed for the halving search")
+    parser.add_argument("--max-fits", type=int, default=None, help="model fits allowed for the halving search")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse cached models and stored feature matrices, written under --cache-dir and --feature-store")
+    parser.add_argument("--cache-dir", default="data/model_cache", help="where trained models are cached with --cache")
+    parser.add_argument("--feature-store", default="data/feature_store",
+                        help="where preprocessed features are stored with --cache")
+    parser.add_argument("--update", action="store_true",
+                        help="warm start every QB's saved model with the newly played games instead of retraining")
+    parser.add_argument("--state-dir", default="data/models",
+                        help="where --update keeps each QB's model and --pooled saves the pooled one")
+    parser.add_argument("--league-table", nargs="?", const="data/league_table", default=None,
+                        help="read --pooled data from the memory-mapped league table, rebuilt when the CSVs change")
+    parser.add_argument("--lean", action="store_true", help="predict from a float32 matrix with the native booster")
+    parser.add_argument("--scoring", nargs="+", choices=list(SCORING_PROFILES), default=None,
+                        help="scoring profiles to predict together with one multi-output model")
+    parser.add_argument("--quantiles", nargs="+", type=float, default=None,
+                        help="also predict these quantiles, e.g. 0.1 0.9 for floor and ceiling, with one booster")
+    parser.add_argument("--benchmark-inference", action="store_true",
+                        help="compare latency and memory of the DataFrame and lean predict paths for --qb")
+    args = parser.parse_args()
+    predictor_options = {
+        "search": args.search,
+        "time_budget": args.time_budget,
+        "max_fits": args.max_fits,
+        # Caching is opt-in so a plain run writes nothing besides its predictions
+        "model_cache": ModelCache(args.cache_dir) if args.cache else None,
+        "feature_store": FeatureStore(args.feature_store) if args.cache else None,
+        "lean": args.lean,
+        "scoring_profiles": args.scoring,
+        "quantiles": args.quantiles
+    }
+
+    if args.benchmark_inference:
+        complete_data = pd.read_csv(f"data/{args.qb.lower().replace(' ', '_')}_complete_data.csv")
+        predictor = QBFantasyPredictor(**{**predictor_options, "feature_store": None})
+        predictor.train_on_qb_data(complete_data[complete_data["Season"] != args.season].copy())
+        benchmark_inference(predictor, complete_data[complete_data["Season"] == args.season].copy())
+    elif args.update:
+        refresh_qb_models("data", args.state_dir, "data/predictions", args.season, predictor_options)
+    elif args.all:
+        run_batch_predictions("data", "data/predictions", args.season, args.workers, predictor_options)
+    elif args.pooled:
+        all_predictions = predict_all_qbs_pooled(load_qb_data_files("data", args.league_table), args.season, predictor_options,
+                                                 state_path=os.path.join(args.state_dir, "pooled"))
+        for qb_key, predictions in all_predictions.items():
+            output_filename = f"data/predictions/{qb_key}_{args.season}_predictions.csv"
+            write_csv_atomic(predictions, output_filename)
+        print(f"\nSaved pooled predictions for {len(all_predictions)} QBs to 'data/predictions'")
+    else:
+        qb_name = args.qb
+        data_filename = f"data/{qb_name.lower().replace(' ', '_')}_complete_data.csv"
+            
+        # Load  dataset
+        complete_data = pd.read_csv(data_filename)
+            
+        # Make predictions
+        predictions = predict_qb_fantasy_points(complete_data, qb_name, args.season, predictor_options)
+            
+        # Save predictions
+        output_filename = f"data/predictions/{qb_name.lower().replace(' ', '_')}_{args.season}_predictions.csv"
+        write_csv_atomic(predictions, output_filename)
+        print(f"\nPredictions saved to '{output_filename}'")
+            
+        # Show detailed predictions
+        print(f"\n{qb_name} {args.season} Predictions:")
+        print(predictions.to_string(index=False))
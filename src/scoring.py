@@ -0,0 +1,85 @@
+'''
+Fantasy scoring profiles.
+
+Every profile scores the same box score columns, so the points of all profiles
+are computed together as one (games, profiles) matrix. The standard profile
+adds its terms in the same order as the original clean_qb_data.py formula and
+gives bit-for-bit the same values.
+'''
+
+import numpy as np
+import pandas as pd
+
+# Box score columns in the order their terms are added
+SCORING_STATS = ['Pass_Yds', 'Pass_TD', 'Rush_Yds', 'Rush_TD', 'INT', 'Fumbles']
+
+# Each term is (units, points): points scored per `units` of the stat.
+# Bonuses are (stat, threshold, points) added once when the stat reaches the threshold.
+SCORING_PROFILES = {
+    'standard': {
+        'terms': {'Pass_Yds': (25, 1), 'Pass_TD': (1, 4), 'Rush_Yds': (10, 1), 'Rush_TD': (1, 6),
+                  'INT': (1, -2), 'Fumbles': (1, -2)},
+        'bonuses': []
+    },
+    'six_point_td': {
+        'terms': {'Pass_Yds': (25, 1), 'Pass_TD': (1, 6), 'Rush_Yds': (10, 1), 'Rush_TD': (1, 6),
+                  'INT': (1, -2), 'Fumbles': (1, -2)},
+        'bonuses': []
+    },
+    'draftkings': {
+        'terms': {'Pass_Yds': (25, 1), 'Pass_TD': (1, 4), 'Rush_Yds': (10, 1), 'Rush_TD': (1, 6),
+                  'INT': (1, -1), 'Fumbles': (1, -1)},
+        'bonuses': [('Pass_Yds', 300, 3), ('Rush_Yds', 100, 3)]
+    },
+    'fanduel': {
+        'terms': {'Pass_Yds': (25, 1), 'Pass_TD': (1, 4), 'Rush_Yds': (10, 1), 'Rush_TD': (1, 6),
+                  'INT': (1, -1), 'Fumbles': (1, -2)},
+        'bonuses': []
+    },
+    'bonus_yards': {
+        'terms': {'Pass_Yds': (25, 1), 'Pass_TD': (1, 4), 'Rush_Yds': (10, 1), 'Rush_TD': (1, 6),
+                  'INT': (1, -2), 'Fumbles': (1, -2)},
+        'bonuses': [('Pass_Yds', 300, 2), ('Pass_Yds', 400, 2), ('Rush_Yds', 100, 2)]
+    }
+}
+
+def check_profiles(profiles: list) -> list:
+    """Raise for unknown profile names, returns the list unchanged"""
+    unknown = [profile for profile in profiles if profile not in SCORING_PROFILES]
+    if unknown:
+        raise ValueError(f"Unknown scoring profiles: {', '.join(unknown)}")
+    return list(profiles)
+
+def infer_fumbles(data: pd.DataFrame) -> np.ndarray:
+    """Fumbles per game, recovered from the standard Fantasy_Points when the column is missing"""
+    if "Fumbles" in data.columns:
+        return data["Fumbles"].to_numpy(dtype=np.float64)
+    # The merged game logs only kept the points, the standard formula without fumbles gives the rest
+    stats = data.reindex(columns=SCORING_STATS[:-1]).to_numpy(dtype=np.float64)
+    without_fumbles = stats[:, 0] / 25 + stats[:, 1] * 4 + stats[:, 2] / 10 + stats[:, 3] * 6 - stats[:, 4] * 2
+    fumbles = np.round((without_fumbles - data["Fantasy_Points"].to_numpy(dtype=np.float64)) / 2)
+    return np.clip(fumbles, 0, None)
+
+def compute_points(data: pd.DataFrame, profiles: list | None = None) -> np.ndarray:
+    """(games, profiles) matrix of points, every profile scored in one pass over the stat columns"""
+    profiles = check_profiles(profiles or ['standard'])
+    stats = data.reindex(columns=SCORING_STATS).to_numpy(dtype=np.float64, copy=True)
+    stats[:, SCORING_STATS.index('Fumbles')] = infer_fumbles(data)
+
+    units = np.array([[SCORING_PROFILES[p]['terms'][stat][0] for p in profiles] for stat in SCORING_STATS], dtype=np.float64)
+    points = np.array([[SCORING_PROFILES[p]['terms'][stat][1] for p in profiles] for stat in SCORING_STATS], dtype=np.float64)
+
+    # Terms are added one stat at a time, left to right, so rounding matches the scalar formula
+    total = stats[:, [0]] / units[0] * points[0]
+    for i in range(1, len(SCORING_STATS)):
+        total = total + stats[:, [i]] / units[i] * points[i]
+
+    for j, profile in enumerate(profiles):
+        for stat, threshold, bonus in SCORING_PROFILES[profile]['bonuses']:
+            total[:, j] += np.where(stats[:, SCORING_STATS.index(stat)] >= threshold, bonus, 0)
+    return total
+
+def score_games(data: pd.DataFrame, profiles: list | None = None) -> pd.DataFrame:
+    """Points of every profile as one column per profile, aligned with data's index"""
+    profiles = check_profiles(profiles or ['standard'])
+    return pd.DataFrame(compute_points(data, profiles), index=data.index, columns=profiles)
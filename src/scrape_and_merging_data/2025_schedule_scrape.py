@@ -1,23 +1,18 @@
 '''Scrape ESPN NFL schedule grid for 2025 season and save to CSV'''
 
-import requests
+import argparse
 from bs4 import BeautifulSoup
 import pandas as pd
+from fetcher import Fetcher
 
-def fetch_schedule_grid():
-    url = "https://www.espn.com/nfl/schedulegrid"
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/115.0 Safari/537.36"
-        ),
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+SCHEDULE_URL = "https://www.espn.com/nfl/schedulegrid"
 
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()  #throw error if blocked
-    soup = BeautifulSoup(response.text, "html.parser")
+def fetch_schedule_grid(fetcher: Fetcher | None = None, url: str = SCHEDULE_URL):
+    fetcher = fetcher or Fetcher()
+    return parse_schedule_grid(fetcher.fetch(url))
+
+def parse_schedule_grid(html: str):
+    soup = BeautifulSoup(html, "html.parser")
     # Locate the table rows for each team
     rows = soup.find_all("tr")
     schedule = []
@@ -56,9 +51,18 @@ def save_to_csv(df, filepath="nfl_schedule_2025.csv"):
     print(f"Schedule grid saved to {filepath}")
 
 def main():
-    df = fetch_schedule_grid()
+    parser = argparse.ArgumentParser(description="Scrape the ESPN 2025 schedule grid")
+    parser.add_argument("--output", default="nfl_schedule_2025.csv")
+    parser.add_argument("--cache-dir", default="data/http_cache", help="where raw pages are cached")
+    parser.add_argument("--replay", action="store_true", help="parse the cached page only, without the network")
+    parser.add_argument("--url", default=SCHEDULE_URL, help="page to fetch, e.g. from a local stub server")
+    args = parser.parse_args()
+
+    fetcher = Fetcher(args.cache_dir, replay=args.replay)
+    df = fetch_schedule_grid(fetcher, args.url)
+    fetcher.close()
     print(df.head())
-    save_to_csv(df)
+    save_to_csv(df, args.output)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,13 +1,20 @@
 '''
 This file is a template to clean any QB's data from Pro-Football-Reference.com.
-Just replace the QB name and raw_data variables
+Just replace the QB name and raw_data variables, or list every QB in a manifest
+for ingest_qbs.py
 '''
 
 
 import pandas as pd
 import io
+import os
+import sys
 import numpy as np
 
+# scoring.py lives one directory up in src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from scoring import score_games
+
 # SET THESE VARIABLES FOR EACH QB
 qb_name = "Josh Allen"
 raw_data = ''',,,,,,,,,,Passing,Passing,Passing,Passing,Passing,Passing,Passing,Passing,Passing,Passing,Passing,Rushing,Rushing,Rushing,Rushing,Receiving,Receiving,Receiving,Receiving,Receiving,Receiving,Receiving,,Tackles,Tackles,Tackles,Tackles,Tackles,,Fumbles,Fumbles,Fumbles,Fumbles,Fumbles,Fumbles,Snap Counts,Snap Counts,Snap Counts,Snap Counts,Snap Counts,Snap Counts
@@ -125,63 +132,64 @@ Rk,Gcar,Gtm,Week,Date,Team,,Opp,Result,GS,Cmp,Att,Cmp%,Yds,TD,Int,Y/A,AY/A,Rate,
 111,111,17,18,2025-01-05,BUF,@,NWE,L 16-23,*,0,0,,0,0,0,,,,0,0,0,0,0,,0,0,0,,0,,,0.0,0,0,0,0,0,0,0,0,0,0,0,0,1,1.5,0,0.0,0,0.0
 ,,,,,,,,76-35,,2296,3628,63.3,26434,195,84,7.3,7.32,93.4,189,1150,759,4142,65,5.5,2,1,19,19.0,2,50.0,9.5,0.0,4,4,0,0,0,0,64,26,0,16,-27,0,7058,94.5,0,0.0,0,0.0'''
 
-# Convert to DataFrame, skip the first row/headers
-df = pd.read_csv(io.StringIO(raw_data), skiprows=1)
+# Clean team abbreviations to current formats
+team_map = {
+    "SFO": "SF",
+    "NWE": "NE",
+    "LVR": "LV",
+    "OAK": "LV",
+    "TAM": "TB",
+    "NOR": "NO",
+    "GNB": "GB",
+    "KAN": "KC",
+}
 
 # Select essential columns
 columns_to_keep = ['Rk', 'Gcar', 'Gtm', 'Week', 'Date', 'Team', 'Opp', 'GS', 'Cmp', 'Att', 
                    'Cmp%', 'Yds', 'TD', 'Int', 'Y/A', 'AY/A', 'Rate', 'Sk', 'Yds.1', 
                    'Att.1', 'Yds.2', 'TD.1', 'Y/A.1', 'Fmb']
-
-#Keep only essential columns and rename for clarity
-df_clean = df[columns_to_keep].copy()
-df_clean.columns = ['Rank', 'Game_Career', 'Game_Team', 'Week', 'Date', 'Team', 'Opponent', 'GS',
-                    'Completions', 'Attempts', 'Completion_Pct', 'Pass_Yds', 'Pass_TD', 'INT',
-                    'Yards_per_Attempt', 'Adj_Yards_per_Attempt', 'Passer_Rating', 'Sacks',
-                    'Sack_Yards', 'Rush_Att', 'Rush_Yds', 'Rush_TD', 'Yards_per_Rush', 'Fumbles']
-df_clean = df_clean[pd.to_numeric(df_clean['Week'], errors='coerce').notna()]
-
-# Convert numeric columns to proper types
+clean_columns = ['Rank', 'Game_Career', 'Game_Team', 'Week', 'Date', 'Team', 'Opponent', 'GS',
+                 'Completions', 'Attempts', 'Completion_Pct', 'Pass_Yds', 'Pass_TD', 'INT',
+                 'Yards_per_Attempt', 'Adj_Yards_per_Attempt', 'Passer_Rating', 'Sacks',
+                 'Sack_Yards', 'Rush_Att', 'Rush_Yds', 'Rush_TD', 'Yards_per_Rush', 'Fumbles']
 numeric_cols = ['Rank', 'Game_Career', 'Game_Team', 'Week', 'Completions', 'Attempts', 
                 'Completion_Pct', 'Pass_Yds', 'Pass_TD', 'INT', 'Yards_per_Attempt',
                 'Adj_Yards_per_Attempt', 'Passer_Rating', 'Sacks', 'Sack_Yards',
                 'Rush_Att', 'Rush_Yds', 'Rush_TD', 'Yards_per_Rush', 'Fumbles']
 
-for col in numeric_cols:
-    df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+def clean_game_logs(raw_data: str, qb_name: str) -> pd.DataFrame:
+    """Clean a Pro-Football-Reference game log export into one row per game"""
+    # Convert to DataFrame, skip the first row/headers
+    df = pd.read_csv(io.StringIO(raw_data), skiprows=1)
 
-# Calculate fantasy points (PPR scoring)
-df_clean['Fantasy_Points'] = (
-    (df_clean['Pass_Yds'] / 25) + 
-    (df_clean['Pass_TD'] * 4) + 
-    (df_clean['Rush_Yds'] / 10) + 
-    (df_clean['Rush_TD'] * 6) - 
-    (df_clean['INT'] * 2) - 
-    (df_clean['Fumbles'] * 2)
-)
+    #Keep only essential columns and rename for clarity
+    df_clean = df[columns_to_keep].copy()
+    df_clean.columns = clean_columns
+    df_clean = df_clean[pd.to_numeric(df_clean['Week'], errors='coerce').notna()]
 
-# Clean team abbreviations to current formats
-team_map = {
-    "SFO": "SF",
-    "NWE": "NE",
-    "LVR": "LV",
-    "OAK": "LV",
-    "TAM": "TB",
-    "NOR": "NO",
-    "GNB": "GB",
-    "KAN": "KC",
-}
-df_clean['Opponent'] = df_clean['Opponent'].replace(team_map)
-df_clean['Team'] = df_clean['Team'].replace(team_map)
+    # Convert numeric columns to proper types
+    for col in numeric_cols:
+        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
+
+    # Calculate fantasy points with the standard profile from scoring.py
+    df_clean['Fantasy_Points'] = score_games(df_clean, ['standard'])['standard']
+
+    # Clean team abbreviations to current formats
+    df_clean['Opponent'] = df_clean['Opponent'].replace(team_map)
+    df_clean['Team'] = df_clean['Team'].replace(team_map)
+
+    # Add Season column
+    df_clean['Date'] = pd.to_datetime(df_clean['Date'], errors='coerce')
+    df_clean['Season'] = df_clean['Date'].dt.year
 
-# Add Season column
-df_clean['Date'] = pd.to_datetime(df_clean['Date'], errors='coerce')
-df_clean['Season'] = df_clean['Date'].dt.year
+    # Add QB name
+    df_clean['QB'] = qb_name
+    return df_clean
 
-# Add QB name
-df_clean['QB'] = qb_name
+if __name__ == "__main__":
+    df_clean = clean_game_logs(raw_data, qb_name)
 
-# Save cleaned data to CSV
-filename = f"data/{qb_name.lower().replace(' ', '_')}_complete_game_logs.csv"
-df_clean.to_csv(filename, index=False)
-print(f"saved {len(df_clean)} games to {filename}")
\ No newline at end of file
+    # Save cleaned data to CSV
+    filename = f"data/{qb_name.lower().replace(' ', '_')}_complete_game_logs.csv"
+    df_clean.to_csv(filename, index=False)
+    print(f"saved {len(df_clean)} games to {filename}")
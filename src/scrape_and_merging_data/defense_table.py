@@ -0,0 +1,131 @@
+'''
+Per game defense stats as one dense (season x team x stat) array.
+
+Games in season N use the defense's season N-1 stats from def_vs_qb_stats.csv.
+A team missing from a season falls back to that season's league average.
+Stats the site left empty stay NaN, as do seasons without a previous season
+in the table.
+'''
+
+import argparse
+import numpy as np
+import pandas as pd
+
+# Per game stat, and the def_vs_qb_stats.csv column it comes from
+DEFENSE_STATS = {
+    "Def_Cmp_Allowed_pg": "Passing Cmp",
+    "Def_Att_Allowed_pg": "Passing Att",
+    "Def_PassYds_Allowed_pg": "Passing Yds",
+    "Def_PassTD_Allowed_pg": "Passing TD",
+    "Def_INT_Forced_pg": "Passing Int",
+    "Def_RushAtt_Allowed_pg": "Rushing Att",
+    "Def_RushYds_Allowed_pg": "Rushing Yds",
+    "Def_RushTD_Allowed_pg": "Rushing TD",
+    "Def_Sacks_pg": "Sk",
+    "Def_2PP_Allowed_pg": "2PP",
+    "Def_FantasyPts_Allowed_pg": "Fantasy per Game FantPt"
+}
+# Columns that are already per game on the site
+PER_GAME_SOURCES = {"Fantasy per Game FantPt"}
+
+class DefenseTable:
+    """Defense stats for every (season played, team), looked up with one gather"""
+
+    def __init__(self, first_season: int, teams: list, stats: list, values: np.ndarray):
+        """
+        values: (seasons + 1, teams + 1, stats) float64. The extra team row of each season is
+        its league average and the extra season is all NaN, for lookups outside the table.
+        """
+        self.first_season = first_season
+        self.teams = list(teams)
+        self.stats = list(stats)
+        self.values = values
+        self.team_index = pd.Index(self.teams)
+
+    @property
+    def n_seasons(self) -> int:
+        return self.values.shape[0] - 1
+
+    @classmethod
+    def from_stats(cls, defense: pd.DataFrame, lag: int = 1) -> "DefenseTable":
+        """Build the table from def_vs_qb_stats.csv rows, keyed by the season the stats are used in"""
+        games = pd.to_numeric(defense["G"], errors="coerce").to_numpy(dtype=np.float64)
+        games[games == 0] = np.nan
+        per_game = np.column_stack([
+            pd.to_numeric(defense[source], errors="coerce").to_numpy(dtype=np.float64)
+            if source in PER_GAME_SOURCES
+            else pd.to_numeric(defense[source], errors="coerce").to_numpy(dtype=np.float64) / games
+            for source in DEFENSE_STATS.values()
+        ])
+
+        seasons = defense["Season"].to_numpy(dtype=np.int64) + lag
+        team_codes, teams = pd.factorize(defense["Tm"].str.replace('@', ''), sort=True)
+        first_season = int(seasons.min())
+        n_seasons = int(seasons.max()) - first_season + 1
+
+        values = np.full((n_seasons + 1, len(teams) + 1, len(DEFENSE_STATS)), np.nan)
+        values[seasons - first_season, team_codes] = per_game
+
+        # League averages of every season with data, used for teams missing from it.
+        # Averaged over the rows in file order, as merge_2025_stats.py did
+        for i in np.unique(seasons - first_season):
+            present = np.zeros(len(teams) + 1, dtype=bool)
+            present[team_codes[seasons - first_season == i]] = True
+            values[i, ~present] = pd.DataFrame(per_game[seasons - first_season == i]).mean().to_numpy()
+        return cls(first_season, list(teams), list(DEFENSE_STATS), values)
+
+    @classmethod
+    def from_csv(cls, defense_file: str = "data/def_vs_qb_stats.csv", lag: int = 1) -> "DefenseTable":
+        return cls.from_stats(pd.read_csv(defense_file), lag)
+
+    def indices(self, seasons, teams) -> tuple[np.ndarray, np.ndarray]:
+        """Season and team positions of each game, the fallback slots when they are not in the table"""
+        season_idx = np.asarray(seasons, dtype=np.float64) - self.first_season
+        outside = np.isnan(season_idx) | (season_idx < 0) | (season_idx >= self.n_seasons)
+        season_idx = np.where(outside, self.n_seasons, season_idx).astype(np.int64)
+        # Match the few distinct opponent codes, then spread their positions over the games
+        codes, uniques = pd.factorize(np.asarray(teams, dtype=object))
+        unique_idx = self.team_index.get_indexer(pd.Index(uniques, dtype=object).str.replace('@', ''))
+        unique_idx[unique_idx < 0] = len(self.teams)
+        team_idx = np.where(codes < 0, len(self.teams), unique_idx[codes])
+        return season_idx, team_idx
+
+    def lookup(self, seasons, teams) -> np.ndarray:
+        """(games, stats) defense stats for games given by the season played and the opponent"""
+        season_idx, team_idx = self.indices(seasons, teams)
+        return self.values[season_idx, team_idx]
+
+    def league_average(self, season: int) -> np.ndarray:
+        """Average defense stats for games played in season"""
+        season_idx, _ = self.indices([season], [])
+        return self.values[season_idx[0], -1]
+
+    def known_teams(self, teams) -> np.ndarray:
+        """Which opponents have their own row rather than the league average"""
+        _, team_idx = self.indices(np.full(len(teams), self.first_season), teams)
+        return team_idx < len(self.teams)
+
+    def attach(self, games: pd.DataFrame, season_col: str = "Season", team_col: str = "Opponent") -> pd.DataFrame:
+        """games with one column per defense stat appended"""
+        looked_up = self.lookup(games[season_col].to_numpy(), games[team_col].to_numpy())
+        return pd.concat([games, pd.DataFrame(looked_up, index=games.index, columns=self.stats)], axis=1)
+
+    def save(self, table_file: str) -> None:
+        np.savez(table_file, values=self.values, first_season=self.first_season,
+                 teams=np.array(self.teams), stats=np.array(self.stats))
+
+    @classmethod
+    def load(cls, table_file: str) -> "DefenseTable":
+        with np.load(table_file) as bundle:
+            return cls(int(bundle["first_season"]), bundle["teams"].tolist(), bundle["stats"].tolist(), bundle["values"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the per game defense table from def_vs_qb_stats.csv")
+    parser.add_argument("--defense-file", default="data/def_vs_qb_stats.csv")
+    parser.add_argument("--output", default="data/defense_table.npz")
+    args = parser.parse_args()
+
+    table = DefenseTable.from_csv(args.defense_file)
+    table.save(args.output)
+    print(f"Saved {table.n_seasons} seasons x {len(table.teams)} teams x {len(table.stats)} stats "
+          f"(seasons {table.first_season}-{table.first_season + table.n_seasons - 1}) to '{args.output}'")
@@ -0,0 +1,168 @@
+'''
+Shared HTTP fetch layer for the scrapers.
+
+One pooled requests session with retries and backoff, a per host minimum
+interval between requests, and an on-disk cache of raw responses that is
+revalidated with ETag / Last-Modified. In replay mode pages come from the
+cache only and the network is never touched.
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/115.0 Safari/537.36"
+)
+
+class FetchError(Exception):
+    """A page that could not be fetched, or is not cached in replay mode"""
+
+class RateLimiter:
+    """Spaces out request starts to the same host by at least min_interval seconds"""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.next_start = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host: str) -> None:
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start.get(host, now))
+            self.next_start[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+class Fetcher:
+    """Cached, rate limited GETs that can run concurrently"""
+
+    def __init__(self, cache_dir: str = "data/http_cache", replay: bool = False, max_workers: int = 4,
+                 min_interval: float = 1.0, retries: int = 3, backoff: float = 1.0, timeout: float = 30.0,
+                 max_age: float | None = None, headers: dict | None = None):
+        """
+        replay: serve every page from cache_dir and fail on a miss instead of going to the network
+        min_interval: seconds between two requests to the same host
+        retries, backoff: retry failed connections and 429/5xx answers, sleeping backoff * 2**n between tries
+        max_age: seconds a cached page is used without asking the server, None always revalidates
+        """
+        self.cache_dir = cache_dir
+        self.replay = replay
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_age = max_age
+        self.rate_limiter = RateLimiter(min_interval)
+        self.stats = {'network': 0, 'revalidated': 0, 'cached': 0}
+        self.stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9", **(headers or {})})
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",), respect_retry_after_header=True)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def cache_paths(self, url: str) -> tuple[str, str]:
+        """Body and metadata files of a cached url"""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.body"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def read_cache(self, url: str) -> tuple[bytes, dict] | None:
+        body_path, meta_path = self.cache_paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return f.read(), meta
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write_cache(self, url: str, body: bytes, meta: dict) -> None:
+        """Write body then metadata through temp files, a reader never sees a half written entry"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        body_path, meta_path = self.cache_paths(url)
+        for path, content in ((body_path, body), (meta_path, json.dumps(meta).encode())):
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+    def count(self, outcome: str) -> None:
+        with self.stats_lock:
+            self.stats[outcome] += 1
+
+    def fetch(self, url: str) -> str:
+        """Page text, from the cache when the server says it has not changed"""
+        cached = self.read_cache(url)
+        if self.replay:
+            if cached is None:
+                raise FetchError(f"{url} is not cached in {self.cache_dir}, run once without replay")
+            self.count('cached')
+            return self.decode(*cached)
+        if cached is not None and self.max_age is not None and time.time() - cached[1]['fetched_at'] < self.max_age:
+            self.count('cached')
+            return self.decode(*cached)
+
+        conditional = {}
+        if cached is not None:
+            if cached[1].get('etag'):
+                conditional["If-None-Match"] = cached[1]['etag']
+            if cached[1].get('last_modified'):
+                conditional["If-Modified-Since"] = cached[1]['last_modified']
+
+        self.rate_limiter.wait(urlsplit(url).netloc)
+        try:
+            response = self.session.get(url, headers=conditional, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise FetchError(f"{url}: {e}") from e
+
+        if response.status_code == 304 and cached is not None:
+            body, meta = cached
+            meta = {**meta, 'fetched_at': time.time()}
+            self.write_cache(url, body, meta)
+            self.count('revalidated')
+            return self.decode(body, meta)
+        if response.status_code != 200:
+            raise FetchError(f"{url}: HTTP {response.status_code}")
+
+        meta = {
+            'url': url,
+            'fetched_at': time.time(),
+            'etag': response.headers.get("ETag"),
+            'last_modified': response.headers.get("Last-Modified"),
+            'encoding': response.encoding or response.apparent_encoding
+        }
+        self.write_cache(url, response.content, meta)
+        self.count('network')
+        return self.decode(response.content, meta)
+
+    @staticmethod
+    def decode(body: bytes, meta: dict) -> str:
+        return body.decode(meta.get('encoding') or "utf-8", errors="replace")
+
+    def fetch_all(self, urls) -> dict:
+        """Fetch several pages across the worker threads, keyed by url, FetchError for the ones that failed"""
+        urls = list(dict.fromkeys(urls))
+
+        def fetch_one(url):
+            try:
+                return self.fetch(url)
+            except FetchError as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return dict(zip(urls, pool.map(fetch_one, urls)))
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,132 @@
+'''
+Ingest every QB in a roster manifest in one run.
+
+The manifest is a CSV with one row per QB:
+    qb      display name, e.g. Josh Allen
+    team    2025 team abbreviation as in nfl_schedule_2025.csv, e.g. BUF
+    source  path to the QB's raw Pro-Football-Reference game log export,
+            the same text clean_qb_data.py takes as raw_data
+    key     optional output file prefix, the lower-cased name with underscores by default
+
+Each QB goes through clean_qb_data -> merge_qb_and_defense_stats -> merge_2025_stats
+and ends up as data/<key>_complete_data.csv. The defense and schedule tables are
+read once and the QBs run across a process pool.
+'''
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from clean_qb_data import clean_game_logs
+from defense_table import DefenseTable
+from merge_qb_and_defense_stats import merge_defense
+from merge_2025_stats import combine_2025_data
+
+def load_manifest(manifest_file: str) -> list:
+    """Manifest rows as dicts with qb, team, source and key"""
+    manifest = pd.read_csv(manifest_file, dtype=str, skipinitialspace=True)
+    missing = {'qb', 'team', 'source'} - set(manifest.columns)
+    if missing:
+        raise ValueError(f"Manifest {manifest_file} is missing columns: {', '.join(sorted(missing))}")
+
+    entries = []
+    for row in manifest.to_dict("records"):
+        key = row.get('key')
+        if not isinstance(key, str) or not key:
+            key = row['qb'].lower().replace(' ', '_')
+        entries.append({'qb': row['qb'], 'team': row['team'], 'source': row['source'], 'key': key})
+
+    keys = [entry['key'] for entry in entries]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise ValueError(f"Manifest lists the same output more than once: {', '.join(duplicates)}")
+    return entries
+
+def load_shared_tables(data_dir: str = "data") -> dict:
+    """Defense and schedule tables every QB is merged with, prepared once"""
+    return {
+        'defense': DefenseTable.from_csv(os.path.join(data_dir, "def_vs_qb_stats.csv")),
+        'schedule_2025': pd.read_csv(os.path.join(data_dir, "nfl_schedule_2025.csv"))
+    }
+
+def ingest_qb(entry: dict, tables: dict, output_dir: str = "data", keep_intermediate: bool = False) -> dict:
+    """Run one QB's raw game logs through every step and write its *_complete_data.csv"""
+    start_time = time.perf_counter()
+    with open(entry['source']) as f:
+        raw_data = f.read()
+
+    # Each step hands the next one CSV text, as the per-QB scripts did through their files,
+    # so column types and the written output are the same
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        game_logs_csv = clean_game_logs(raw_data, entry['qb']).to_csv(index=False)
+        with_defense_csv = merge_defense(
+            pd.read_csv(io.StringIO(game_logs_csv)), tables['defense'], entry['qb']
+        ).to_csv(index=False)
+        combined_data = combine_2025_data(
+            entry['qb'], entry['team'], pd.read_csv(io.StringIO(with_defense_csv)),
+            tables['schedule_2025'], tables['defense']
+        )
+
+    outputs = {"complete_data": combined_data.to_csv(index=False)}
+    if keep_intermediate:
+        outputs["complete_game_logs"] = game_logs_csv
+        outputs["with_defense_pg"] = with_defense_csv
+    for suffix, text in outputs.items():
+        with open(os.path.join(output_dir, f"{entry['key']}_{suffix}.csv"), "w", newline="") as f:
+            f.write(text)
+
+    return {
+        'games': int((combined_data["Season"] != 2025).sum()),
+        'warnings': log.getvalue().strip(),
+        'seconds': time.perf_counter() - start_time
+    }
+
+def run_ingestion(manifest_file: str, data_dir: str = "data", output_dir: str = "data",
+                  workers: int | None = None, keep_intermediate: bool = False) -> dict:
+    """Ingest every manifest QB across a process pool, returns each QB's summary or exception"""
+    entries = load_manifest(manifest_file)
+    if not entries:
+        raise ValueError(f"No QBs listed in {manifest_file}")
+    tables = load_shared_tables(data_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(entries)))
+    print(f"Ingesting {len(entries)} QBs with {workers} workers")
+
+    start_time = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(ingest_qb, entry, tables, output_dir, keep_intermediate): entry for entry in entries}
+        for done, future in enumerate(as_completed(futures), start=1):
+            entry = futures[future]
+            try:
+                results[entry['key']] = future.result()
+                print(f"[{done}/{len(futures)}] {entry['qb']} ({entry['team']}): "
+                      f"{results[entry['key']]['games']} games in {results[entry['key']]['seconds']:.2f}s")
+                if results[entry['key']]['warnings']:
+                    print(results[entry['key']]['warnings'])
+            except Exception as e:
+                results[entry['key']] = e
+                print(f"[{done}/{len(futures)}] {entry['qb']} FAILED: {e}")
+
+    failed = [key for key, result in results.items() if isinstance(result, Exception)]
+    print(f"\nFinished in {time.perf_counter() - start_time:.1f}s, {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    if failed:
+        print(f"Failed QBs: {', '.join(sorted(failed))}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build *_complete_data.csv for every QB in a roster manifest")
+    parser.add_argument("manifest", help="CSV with qb, team, source and optional key columns")
+    parser.add_argument("--data-dir", default="data", help="where def_vs_qb_stats.csv and nfl_schedule_2025.csv are")
+    parser.add_argument("--output-dir", default="data", help="where the QB files are written")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    parser.add_argument("--keep-intermediate", action="store_true",
+                        help="also write the *_complete_game_logs.csv and *_with_defense_pg.csv steps")
+    args = parser.parse_args()
+
+    run_ingestion(args.manifest, args.data_dir, args.output_dir, args.workers, args.keep_intermediate)
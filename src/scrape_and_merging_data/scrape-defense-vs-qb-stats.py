@@ -1,46 +1,61 @@
-''' This script scrapes defense vs QB stats tables from Pro-Football-Reference.com for the 2017-2024 seasons. '''
+''' This script scrapes defense vs QB stats tables from Pro-Football-Reference.com for the 2016-2024 seasons. '''
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+import argparse
 from bs4 import BeautifulSoup, Comment
 import pandas as pd
-import time
 from io import StringIO
+from fetcher import Fetcher, FetchError
 
-urls = {
-    2016: "https://www.pro-football-reference.com/years/2016/fantasy-points-against-QB.htm",
-    2017: "https://www.pro-football-reference.com/years/2017/fantasy-points-against-QB.htm",
-    2018: "https://www.pro-football-reference.com/years/2018/fantasy-points-against-QB.htm",
-    2019: "https://www.pro-football-reference.com/years/2019/fantasy-points-against-QB.htm",
-    2020: "https://www.pro-football-reference.com/years/2020/fantasy-points-against-QB.htm",
-    2021: "https://www.pro-football-reference.com/years/2021/fantasy-points-against-QB.htm",
-    2022: "https://www.pro-football-reference.com/years/2022/fantasy-points-against-QB.htm",
-    2023: "https://www.pro-football-reference.com/years/2023/fantasy-points-against-QB.htm",
-    2024: "https://www.pro-football-reference.com/years/2024/fantasy-points-against-QB.htm"
+BASE_URL = "https://www.pro-football-reference.com"
+SEASONS = range(2016, 2025)
+
+# convert team names to abbrevs
+team_map = {
+    "Arizona Cardinals": "ARI",
+    "Atlanta Falcons": "ATL",
+    "Baltimore Ravens": "BAL",
+    "Buffalo Bills": "BUF",
+    "Carolina Panthers": "CAR",
+    "Chicago Bears": "CHI",
+    "Cincinnati Bengals": "CIN",
+    "Cleveland Browns": "CLE",
+    "Dallas Cowboys": "DAL",
+    "Denver Broncos": "DEN",
+    "Detroit Lions": "DET",
+    "Green Bay Packers": "GB",
+    "Houston Texans": "HOU",
+    "Indianapolis Colts": "IND",
+    "Jacksonville Jaguars": "JAX",  
+    "Kansas City Chiefs": "KC",
+    "Las Vegas Raiders": "LV",
+    "Oakland Raiders": "LV",            
+    "Los Angeles Chargers": "LAC",
+    "San Diego Chargers": "LAC",        
+    "Los Angeles Rams": "LAR",
+    "St. Louis Rams": "LAR",            
+    "Miami Dolphins": "MIA",
+    "Minnesota Vikings": "MIN",
+    "New England Patriots": "NE",
+    "New Orleans Saints": "NO",
+    "New York Giants": "NYG",
+    "New York Jets": "NYJ",
+    "Philadelphia Eagles": "PHI",
+    "Pittsburgh Steelers": "PIT",
+    "San Francisco 49ers": "SF",
+    "Seattle Seahawks": "SEA",
+    "Tampa Bay Buccaneers": "TB",
+    "Tennessee Titans": "TEN",
+    "Washington Redskins": "WAS",
+    "Washington Football Team": "WAS",
+    "Washington Commanders": "WAS"
 }
 
-# Set up Chrome browser options (runs in background, no gpu, no sandbox, user-agent)
-chrome_options = Options()
-chrome_options.add_argument("--headless")
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
-
-# Store ChromeDriver location and start the browser
-# NOTE: Update the path below to where chromedriver.exe is located on your system.
-service = Service("C:/Users/User/Documents/GitHub/ML-Fantasy-QB-Predictor/src/chromedriver.exe")
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-# Store dataframes for each year in dfs list
-dfs = []
-# Loop through each year and scrape the table
-for year, url in urls.items():
-    print(f"\n--- {year} ---")
-    driver.get(url) # open the URL
-    time.sleep(3)  # wait for the page to load
-
-    html = driver.page_source # get page html
+def season_urls(seasons=SEASONS, base_url: str = BASE_URL) -> dict:
+    """Fantasy points against QB page of every season"""
+    return {year: f"{base_url}/years/{year}/fantasy-points-against-QB.htm" for year in seasons}
+
+def parse_defense_table(html: str, year: int) -> pd.DataFrame | None:
+    """The fantasy_def table of one season page, None when the page has no such table"""
     soup = BeautifulSoup(html, "lxml") # parse
 
     # Find the fantasy defense table by its ID
@@ -53,89 +68,80 @@ for year, url in urls.items():
             table = comment_soup.find("table", {"id": "fantasy_def"})
             if table:
                 break
+    if not table:
+        return None
 
-    if table:
-        #convert table to pandas dataframe
-        df = pd.read_html(StringIO(str(table)))[0]
-        
-        # Clean up columns
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = ['_'.join(col).strip() if 'Unnamed' not in col[0] else col[1] 
-                         for col in df.columns.values]
-            df.columns = [col.replace('_', ' ').strip() for col in df.columns]
-        
-        df["Season"] = year # add year column
-        
-        # Remove all header rows from data 
-        if 'Tm' in df.columns:
-            # Remove rows where 'Tm' column contains header-like values
-            df = df[~df['Tm'].isin(['Tm', 'Team', 'Passing', 'Rushing', 'Fantasy'])]
-            numeric_cols = ['G', 'Cmp', 'Att', 'Yds', 'TD', 'Int', 'Att.1', 'Yds.1', 'TD.1']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df = df[pd.to_numeric(df[col], errors='coerce').notna()]
-        
-        dfs.append(df) # save table in list
-        print(f"Table extracted for {year}, shape: {df.shape}")
-    else:
-        print(f"No table found for {year}")
+    #convert table to pandas dataframe
+    df = pd.read_html(StringIO(str(table)))[0]
+
+    # Clean up columns
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = ['_'.join(col).strip() if 'Unnamed' not in col[0] else col[1] 
+                     for col in df.columns.values]
+        df.columns = [col.replace('_', ' ').strip() for col in df.columns]
+
+    df["Season"] = year # add year column
+
+    # Remove all header rows from data 
+    if 'Tm' in df.columns:
+        # Remove rows where 'Tm' column contains header-like values
+        df = df[~df['Tm'].isin(['Tm', 'Team', 'Passing', 'Rushing', 'Fantasy'])]
+        numeric_cols = ['G', 'Cmp', 'Att', 'Yds', 'TD', 'Int', 'Att.1', 'Yds.1', 'TD.1']
+        for col in numeric_cols:
+            if col in df.columns:
+                df = df[pd.to_numeric(df[col], errors='coerce').notna()]
+    return df
 
-driver.quit()
+def scrape_defense_stats(fetcher: Fetcher, urls: dict) -> pd.DataFrame | None:
+    """Fetch every season page concurrently and combine their tables, None when none was found"""
+    pages = fetcher.fetch_all(urls.values())
 
-#combine all years into one big dataframe
-if dfs:
+    # Store dataframes for each year in dfs list
+    dfs = []
+    for year, url in urls.items():
+        print(f"\n--- {year} ---")
+        if isinstance(pages[url], FetchError):
+            print(f"Could not fetch {year}: {pages[url]}")
+            continue
+        df = parse_defense_table(pages[url], year)
+        if df is not None:
+            dfs.append(df) # save table in list
+            print(f"Table extracted for {year}, shape: {df.shape}")
+        else:
+            print(f"No table found for {year}")
+    if not dfs:
+        return None
+
+    #combine all years into one big dataframe
     all_def_vs_qb = pd.concat(dfs, ignore_index=True)
     # Drop repeated headers if present
     if "Tm" in all_def_vs_qb.columns:
         all_def_vs_qb = all_def_vs_qb[all_def_vs_qb["Tm"] != "Tm"].reset_index(drop=True)
-    print(all_def_vs_qb.head(10))
-
 
     # convert team names to abbrevs
-    team_map = {
-        "Arizona Cardinals": "ARI",
-        "Atlanta Falcons": "ATL",
-        "Baltimore Ravens": "BAL",
-        "Buffalo Bills": "BUF",
-        "Carolina Panthers": "CAR",
-        "Chicago Bears": "CHI",
-        "Cincinnati Bengals": "CIN",
-        "Cleveland Browns": "CLE",
-        "Dallas Cowboys": "DAL",
-        "Denver Broncos": "DEN",
-        "Detroit Lions": "DET",
-        "Green Bay Packers": "GB",
-        "Houston Texans": "HOU",
-        "Indianapolis Colts": "IND",
-        "Jacksonville Jaguars": "JAX",  
-        "Kansas City Chiefs": "KC",
-        "Las Vegas Raiders": "LV",
-        "Oakland Raiders": "LV",            
-        "Los Angeles Chargers": "LAC",
-        "San Diego Chargers": "LAC",        
-        "Los Angeles Rams": "LAR",
-        "St. Louis Rams": "LAR",            
-        "Miami Dolphins": "MIA",
-        "Minnesota Vikings": "MIN",
-        "New England Patriots": "NE",
-        "New Orleans Saints": "NO",
-        "New York Giants": "NYG",
-        "New York Jets": "NYJ",
-        "Philadelphia Eagles": "PHI",
-        "Pittsburgh Steelers": "PIT",
-        "San Francisco 49ers": "SF",
-        "Seattle Seahawks": "SEA",
-        "Tampa Bay Buccaneers": "TB",
-        "Tennessee Titans": "TEN",
-        "Washington Redskins": "WAS",
-        "Washington Football Team": "WAS",
-        "Washington Commanders": "WAS"
-    }
     all_def_vs_qb["Tm"] = all_def_vs_qb["Tm"].map(team_map)
+    return all_def_vs_qb
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape defense vs QB stats from Pro-Football-Reference")
+    parser.add_argument("--output", default="def_vs_qb_stats.csv")
+    parser.add_argument("--cache-dir", default="data/http_cache", help="where raw pages are cached")
+    parser.add_argument("--replay", action="store_true", help="parse the cached pages only, without the network")
+    parser.add_argument("--workers", type=int, default=3, help="pages fetched at once")
+    parser.add_argument("--min-interval", type=float, default=3.0, help="seconds between requests to the site")
+    parser.add_argument("--base-url", default=BASE_URL, help="site to fetch from, e.g. a local stub server")
+    args = parser.parse_args()
 
-    # save csv
-    all_def_vs_qb.to_csv("def_vs_qb_stats.csv", index=False)
-    print("saved to csv")
-    
-else:
-    print("No tables extracted.")
\ No newline at end of file
+    fetcher = Fetcher(args.cache_dir, replay=args.replay, max_workers=args.workers, min_interval=args.min_interval)
+    all_def_vs_qb = scrape_defense_stats(fetcher, season_urls(base_url=args.base_url))
+    fetcher.close()
+    print(f"\nPages: {fetcher.stats}")
+
+    if all_def_vs_qb is not None:
+        print(all_def_vs_qb.head(10))
+
+        # save csv
+        all_def_vs_qb.to_csv(args.output, index=False)
+        print("saved to csv")
+    else:
+        print("No tables extracted.")
@@ -0,0 +1,140 @@
+'''
+Stream large Pro-Football-Reference game log exports into per QB game log files.
+
+Takes export files, or directories of them, with one player's games or many
+players' (a Player column, as in the game finder). Each file is read in chunks
+with every column as text, then cleaned chunk by chunk into compact dtypes and
+appended to data/<qb>_complete_game_logs.csv, so memory stays bounded by the
+chunk size however long the dumps are. The columns are the same ones
+clean_qb_data.py keeps.
+'''
+
+import argparse
+import csv
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+# clean_qb_data.py sits next to this file and scoring.py one directory up in src/
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from clean_qb_data import columns_to_keep, clean_columns, team_map
+from scoring import score_games
+
+# Smallest dtype that holds every cleaned column
+GAME_LOG_DTYPES = {
+    'Rank': 'Int16', 'Game_Career': 'Int16', 'Game_Team': 'Int16', 'Week': 'Int16',
+    'Team': 'category', 'Opponent': 'category', 'GS': 'category',
+    'Completions': 'Int16', 'Attempts': 'Int16', 'Completion_Pct': 'float32',
+    'Pass_Yds': 'Int16', 'Pass_TD': 'Int16', 'INT': 'Int16',
+    'Yards_per_Attempt': 'float32', 'Adj_Yards_per_Attempt': 'float32', 'Passer_Rating': 'float32',
+    'Sacks': 'Int16', 'Sack_Yards': 'Int16', 'Rush_Att': 'Int16', 'Rush_Yds': 'Int16',
+    'Rush_TD': 'Int16', 'Yards_per_Rush': 'float32', 'Fumbles': 'Int16'
+}
+DUMP_EXTENSIONS = (".csv", ".txt")
+
+def find_dumps(sources: list) -> list:
+    """Export files named directly or found in the given directories"""
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            files += sorted(os.path.join(source, name) for name in os.listdir(source)
+                            if name.endswith(DUMP_EXTENSIONS))
+        elif os.path.isfile(source):
+            files.append(source)
+        else:
+            raise FileNotFoundError(f"No game log export at {source}")
+    return files
+
+def read_header(dump_file: str) -> tuple[int, list]:
+    """Rows before the column names, and the names as pandas numbers repeats (Yds, Yds.1, ...)"""
+    with open(dump_file, newline="") as f:
+        first_rows = [row for _, row in zip(range(2), csv.reader(f))]
+    # Exports copied from the site start with a Passing/Rushing/... group row
+    skip = 0 if first_rows and "Week" in first_rows[0] else 1
+    names = pd.read_csv(dump_file, skiprows=skip, nrows=0).columns.tolist()
+    missing = [col for col in columns_to_keep if col not in names]
+    if missing:
+        raise ValueError(f"{dump_file} is missing game log columns: {', '.join(missing)}")
+    return skip, names
+
+def qb_from_filename(dump_file: str) -> str:
+    """josh_allen.csv -> Josh Allen, for single player exports without a Player column"""
+    stem = os.path.splitext(os.path.basename(dump_file))[0]
+    return stem.replace('_', ' ').replace('-', ' ').title()
+
+def map_teams(teams: pd.Series) -> pd.Categorical:
+    """Current team abbreviations, the map applied once per distinct code"""
+    codes, uniques = pd.factorize(teams)
+    # a trailing None so the -1 code of missing values gathers a missing value
+    mapped = np.array([team_map.get(team, team) for team in uniques] + [None], dtype=object)
+    return pd.Categorical(mapped[codes])
+
+def clean_chunk(chunk: pd.DataFrame, qb_name: str | None = None) -> pd.DataFrame:
+    """Clean one chunk of raw text rows into one typed row per game"""
+    # Repeated header rows and the career/season totals rows have no week number
+    week = pd.to_numeric(chunk['Week'], errors='coerce')
+    chunk = chunk[week.notna()]
+
+    df_clean = pd.DataFrame(index=chunk.index)
+    for raw, col in zip(columns_to_keep, clean_columns):
+        if col == 'Date':
+            df_clean[col] = pd.to_datetime(chunk[raw], errors='coerce')
+        elif col in ('Team', 'Opponent'):
+            df_clean[col] = map_teams(chunk[raw])
+        elif GAME_LOG_DTYPES[col] == 'category':
+            df_clean[col] = chunk[raw].astype('category')
+        else:
+            df_clean[col] = pd.to_numeric(chunk[raw], errors='coerce').astype(GAME_LOG_DTYPES[col])
+
+    # Calculate fantasy points with the standard profile from scoring.py
+    df_clean['Fantasy_Points'] = score_games(df_clean, ['standard'])['standard']
+    df_clean['Season'] = df_clean['Date'].dt.year.astype('Int16')
+
+    if 'Player' in chunk.columns:
+        # The site marks Pro Bowl and All-Pro players with * and +
+        df_clean['QB'] = chunk['Player'].str.rstrip('*+ ').astype('category')
+    else:
+        df_clean['QB'] = pd.Categorical([qb_name] * len(df_clean))
+    return df_clean
+
+def stream_game_logs(dump_file: str, chunksize: int = 50000, qb_name: str | None = None):
+    """Yield the cleaned games of one export, chunksize raw rows at a time"""
+    skip, names = read_header(dump_file)
+    usecols = columns_to_keep + (['Player'] if 'Player' in names else [])
+    qb_name = qb_name or qb_from_filename(dump_file)
+    reader = pd.read_csv(dump_file, skiprows=skip + 1, header=None, names=names, usecols=usecols,
+                         dtype=str, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            yield clean_chunk(chunk, qb_name)
+
+def ingest_dumps(sources: list, output_dir: str = "data", chunksize: int = 50000) -> dict:
+    """Append every export's games to <qb>_complete_game_logs.csv per QB, returns games written per file"""
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    for dump_file in find_dumps(sources):
+        start_time = time.perf_counter()
+        games = 0
+        for games_chunk in stream_game_logs(dump_file, chunksize):
+            for qb, qb_games in games_chunk.groupby('QB', observed=True, sort=False):
+                filename = os.path.join(output_dir, f"{qb.lower().replace(' ', '_')}_complete_game_logs.csv")
+                # The first chunk of a QB in this run replaces any earlier file
+                first = filename not in written
+                qb_games.to_csv(filename, mode="w" if first else "a", header=first, index=False)
+                written[filename] = written.get(filename, 0) + len(qb_games)
+            games += len(games_chunk)
+        print(f"{dump_file}: {games} games in {time.perf_counter() - start_time:.2f}s")
+    return written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean Pro-Football-Reference game log exports in bounded memory")
+    parser.add_argument("sources", nargs="+", help="export files, or directories of .csv/.txt exports")
+    parser.add_argument("--output-dir", default="data", help="where the *_complete_game_logs.csv files are written")
+    parser.add_argument("--chunksize", type=int, default=50000, help="raw rows read at a time")
+    args = parser.parse_args()
+
+    written = ingest_dumps(args.sources, args.output_dir, args.chunksize)
+    print(f"\nWrote {sum(written.values())} games for {len(written)} QBs")
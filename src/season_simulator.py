@@ -0,0 +1,249 @@
+'''
+Monte Carlo season simulator on top of the weekly point predictions.
+
+Each QB's weekly errors are modelled from the walk-forward backtest baseline
+(backtest.py) as normal with the QB's own spread and an AR(1) correlation
+between consecutive games, both shrunk toward the league-wide values for QBs
+with few backtested games. Every QB's season paths are drawn together: one
+batch of standard normals per QB from its own seeded generator, correlated
+with a batched Cholesky factor and scaled in a single array expression.
+The simulated paths are centred on the predictions, the backtest's bias is
+not added back. A single week's points are exactly normal under this model, so
+weekly percentiles and boom/bust chances are computed in closed form and the
+draws are used for everything that spans weeks or QBs.
+
+Only numpy is needed so the web app can import it without pandas.
+'''
+
+import argparse
+import json
+import math
+import os
+import time
+import zlib
+import numpy as np
+
+# Standard scoring QB weeks that count as a boom or a bust
+BOOM_POINTS = 25.0
+BUST_POINTS = 10.0
+PERCENTILES = (10, 25, 50, 75, 90)
+# Standard normal quantiles of PERCENTILES
+NORMAL_QUANTILES = np.array([-1.2815515655446004, -0.6744897501960817, 0.0, 0.6744897501960817, 1.2815515655446004])
+
+class ResidualModel:
+    """Spread and week to week correlation of each QB's prediction errors"""
+
+    def __init__(self, params: dict, league: tuple):
+        """params maps a QB to (sigma, rho, games), league is the (sigma, rho) used for QBs not in params"""
+        self.params = params
+        self.league = league
+
+    @classmethod
+    def from_baseline(cls, baseline: dict, prior_games: float = 20.0, name_of=None) -> "ResidualModel":
+        """
+        Fit from the folds of a backtest baseline. prior_games is how many games the league
+        values count for when they are blended with a QB's own, name_of renames the QB keys.
+        """
+        residuals = {}
+        for fold in baseline['folds']:
+            # Folds are one QB season each, with rows in game order
+            errors = np.array([row['actual'] - row['predicted'] for row in fold['rows']], dtype=np.float64)
+            residuals.setdefault(fold['qb'], []).append(errors)
+        if not residuals:
+            raise ValueError("The baseline has no backtested games to fit residuals from")
+
+        def moments(seasons):
+            errors = np.concatenate(seasons)
+            centered = [season - errors.mean() for season in seasons]
+            variance = np.mean(errors ** 2) - errors.mean() ** 2
+            lagged = sum(float(np.dot(season[:-1], season[1:])) for season in centered)
+            pairs = sum(len(season) - 1 for season in centered)
+            return variance, lagged / pairs / variance if pairs and variance > 0 else 0.0, len(errors), pairs
+
+        league_variance, league_rho, _, _ = moments([season for seasons in residuals.values() for season in seasons])
+        params = {}
+        for qb, seasons in residuals.items():
+            variance, rho, games, pairs = moments(seasons)
+            variance = (games * variance + prior_games * league_variance) / (games + prior_games)
+            rho = (pairs * rho + prior_games * league_rho) / (pairs + prior_games)
+            params[name_of(qb) if name_of else qb] = (float(np.sqrt(variance)), float(np.clip(rho, -0.9, 0.9)), games)
+        return cls(params, (float(np.sqrt(league_variance)), float(np.clip(league_rho, -0.9, 0.9))))
+
+    @classmethod
+    def load(cls, baseline_file: str = "data/backtest/baseline.json", **options) -> "ResidualModel":
+        with open(baseline_file) as f:
+            return cls.from_baseline(json.load(f), **options)
+
+    def lookup(self, qbs: list) -> tuple[np.ndarray, np.ndarray]:
+        """sigma and rho arrays for the QBs, the league values for ones without backtested games"""
+        fitted = [self.params.get(qb, self.league) for qb in qbs]
+        return np.array([fit[0] for fit in fitted]), np.array([fit[1] for fit in fitted])
+
+def ar1_cholesky(rho: np.ndarray, bye_mask: np.ndarray) -> np.ndarray:
+    """(qbs, weeks, weeks) Cholesky factors of rho ** games apart, bye weeks uncorrelated with the rest"""
+    games = np.cumsum(~bye_mask, axis=1)
+    corr = rho[:, None, None] ** np.abs(games[:, :, None] - games[:, None, :])
+    played = ~bye_mask[:, :, None] & ~bye_mask[:, None, :]
+    corr = np.where(played, corr, 0.0)
+    corr[:, np.arange(bye_mask.shape[1]), np.arange(bye_mask.shape[1])] = 1.0
+    return np.linalg.cholesky(corr)
+
+def normal_cdf(x: np.ndarray) -> np.ndarray:
+    return 0.5 * (1.0 + np.vectorize(math.erf, otypes=[np.float64])(np.asarray(x) / math.sqrt(2.0)))
+
+def qb_generator(seed: int, qb: str) -> np.random.Generator:
+    """Generator for one QB, so its paths do not depend on which other QBs are simulated"""
+    return np.random.default_rng([seed, zlib.crc32(qb.encode())])
+
+class SeasonSimulation:
+    """Simulated weekly points, (qbs, sims, weeks), with the summaries built from them"""
+
+    def __init__(self, qbs: list, weeks: list, paths: np.ndarray, points: np.ndarray, sigma: np.ndarray,
+                 bye_mask: np.ndarray, seed: int):
+        """points and sigma give each week's normal marginal, paths the joint draws"""
+        self.qbs = list(qbs)
+        self.weeks = list(weeks)
+        self.paths = paths
+        self.points = np.asarray(points, dtype=np.float64)
+        self.sigma = np.where(bye_mask, 0.0, np.asarray(sigma, dtype=np.float64)[:, None])
+        self.bye_mask = bye_mask
+        self.seed = seed
+        self.totals = paths.sum(axis=2, dtype=np.float64)
+
+    @property
+    def n_sims(self) -> int:
+        return self.paths.shape[1]
+
+    def percentiles(self, q: tuple = PERCENTILES) -> tuple[np.ndarray, np.ndarray]:
+        """(qbs, len(q)) season total percentiles and (qbs, weeks, len(q)) weekly ones"""
+        season = np.percentile(self.totals, q, axis=1).T
+        quantiles = NORMAL_QUANTILES[[PERCENTILES.index(p) for p in q]]
+        weekly = self.points[:, :, None] + self.sigma[:, :, None] * quantiles
+        return season, weekly
+
+    def boom_bust(self, boom: float = BOOM_POINTS, bust: float = BUST_POINTS) -> dict:
+        """Per week boom and bust probabilities, and the expected boom and bust games per season"""
+        # Byes have no spread, their 0 points would otherwise count as busts
+        spread = np.where(self.bye_mask, 1.0, self.sigma)
+        weekly_boom = np.where(self.bye_mask, 0.0, 1.0 - normal_cdf((boom - self.points) / spread))
+        weekly_bust = np.where(self.bye_mask, 0.0, normal_cdf((bust - self.points) / spread))
+        return {
+            'weekly_boom': weekly_boom,
+            'weekly_bust': weekly_bust,
+            'season_booms': weekly_boom.sum(axis=1),
+            'season_busts': weekly_bust.sum(axis=1)
+        }
+
+    def prob_at_least(self, threshold: float) -> np.ndarray:
+        """Chance each QB's season total reaches threshold"""
+        return (self.totals >= threshold).mean(axis=1)
+
+    def head_to_head(self, week: int | None = None) -> np.ndarray:
+        """(qbs, qbs) chance the row QB outscores the column QB over the season or in one week, ties split"""
+        scores = self.totals if week is None else self.paths[:, :, self.weeks.index(week)]
+        wins = (scores[:, None, :] > scores[None, :, :]).mean(axis=2)
+        ties = (scores[:, None, :] == scores[None, :, :]).mean(axis=2)
+        return wins + ties / 2
+
+    def summary(self, boom: float = BOOM_POINTS, bust: float = BUST_POINTS, thresholds: tuple = ()) -> dict:
+        """JSON ready summary of every QB, with the chance of reaching each season total in thresholds"""
+        season, weekly = self.percentiles()
+        rates = self.boom_bust(boom, bust)
+        matchups = self.head_to_head()
+        reached = {threshold: self.prob_at_least(threshold) for threshold in thresholds}
+        result = {'sims': self.n_sims, 'seed': self.seed, 'boom_points': boom, 'bust_points': bust, 'qbs': {}}
+        for i, qb in enumerate(self.qbs):
+            result['qbs'][qb] = {
+                'mean': float(self.totals[i].mean()),
+                'percentiles': {f"p{p}": float(value) for p, value in zip(PERCENTILES, season[i])},
+                'boom_games': float(rates['season_booms'][i]),
+                'bust_games': float(rates['season_busts'][i]),
+                'at_least': {f"{threshold:g}": float(chance[i]) for threshold, chance in reached.items()},
+                'weeks': {
+                    week: None if self.bye_mask[i, j] else {
+                        **{f"p{p}": float(value) for p, value in zip(PERCENTILES, weekly[i, j])},
+                        'boom': float(rates['weekly_boom'][i, j]),
+                        'bust': float(rates['weekly_bust'][i, j])
+                    }
+                    for j, week in enumerate(self.weeks)
+                },
+                'head_to_head': {other: float(matchups[i, k]) for k, other in enumerate(self.qbs) if k != i}
+            }
+        return result
+
+def simulate_seasons(qbs: list, points: np.ndarray, bye_mask: np.ndarray, residuals: ResidualModel,
+                     n_sims: int = 20000, seed: int = 0, weeks: list | None = None) -> SeasonSimulation:
+    """
+    Draw n_sims seasons for every QB at once.
+    points and bye_mask are (qbs, weeks), the predicted points and which weeks are byes
+    """
+    points = np.asarray(points, dtype=np.float32)
+    bye_mask = np.asarray(bye_mask, dtype=bool)
+    sigma, rho = residuals.lookup(qbs)
+    chol = ar1_cholesky(rho, bye_mask).astype(np.float32)
+
+    noise = np.empty((len(qbs), n_sims, points.shape[1]), dtype=np.float32)
+    for i, qb in enumerate(qbs):
+        qb_generator(seed, qb).standard_normal(dtype=np.float32, out=noise[i])
+
+    # Correlate each QB's weeks with its own factor, then scale and centre on the predictions
+    paths = np.matmul(noise, chol.transpose(0, 2, 1))
+    paths *= np.where(bye_mask, 0.0, sigma[:, None]).astype(np.float32)[:, None, :]
+    paths += points[:, None, :]
+    return SeasonSimulation(qbs, weeks or list(range(1, points.shape[1] + 1)), paths, points, sigma, bye_mask, seed)
+
+def load_prediction_files(predictions_dir: str = "data/predictions", season_year: int = 2025,
+                          n_weeks: int = 18) -> tuple[list, np.ndarray, np.ndarray]:
+    """QB keys, (qbs, weeks) predicted points and bye mask from the *_<season>_predictions.csv files"""
+    import glob
+    import pandas as pd
+    suffix = f"_{season_year}_predictions.csv"
+    qbs, points, byes = [], [], []
+    for file_path in sorted(glob.glob(os.path.join(predictions_dir, f"*{suffix}"))):
+        predictions = pd.read_csv(file_path)
+        weekly = np.zeros(n_weeks)
+        bye = np.ones(n_weeks, dtype=bool)
+        # First prediction of each week counts, as on the site
+        for week, opponent, predicted in zip(predictions['Week'], predictions['Opponent'],
+                                             predictions['Predicted_Fantasy_Points']):
+            col = int(week) - 1
+            if 0 <= col < n_weeks and bye[col] and opponent != 'BYE':
+                weekly[col] = predicted
+                bye[col] = False
+        qbs.append(os.path.basename(file_path).replace(suffix, ""))
+        points.append(weekly)
+        byes.append(bye)
+    return qbs, np.array(points).reshape(len(qbs), n_weeks), np.array(byes, dtype=bool).reshape(len(qbs), n_weeks)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate every QB's season from the weekly predictions")
+    parser.add_argument("--baseline", default="data/backtest/baseline.json", help="backtest.py baseline the errors are fitted on")
+    parser.add_argument("--predictions-dir", default="data/predictions")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--sims", type=int, default=20000, help="seasons drawn per QB")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--boom", type=float, default=BOOM_POINTS, help="weekly points that count as a boom")
+    parser.add_argument("--bust", type=float, default=BUST_POINTS, help="weekly points below which a game is a bust")
+    parser.add_argument("--threshold", type=float, nargs="*", default=[], help="season totals to report the chance of reaching")
+    parser.add_argument("--output", default=None, help="write the full summary JSON here")
+    args = parser.parse_args()
+
+    residuals = ResidualModel.load(args.baseline)
+    qbs, points, bye_mask = load_prediction_files(args.predictions_dir, args.season)
+    start_time = time.perf_counter()
+    simulation = simulate_seasons(qbs, points, bye_mask, residuals, args.sims, args.seed)
+    summary = simulation.summary(args.boom, args.bust, tuple(args.threshold))
+    elapsed = time.perf_counter() - start_time
+
+    print(f"{args.sims} seasons for {len(qbs)} QBs in {elapsed:.2f}s (league sigma {residuals.league[0]:.2f}, "
+          f"rho {residuals.league[1]:.2f})\n")
+    print(f"{'QB':<18} {'mean':>6} {'p10':>6} {'p50':>6} {'p90':>6} {'booms':>6} {'busts':>6}"
+          + "".join(f" {'>=' + f'{threshold:g}':>7}" for threshold in args.threshold))
+    for qb, stats in sorted(summary['qbs'].items(), key=lambda item: -item[1]['mean']):
+        print(f"{qb:<18} {stats['mean']:6.1f} {stats['percentiles']['p10']:6.1f} {stats['percentiles']['p50']:6.1f} "
+              f"{stats['percentiles']['p90']:6.1f} {stats['boom_games']:6.2f} {stats['bust_games']:6.2f}"
+              + "".join(f" {chance:7.1%}" for chance in stats['at_least'].values()))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=1)
+        print(f"\nSummary saved to '{args.output}'")
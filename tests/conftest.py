@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+sys.path.insert(1, os.path.join(REPO_ROOT, "src", "scrape_and_merging_data"))
+
+@pytest.fixture(scope="session")
+def data_dir():
+    return os.path.join(REPO_ROOT, "data")
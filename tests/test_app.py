@@ -0,0 +1,223 @@
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import app
+from live_predictor import LivePredictor
+from qb_predictor import PooledQBFantasyPredictor, load_qb_data_files
+
+@pytest.fixture
+def client(data_dir, monkeypatch):
+    # The app's data paths are relative to the repo root
+    monkeypatch.chdir(os.path.dirname(data_dir))
+    return app.app.test_client()
+
+@pytest.fixture(scope="module")
+def pooled_state(data_dir, tmp_path_factory):
+    """A small pooled model, trained the way qb_predictor.py --pooled trains it"""
+    qb_frames = load_qb_data_files(data_dir)
+    predictor = PooledQBFantasyPredictor(search="halving", max_fits=4, n_jobs=1)
+    predictor.train_on_all_qbs({key: qb_data[qb_data["Season"] != 2025].copy() for key, qb_data in qb_frames.items()})
+    state_path = str(tmp_path_factory.mktemp("models") / "pooled")
+    predictor.save_state(state_path)
+    return state_path
+
+@pytest.fixture(scope="module")
+def live_predictor(pooled_state, data_dir):
+    return LivePredictor(pooled_state, data_dir=data_dir, name_mapping=app.QB_NAME_MAPPING)
+
+@pytest.fixture
+def predict(client, live_predictor, monkeypatch):
+    monkeypatch.setattr(app, "live_predictor", live_predictor)
+    return lambda payload: client.post('/api/predict', json=payload)
+
+@pytest.fixture
+def baseline(tmp_path, monkeypatch):
+    """A backtest baseline with a few seasons of made up errors"""
+    rng = np.random.default_rng(0)
+    folds = [{'qb': qb, 'season': season, 'rows': [{'actual': float(20 + error), 'predicted': 20.0}
+                                                    for error in rng.normal(0, 6, 16)]}
+             for qb in ("josh_allen", "joe_burrow") for season in (2022, 2023)]
+    baseline_file = tmp_path / "baseline.json"
+    baseline_file.write_text(json.dumps({'folds': folds}))
+    monkeypatch.setattr(app, "season_simulator", app.SeasonSimulator(str(baseline_file)))
+    return baseline_file
+
+def test_first_snapshot_load_starts_the_watcher_once(data_dir):
+    manager = app.QBDataManager(os.path.join(data_dir, "predictions"), os.path.join(data_dir, "nfl_schedule_2025.csv"),
+                                bundle_file=None, watch_interval=60.0)
+    assert manager.watcher is None
+    assert manager.snapshot.qb_names
+    watcher = manager.watcher
+    assert watcher.is_alive() and watcher.daemon
+    manager.snapshot
+    assert manager.watcher is watcher
+
+    unwatched = app.QBDataManager(os.path.join(data_dir, "predictions"), os.path.join(data_dir, "nfl_schedule_2025.csv"),
+                                  bundle_file=None, watch_interval=None)
+    assert unwatched.snapshot.qb_names and unwatched.watcher is None
+
+def test_rankings_are_served_conditionally(client):
+    response = client.get('/api/qb_rankings')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == "public, no-cache"
+    rankings = response.get_json()
+    assert rankings and set(rankings[0]) == {'name', 'total_points'}
+    assert [row['total_points'] for row in rankings] == sorted((row['total_points'] for row in rankings), reverse=True)
+
+    etag = response.headers['ETag']
+    assert client.get('/api/qb_rankings', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/api/qb_rankings', headers={'If-None-Match': '"stale"'}).status_code == 200
+    assert client.get('/api/qb_rankings', headers={'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
+
+    compressed = client.get('/api/qb_rankings', headers={'Accept-Encoding': "gzip"})
+    assert compressed.headers['Content-Encoding'] == "gzip"
+    assert compressed.headers['ETag'] != etag
+    assert json.loads(gzip.decompress(compressed.get_data())) == rankings
+    # A tag only matches the encoding it was served with
+    assert client.get('/api/qb_rankings', headers={'If-None-Match': etag, 'Accept-Encoding': "gzip"}).status_code == 200
+
+def test_comparisons_are_keyed_by_the_selected_qbs(client):
+    first = client.get('/api/qb_comparison?qbs=Josh Allen&qbs=Joe Burrow')
+    second = client.get('/api/qb_comparison?qbs=Joe Burrow&qbs=Josh Allen&qbs=Josh Allen')
+    assert first.status_code == second.status_code == 200
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert client.get('/api/qb_comparison?qbs=Josh Allen').status_code == 400
+
+def test_response_cache_drops_old_versions_and_bounds_comparisons():
+    def snapshot(version, sequence, points):
+        return SimpleNamespace(version=version, sequence=sequence, last_modified=datetime(2025, 9, 1, tzinfo=timezone.utc),
+                               get_qb_rankings=lambda: [("Josh Allen", points)],
+                               get_qb_comparison_data=lambda qb_names: {'qbs': qb_names, 'points': points})
+    cache = app.APIResponseCache(max_comparisons=2)
+    with app.app.test_request_context('/api/qb_rankings'):
+        old = cache.rankings_response(snapshot("v1", 1, 400.0))
+        assert cache.rankings_response(snapshot("v1", 1, 999.0)).get_json() == old.get_json()
+        new = cache.rankings_response(snapshot("v2", 2, 410.0))
+        assert new.get_json() == [{'name': "Josh Allen", 'total_points': 410.0}]
+        assert new.headers['ETag'] != old.headers['ETag']
+
+        for qb_names in (["A", "B"], ["A", "C"], ["B", "C"]):
+            cache.comparison_response(snapshot("v2", 2, 410.0), qb_names)
+        assert list(cache.comparisons) == [("A", "C"), ("B", "C")]
+
+        # A request still holding the old snapshot is answered from it without touching the cache
+        stale = cache.rankings_response(snapshot("v1", 1, 400.0))
+        assert stale.get_json() == old.get_json()
+        assert cache.comparison_response(snapshot("v1", 1, 400.0), ["A", "C"]).get_json()['points'] == 400.0
+        assert (cache.version, list(cache.comparisons)) == ("v2", [("A", "C"), ("B", "C")])
+        assert cache.rankings_response(snapshot("v2", 2, 999.0)).get_json() == new.get_json()
+        assert cache.comparison_response(snapshot("v2", 2, 999.0), ["A", "C"]).get_json()['points'] == 410.0
+
+def test_snapshots_are_numbered_in_build_order(client):
+    snapshot = app.qb_manager.snapshot
+    rebuilt = app.qb_manager.build_snapshot(snapshot)
+    assert rebuilt.version == snapshot.version and rebuilt.sequence > snapshot.sequence
+
+def test_predict_returns_the_season(predict):
+    response = predict({'qb': "Josh Allen"})
+    assert response.status_code == 200
+    result = response.get_json()
+    assert set(result) == {'qb', 'season', 'predictions', 'latency_ms', 'batch_rows'}
+    assert (result['qb'], result['season']) == ("Josh Allen", 2025)
+    assert set(result['latency_ms']) == {'total', 'queued', 'batch'}
+    weeks = [prediction['week'] for prediction in result['predictions']]
+    assert weeks == sorted(weeks) and len(weeks) == result['batch_rows']
+    assert all(set(prediction) == {'week', 'opponent', 'predicted_points'} for prediction in result['predictions'])
+
+    # File keys work too, and a what-if change leaves the weeks before it alone
+    changed = predict({'qb': "josh_allen", 'games': [{'week': weeks[-1], 'Pass_Yds': 500, 'Pass_TD': 5}]}).get_json()
+    assert [prediction['week'] for prediction in changed['predictions']] == weeks
+    assert changed['predictions'][:-1] == result['predictions'][:-1]
+
+@pytest.mark.parametrize("payload, status, message", [
+    ([1, 2], 400, "Expected a JSON object"),
+    ({'games': []}, 400, "Expected a JSON object"),
+    ({'qb': "Josh Allen", 'games': {}}, 400, "Expected a JSON object"),
+    ({'qb': ["Josh Allen"]}, 400, "qb must be a QB name"),
+    ({'qb': "Nobody"}, 404, "Unknown QB"),
+    ({'qb': "Josh Allen", 'games': ["week 1"]}, 400, "must be a JSON object"),
+    ({'qb': "Josh Allen", 'games': [{'opponent': "KC"}]}, 400, "integer week"),
+    ({'qb': "Josh Allen", 'games': [{'week': 19}]}, 400, "outside 1-18"),
+    ({'qb': "Josh Allen", 'games': [{'week': 1, 'opponent': "XXX"}]}, 400, "Unknown opponent"),
+    ({'qb': "Josh Allen", 'games': [{'week': 1, 'opponent': 7}]}, 400, "Unknown opponent"),
+    ({'qb': "Josh Allen", 'games': [{'week': 1, 'Pass_Yds': "lots"}]}, 400, "Pass_Yds must be a number"),
+])
+def test_predict_rejects_bad_requests(predict, payload, status, message):
+    response = predict(payload)
+    assert response.status_code == status
+    assert message in response.get_json()['error']
+
+def test_predict_reports_a_failed_batch_and_keeps_serving(predict, live_predictor, monkeypatch):
+    predict({'qb': "Josh Allen"})
+    qb_key = live_predictor.qb_keys["Josh Allen"]
+    monkeypatch.setitem(live_predictor.season_matrices, qb_key, np.zeros((3, 1)))
+    failed = predict({'qb': "Josh Allen"})
+    assert failed.status_code == 500
+    assert "Prediction failed" in failed.get_json()['error']
+    assert predict({'qb': "Joe Burrow"}).status_code == 200
+
+def test_predict_without_a_model(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "live_predictor", LivePredictor(str(tmp_path / "pooled")))
+    response = client.post('/api/predict', json={'qb': "Josh Allen"})
+    assert response.status_code == 503
+    assert "No pooled model" in response.get_json()['error']
+
+def test_simulate_summarizes_the_selected_qbs(client, baseline):
+    response = client.get('/api/simulate?qbs=Josh Allen&qbs=Joe Burrow&sims=500&seed=3&threshold=400')
+    assert response.status_code == 200
+    result = response.get_json()
+    assert {'sims', 'seed', 'boom_points', 'bust_points', 'qbs', 'version'} <= set(result)
+    assert (result['sims'], result['seed']) == (500, 3)
+    assert set(result['qbs']) == {"Josh Allen", "Joe Burrow"}
+    summary = result['qbs']["Josh Allen"]
+    assert set(summary['percentiles']) == {'p10', 'p25', 'p50', 'p75', 'p90'}
+    assert set(summary['at_least']) == {'400'} and 0 <= summary['at_least']['400'] <= 1
+    assert len(summary['weeks']) == 18 and list(summary['head_to_head']) == ["Joe Burrow"]
+    # The same seed draws the same seasons
+    assert client.get('/api/simulate?qbs=Josh Allen&qbs=Joe Burrow&sims=500&seed=3&threshold=400').get_json() == result
+
+def test_simulate_rejects_bad_requests(client, baseline, tmp_path, monkeypatch):
+    assert "Unknown QBs: Nobody" in client.get('/api/simulate?qbs=Nobody').get_json()['error']
+    assert client.get('/api/simulate?sims=0').status_code == 400
+    assert client.get(f'/api/simulate?sims={app.season_simulator.max_sims + 1}').status_code == 400
+    negative_seed = client.get('/api/simulate?qbs=Josh Allen&sims=50&seed=-1')
+    assert negative_seed.status_code == 400
+    assert "seed must be a non-negative integer" in negative_seed.get_json()['error']
+    monkeypatch.setattr(app, "season_simulator", app.SeasonSimulator(str(tmp_path / "missing.json")))
+    response = client.get('/api/simulate?sims=10')
+    assert response.status_code == 503
+    assert "No backtest baseline" in response.get_json()['error']
+
+def test_optimize_ranks_the_candidates(client):
+    response = client.get('/api/optimize?roster=Josh Allen&roster=Joe Burrow&slots=1&candidates=all')
+    assert response.status_code == 200
+    result = response.get_json()
+    assert set(result) == {'roster', 'slots', 'weeks', 'season_total', 'starts', 'candidates', 'projection', 'version'}
+    assert (result['roster'], result['slots'], result['projection']) == (["Josh Allen", "Joe Burrow"], 1, "median")
+    assert len(result['weeks']) == 18
+    assert sum(week['points'] for week in result['weeks'].values()) == pytest.approx(result['season_total'])
+    assert all(len(week['starters']) <= 1 for week in result['weeks'].values())
+
+    candidates = result['candidates']
+    assert {candidate['qb'] for candidate in candidates}.isdisjoint(result['roster'])
+    gains = [candidate['best_swap']['gain'] for candidate in candidates]
+    assert gains == sorted(gains, reverse=True)
+    assert all(candidate['best_swap']['drop'] in result['roster'] for candidate in candidates)
+
+@pytest.mark.parametrize("query, message", [
+    ("", "at least 1 roster QB"),
+    ("roster=Josh Allen&slots=0", "slots must be between"),
+    ("roster=Josh Allen&projection=p99", "projection must be one of"),
+    ("roster=Nobody", "Unknown QBs: Nobody"),
+    ("roster=Josh Allen&candidates=Nobody", "Unknown QBs: Nobody"),
+])
+def test_optimize_rejects_bad_requests(client, query, message):
+    response = client.get(f'/api/optimize?{query}')
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
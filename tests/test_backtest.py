@@ -0,0 +1,23 @@
+import os
+import shutil
+
+import pytest
+
+from backtest import run_backtest, run_fold
+
+def test_short_history_is_skipped(data_dir):
+    # Josh Allen's first season has no earlier games to train on
+    assert run_fold(os.path.join(data_dir, "josh_allen_complete_data.csv"), 2018, {'search': "halving", 'n_jobs': 1}) is None
+
+def test_training_errors_are_not_swallowed(data_dir):
+    with pytest.raises(ValueError, match="Search budget too small"):
+        run_fold(os.path.join(data_dir, "josh_allen_complete_data.csv"), 2022, {'search': "halving", 'max_fits': 1, 'n_jobs': 1})
+
+# Every fold fails, so the overall scores are taken over no games
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+def test_failed_folds_are_reported(data_dir, tmp_path):
+    shutil.copy(os.path.join(data_dir, "josh_allen_complete_data.csv"), tmp_path)
+    baseline = run_backtest(str(tmp_path), seasons=(2022, 2022), workers=1, predictor_options={'max_fits': 1})
+    assert baseline['partial'] and baseline['folds'] == []
+    assert [(fold['qb'], fold['season']) for fold in baseline['failed_folds']] == [("josh_allen", 2022)]
+    assert "Search budget too small" in baseline['failed_folds'][0]['error']
@@ -0,0 +1,56 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from defense_table import DEFENSE_STATS, DefenseTable
+
+STATS = list(DEFENSE_STATS)
+
+def old_defense(defense):
+    """Per game stats keyed by opponent and the season they are used in, as merge_qb_and_defense_stats.py built them"""
+    defense = defense.copy()
+    defense["G"] = pd.to_numeric(defense["G"], errors="coerce").replace({0: pd.NA})
+    for stat, source in DEFENSE_STATS.items():
+        values = pd.to_numeric(defense[source], errors="coerce")
+        defense[stat] = values if source == "Fantasy per Game FantPt" else values / defense["G"]
+    old = defense[["Tm", "Season"] + STATS].rename(columns={"Tm": "Opponent"})
+    old["Season"] = old["Season"] + 1
+    return old
+
+def league_games(data_dir):
+    return pd.concat([pd.read_csv(file_path, usecols=["Season", "Week", "Opponent"])
+                      for file_path in sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv")))],
+                     ignore_index=True)
+
+def test_lookup_matches_the_old_merge(data_dir):
+    defense = pd.read_csv(os.path.join(data_dir, "def_vs_qb_stats.csv"))
+    table = DefenseTable.from_stats(defense)
+    games = league_games(data_dir)
+    # The old merge left unknown opponents empty, the table gives them the league average instead
+    games = games[table.known_teams(games["Opponent"].to_numpy())]
+
+    merged = pd.merge(games, old_defense(defense), on=["Season", "Opponent"], how="left")
+    attached = table.attach(games)
+    assert len(merged) == len(games)
+    np.testing.assert_array_equal(attached[STATS].to_numpy(), merged[STATS].to_numpy(dtype=np.float64))
+
+def test_unknown_opponents_and_seasons_fall_back(data_dir):
+    defense = pd.read_csv(os.path.join(data_dir, "def_vs_qb_stats.csv"))
+    table = DefenseTable.from_stats(defense)
+    last_season = int(defense["Season"].max())
+    season_rows = old_defense(defense)
+    season_rows = season_rows[season_rows["Season"] == last_season + 1]
+
+    looked_up = table.lookup([last_season + 1, last_season + 1, table.first_season - 1, np.nan], ["XXX", "@BUF", "BUF", "BUF"])
+    np.testing.assert_allclose(looked_up[0], season_rows[STATS].mean().to_numpy(dtype=np.float64))
+    np.testing.assert_array_equal(looked_up[1], season_rows.loc[season_rows["Opponent"] == "BUF", STATS].to_numpy(dtype=np.float64)[0])
+    assert np.isnan(looked_up[2:]).all()
+
+def test_saved_table_loads_back(data_dir, tmp_path):
+    table = DefenseTable.from_csv(os.path.join(data_dir, "def_vs_qb_stats.csv"))
+    table.save(tmp_path / "defense.npz")
+    loaded = DefenseTable.load(tmp_path / "defense.npz")
+    assert (loaded.first_season, loaded.teams, loaded.stats) == (table.first_season, table.teams, table.stats)
+    np.testing.assert_array_equal(loaded.values, table.values)
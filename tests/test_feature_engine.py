@@ -0,0 +1,46 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_engine import FEATURE_SPEC, INTERNAL_FEATURES, compute_features, reference_features
+from qb_predictor import QBFantasyPredictor
+
+OUTPUT_FEATURES = [name for name in FEATURE_SPEC if name not in INTERNAL_FEATURES]
+
+def qb_games(file_path):
+    return QBFantasyPredictor().add_game_columns(pd.read_csv(file_path))
+
+def assert_parity(engine, reference):
+    assert list(engine.index) == list(reference.index)
+    for name in OUTPUT_FEATURES:
+        new, old = engine[name].to_numpy(dtype=np.float64), reference[name].to_numpy(dtype=np.float64)
+        assert np.array_equal(np.isnan(new), np.isnan(old)), name
+        if FEATURE_SPEC[name][0] == "flag" or np.issubdtype(reference[name].dtype, np.integer):
+            assert np.array_equal(new, old), name
+        else:
+            assert np.allclose(new, old, rtol=1e-9, atol=1e-12, equal_nan=True), name
+
+def test_every_qb_matches_the_pandas_path(data_dir):
+    for file_path in sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv"))):
+        games = qb_games(file_path)
+        assert_parity(compute_features(games), reference_features(games))
+
+def test_grouped_pass_matches_one_call_per_qb(data_dir):
+    file_paths = sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv")))[:4]
+    frames = [qb_games(file_path).assign(player=i) for i, file_path in enumerate(file_paths)]
+    grouped = compute_features(pd.concat(frames, ignore_index=True), group_col="player")
+    for i, qb_data in enumerate(frames):
+        single = compute_features(qb_data)
+        np.testing.assert_array_equal(grouped.loc[grouped["player"] == i, OUTPUT_FEATURES].to_numpy(),
+                                      single[OUTPUT_FEATURES].to_numpy())
+
+@pytest.mark.parametrize("features", [["fantasy_momentum"], ["efficiency_score", "high_volume_games"]])
+def test_feature_subset_matches_the_full_pass(data_dir, features):
+    games = qb_games(os.path.join(data_dir, "josh_allen_complete_data.csv"))
+    full = compute_features(games)
+    subset = compute_features(games, features=features)
+    for name in features:
+        np.testing.assert_array_equal(subset[name].to_numpy(), full[name].to_numpy())
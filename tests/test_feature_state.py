@@ -0,0 +1,71 @@
+import math
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from feature_engine import FEATURE_SPEC, INTERNAL_FEATURES, compute_features
+from feature_state import QBFeatureState, RunningWindow
+from qb_predictor import QBFantasyPredictor
+
+OUTPUT_FEATURES = [name for name in FEATURE_SPEC if name not in INTERNAL_FEATURES]
+
+def played_games(data_dir, qb_key="josh_allen"):
+    data = pd.read_csv(os.path.join(data_dir, f"{qb_key}_complete_data.csv"))
+    return QBFantasyPredictor().add_game_columns(data).dropna(subset=["target"]).sort_values("date", kind="stable")
+
+def test_next_features_match_full_recompute(data_dir):
+    games = played_games(data_dir)
+    records = games.to_dict("records")
+    state = QBFeatureState()
+    for i, game in enumerate(records):
+        streamed = state.next_features(game)
+        if i >= 10:
+            full = compute_features(games.iloc[:i + 1]).iloc[-1]
+            for name in OUTPUT_FEATURES:
+                assert np.isclose(streamed[name], full[name], rtol=1e-9, equal_nan=True), (i, name)
+        state.append(game)
+
+def test_saved_state_continues_the_stream(data_dir):
+    records = played_games(data_dir).to_dict("records")
+    state = QBFeatureState.from_history(pd.DataFrame(records[:60]))
+    restored = QBFeatureState.from_dict(state.to_dict())
+    for game in records[60:70]:
+        assert restored.next_features(game) == state.next_features(game)
+        state.append(game)
+        restored.append(game)
+
+def test_running_window_keeps_infinities_out_of_the_sums():
+    running, buffer = RunningWindow(3), deque(maxlen=3)
+    for value in [1.0, math.inf, 2.0]:
+        removed = buffer[0] if len(buffer) == 3 else None
+        buffer.append(value)
+        running.update(value, removed, buffer)
+    assert running.aggregate(3, "mean") == math.inf
+    assert math.isnan(running.aggregate(3, "std"))
+    assert math.isfinite(running.total) and math.isfinite(running.total_sq)
+
+    # Once the inf leaves the window the mean is exact again, without waiting for the periodic re-sum
+    buffer.append(4.0)
+    running.update(4.0, 1.0, buffer)
+    buffer.append(6.0)
+    running.update(6.0, math.inf, buffer)
+    assert running.aggregate(3, "mean") == np.mean([2.0, 4.0, 6.0])
+    assert np.isclose(running.aggregate(3, "std"), np.std([2.0, 4.0, 6.0], ddof=1))
+
+def test_weekly_update_streams_only_the_new_games(data_dir, tmp_path):
+    games = pd.read_csv(os.path.join(data_dir, "josh_allen_complete_data.csv"))
+    games = games[games["Fantasy_Points"].notna()].sort_values(["Season", "Week"], kind="stable")
+    predictor = QBFantasyPredictor(search="halving", max_fits=4, n_jobs=1)
+    predictor.train_on_qb_data(games.iloc[:-3])
+    predictor.save_state(str(tmp_path / "qb"))
+
+    loaded = QBFantasyPredictor(n_jobs=1)
+    loaded.load_state(str(tmp_path / "qb"))
+    new_rows = loaded.stream_new_games(games.iloc[:-2])
+    full, _ = loaded.build_features(games.iloc[:-2], is_training=True)
+    full_row = full.sort_values("date", kind="stable").iloc[-1]
+    assert len(new_rows) == 1
+    for feature in loaded.top_features:
+        assert np.isclose(new_rows[feature].iloc[0], full_row[feature], rtol=1e-9), feature
@@ -0,0 +1,49 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from league_table import LeagueTable, build_league_table, load_league_table, source_files
+from qb_predictor import load_qb_data_files
+
+def test_frames_match_the_csv_files(data_dir, tmp_path):
+    csv_frames = load_qb_data_files(data_dir)
+    table_frames = load_qb_data_files(data_dir, str(tmp_path / "league_table"))
+    assert list(table_frames) == list(csv_frames)
+    for qb_key, qb_data in csv_frames.items():
+        pd.testing.assert_frame_equal(table_frames[qb_key], qb_data)
+
+def test_missing_and_text_columns_keep_the_file_schema(data_dir, tmp_path):
+    for file_path in list(source_files(data_dir).values())[:2]:
+        shutil.copy(file_path, tmp_path)
+    first, second = sorted(source_files(str(tmp_path)).values())
+    # One file without the QB column and with an all empty text column read as float64
+    qb_data = pd.read_csv(first).drop(columns=["QB"])
+    qb_data["Opponent"] = np.nan
+    qb_data.to_csv(first, index=False)
+
+    table = build_league_table(str(tmp_path), str(tmp_path / "league_table"))
+    for file_path in (first, second):
+        qb_key = os.path.basename(file_path).replace("_complete_data.csv", "")
+        pd.testing.assert_frame_equal(table.source_frame(qb_key), pd.read_csv(file_path))
+
+def test_qb_slices_are_views_of_the_table(data_dir, tmp_path):
+    table = load_league_table(data_dir, str(tmp_path / "league_table"))
+    qb_data = table.qb(table.qb_keys[0])
+    for name, values in table.columns.items():
+        if name not in table.categories:
+            assert np.shares_memory(qb_data[name].to_numpy(), values), name
+
+def test_rebuild_replaces_a_stale_table(data_dir, tmp_path):
+    table_dir = tmp_path / "league_table"
+    build_league_table(data_dir, str(table_dir))
+    manifest = json.loads((table_dir / "manifest.json").read_text())
+    manifest['version'] = 1
+    (table_dir / "manifest.json").write_text(json.dumps(manifest))
+
+    table = load_league_table(data_dir, str(table_dir))
+    assert isinstance(table, LeagueTable) and table.is_current(data_dir)
+    # The old table was renamed aside and deleted once the new one was in place
+    assert os.listdir(tmp_path) == ["league_table"]
@@ -0,0 +1,12 @@
+from qb_predictor import PooledQBFantasyPredictor, load_qb_data_files
+
+def test_pooled_model_keeps_the_qb_features(data_dir):
+    qb_frames = load_qb_data_files(data_dir)
+    historical = {key: qb_frames[key][qb_frames[key]["Season"] != 2025].copy() for key in sorted(qb_frames)[:6]}
+    predictor = PooledQBFantasyPredictor(search="halving", max_fits=4, n_jobs=1)
+    predictor.train_on_all_qbs(historical)
+
+    shared = [feature for feature in predictor.top_features if feature not in predictor.QB_FEATURES]
+    assert predictor.top_features[-len(predictor.QB_FEATURES):] == predictor.QB_FEATURES
+    assert len(shared) == 25 and shared == predictor.feature_importance['feature'].head(25).tolist()
+    assert not set(predictor.feature_importance['feature']) & set(predictor.QB_FEATURES)
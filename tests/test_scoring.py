@@ -0,0 +1,61 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import SCORING_PROFILES, compute_points, infer_fumbles, score_games
+
+def old_formula(data):
+    """Fantasy_Points as clean_qb_data.py computed it before the scoring profiles"""
+    return (
+        (data['Pass_Yds'] / 25) +
+        (data['Pass_TD'] * 4) +
+        (data['Rush_Yds'] / 10) +
+        (data['Rush_TD'] * 6) -
+        (data['INT'] * 2) -
+        (data['Fumbles'] * 2)
+    )
+
+def box_scores(n_games=500, seed=0):
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        'Pass_Yds': rng.integers(-10, 520, n_games), 'Pass_TD': rng.integers(0, 7, n_games),
+        'Rush_Yds': rng.integers(-15, 130, n_games), 'Rush_TD': rng.integers(0, 3, n_games),
+        'INT': rng.integers(0, 5, n_games), 'Fumbles': rng.integers(0, 4, n_games)
+    }).astype(np.float64)
+    data.loc[::37, 'Rush_Yds'] = np.nan
+    return data
+
+def test_standard_profile_matches_the_old_formula_bit_for_bit():
+    data = box_scores()
+    np.testing.assert_array_equal(compute_points(data)[:, 0], old_formula(data).to_numpy())
+
+def test_fumbles_are_recovered_from_the_stored_points():
+    data = box_scores().dropna()
+    data['Fantasy_Points'] = old_formula(data)
+    np.testing.assert_array_equal(infer_fumbles(data.drop(columns=['Fumbles'])), data['Fumbles'].to_numpy())
+    np.testing.assert_array_equal(compute_points(data.drop(columns=['Fumbles']))[:, 0], data['Fantasy_Points'].to_numpy())
+
+def test_every_data_file_rescores_to_its_stored_points(data_dir):
+    for file_path in sorted(glob.glob(os.path.join(data_dir, "*_complete_data.csv"))):
+        data = pd.read_csv(file_path).dropna(subset=['Fantasy_Points'])
+        assert (infer_fumbles(data) >= 0).all(), file_path
+        np.testing.assert_allclose(compute_points(data)[:, 0], data['Fantasy_Points'].to_numpy(), rtol=0, atol=1e-9,
+                                   err_msg=file_path)
+
+def test_profiles_are_scored_together_with_their_bonuses():
+    data = pd.DataFrame({'Pass_Yds': [300.0, 299.0, 410.0], 'Pass_TD': [2.0, 2.0, 3.0], 'Rush_Yds': [100.0, 20.0, 0.0],
+                         'Rush_TD': [0.0, 1.0, 0.0], 'INT': [1.0, 0.0, 2.0], 'Fumbles': [0.0, 1.0, 0.0]})
+    scored = score_games(data, list(SCORING_PROFILES))
+    assert list(scored.columns) == list(SCORING_PROFILES)
+    base = old_formula(data)
+    np.testing.assert_allclose(scored['six_point_td'], base + 2 * data['Pass_TD'])
+    np.testing.assert_allclose(scored['draftkings'], base + data['INT'] + data['Fumbles'] + [6, 0, 3])
+    np.testing.assert_allclose(scored['fanduel'], base + data['INT'])
+    np.testing.assert_allclose(scored['bonus_yards'], base + [4, 0, 4])
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError, match="Unknown scoring profiles"):
+        compute_points(box_scores(5), ['standard', 'ppr_superflex'])